@@ -2,9 +2,34 @@ from rest_framework import serializers
 from ...models import ChallengeTemplate, Challenge, ChallengeParticipation, Team
 from django.contrib.auth import get_user_model
 from apps.waste.models import WasteCategory, SubCategory
+from apps.waste.services.units import UNIT_CONVERSIONS, canonical_unit
 
 User = get_user_model()
 
+GOAL_UNIT_HELP = ("Unit of goal_quantity. Progress is summed in canonical units (kg, l or pcs), so this must "
+                  "be the canonical unit of the target subcategory; it defaults to it when left blank.")
+
+
+def validate_goal_unit(attrs):
+    """
+    Checks that a challenge goal is given in the canonical unit its progress is summed in.
+
+    Subcategory targets default to their canonical unit. Category targets may
+    mix units, so any canonical unit is accepted.
+    """
+    unit = (attrs.get("unit") or "").strip()
+    subcategory = attrs.get("target_subcategory")
+    if subcategory:
+        expected = canonical_unit(subcategory.unit)
+        if unit and unit != expected:
+            raise serializers.ValidationError(
+                {"unit": f"Goals on this subcategory are measured in {expected}, not {unit}."}
+            )
+        attrs["unit"] = expected
+    elif unit and unit not in {canonical for canonical, _ in UNIT_CONVERSIONS.values()}:
+        raise serializers.ValidationError({"unit": f"Use a canonical unit (kg, l or pcs), not {unit}."})
+    return attrs
+
 
 class ChallengeTemplateSerializer(serializers.ModelSerializer):
     target_category = serializers.PrimaryKeyRelatedField(
@@ -30,6 +55,7 @@ class ChallengeTemplateSerializer(serializers.ModelSerializer):
             "created_at",
         ]
         read_only_fields = ["id", "created_at"]
+        extra_kwargs = {"unit": {"help_text": GOAL_UNIT_HELP}}
 
     def validate(self, attrs):
         category = attrs.get("target_category")
@@ -40,7 +66,7 @@ class ChallengeTemplateSerializer(serializers.ModelSerializer):
         if not category and not subcategory:
             raise serializers.ValidationError("Either target_category or target_subcategory must be set.")
 
-        return attrs
+        return validate_goal_unit(attrs)
 
 
 
@@ -74,9 +100,12 @@ class ChallengeSerializer(serializers.ModelSerializer):
             "participants_count",
         ]
         read_only_fields = ["id", "creator", "created_at", "participants_count"]
+        extra_kwargs = {"unit": {"help_text": GOAL_UNIT_HELP}}
 
     def get_participants_count(self, obj):
-        return obj.participants.count()
+        # Annotated by ChallengeViewSet; fall back to a query for other callers
+        count = getattr(obj, 'participants_count', None)
+        return obj.participants.count() if count is None else count
 
     def validate(self, attrs):
         start = attrs.get("start_date")
@@ -92,7 +121,7 @@ class ChallengeSerializer(serializers.ModelSerializer):
         if not category and not subcategory:
             raise serializers.ValidationError("Either target_category or target_subcategory must be set.")
 
-        return attrs
+        return validate_goal_unit(attrs)
 
 
 class ChallengeParticipationSerializer(serializers.ModelSerializer):
@@ -114,25 +143,6 @@ class ChallengeParticipationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
-    def validate(self, attrs):
-        user = self.context['request'].user
-        challenge = attrs.get('challenge')
-        team = attrs.get('team')
-
-        # Ensure the user isn't already part of the challenge
-        if ChallengeParticipation.objects.filter(user=user, challenge=challenge).exists():
-            raise serializers.ValidationError("You have already joined this challenge.")
-
-        # Prevent joining team-based challenges without a team
-        if challenge.entry_type == 'team' and not team:
-            raise serializers.ValidationError("You must be part of a team to join this challenge.")
-
-        # Ensure the user is not already part of a team in the same challenge
-        if team and ChallengeParticipation.objects.filter(user=user, challenge=challenge, team=team).exists():
-            raise serializers.ValidationError("You are already part of this team for this challenge.")
-
-        return attrs
-
 
 
 class TeamSerializer(serializers.ModelSerializer):
@@ -159,3 +169,15 @@ class TeamSerializer(serializers.ModelSerializer):
 
         return attrs
 
+
+
+class ChallengeEnrollSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    city = serializers.CharField(required=False)
+    team_id = serializers.IntegerField(required=False)
+    challenge_id = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if not any(key in attrs for key in ('user_ids', 'city', 'team_id', 'challenge_id')):
+            raise serializers.ValidationError("Provide at least one of user_ids, city, team_id or challenge_id.")
+        return attrs
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ChallengeViewSet, ChallengeJoinView, ChallengeLeaveView, TeamCreateView, TeamJoinView, TeamLeaveView
+from .views import ChallengeViewSet, ChallengeJoinView, ChallengeLeaveView, ChallengeEnrollView, TeamCreateView, TeamJoinView, TeamLeaveView
 
 # Create a router for the Challenge ViewSet
 router = DefaultRouter()
@@ -13,6 +13,7 @@ urlpatterns = [
     # Challenge Participation paths
     path('api/v1/challenges/<int:id>/join/', ChallengeJoinView.as_view(), name='challenge-join'),
     path('api/v1/challenges/<int:id>/leave/', ChallengeLeaveView.as_view(), name='challenge-leave'),
+    path('api/v1/challenges/<int:id>/enroll/', ChallengeEnrollView.as_view(), name='challenge-enroll'),
 
     # Team-related paths
     path('api/v1/challenges/<int:id>/teams/', TeamCreateView.as_view(), name='team-create'),
@@ -2,12 +2,17 @@ from rest_framework import status, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.exceptions import ValidationError
+from django.contrib.auth import get_user_model
+from apps.user.models import normalize_city
+from django.db.models import Count
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from ...models import Challenge, ChallengeParticipation, Team
-from .serializers import ChallengeSerializer, ChallengeParticipationSerializer, TeamSerializer
-from apps.challenges.services import ChallengeService, TeamService
+from .serializers import ChallengeSerializer, ChallengeEnrollSerializer, ChallengeParticipationSerializer, TeamSerializer
+from apps.challenges.index import active_challenges
+from apps.challenges.services import STANDINGS_LIMIT, ChallengeService, TeamService
 
 # Challenge Views
 
@@ -16,13 +21,13 @@ class ChallengeViewSet(viewsets.ModelViewSet):
     serializer_class = ChallengeSerializer
 
     def get_queryset(self):
-        queryset = Challenge.objects.all()
+        queryset = Challenge.objects.annotate(participants_count=Count('participants')).order_by('id')
         status_filter = self.request.query_params.get("status")
 
         if status_filter == "active":
-            queryset = queryset.filter(start_date__lte=timezone.now(), end_date__gte=timezone.now())
+            queryset = queryset.filter(pk__in=active_challenges.active_ids())
         elif status_filter == "past":
-            queryset = queryset.filter(end_date__lt=timezone.now())
+            queryset = queryset.filter(end_date__lt=timezone.localdate())
 
         category = self.request.query_params.get("target_category")
         if category:
@@ -36,7 +41,16 @@ class ChallengeViewSet(viewsets.ModelViewSet):
 
 
     def perform_create(self, serializer):
-        ChallengeService.create(user=self.request.user, data=serializer.validated_data)
+        serializer.instance = ChallengeService.create(user=self.request.user, data=serializer.validated_data)
+
+    @action(detail=True, methods=['get'])
+    def standings(self, request, pk=None):
+        challenge = self.get_object()
+        try:
+            limit = min(STANDINGS_LIMIT, max(1, int(request.query_params.get('limit', STANDINGS_LIMIT))))
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ChallengeService.standings(challenge, limit))
 
 
 # Challenge Participation Views
@@ -46,7 +60,7 @@ class ChallengeJoinView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        ChallengeService.join(user=self.request.user, challenge_id=self.kwargs['id'])
+        serializer.instance = ChallengeService.join(user=self.request.user, challenge_id=self.kwargs['id'])
 
 
 
@@ -59,6 +73,34 @@ class ChallengeLeaveView(generics.DestroyAPIView):
         challenge = Challenge.objects.get(id=self.kwargs['id'])
         return ChallengeParticipation.objects.get(user=self.request.user, challenge=challenge)
 
+    def perform_destroy(self, instance):
+        ChallengeService.leave(user=self.request.user, challenge_id=instance.challenge_id)
+
+
+class ChallengeEnrollView(generics.GenericAPIView):
+    serializer_class = ChallengeEnrollSerializer
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, id):
+        # Enrolls every active user matching all given filters
+        challenge = get_object_or_404(Challenge, id=id)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+
+        users = get_user_model().objects.filter(is_active=True)
+        if 'user_ids' in filters:
+            users = users.filter(pk__in=filters['user_ids'])
+        if 'city' in filters:
+            users = users.filter(city_normalized=normalize_city(filters['city']))
+        if 'team_id' in filters:
+            users = users.filter(teams__id=filters['team_id'])
+        if 'challenge_id' in filters:
+            users = users.filter(challengeparticipation__challenge_id=filters['challenge_id'])
+
+        created = ChallengeService.enroll(challenge, users)
+        return Response({'created': created}, status=status.HTTP_201_CREATED)
+
 
 # Team Views
 
@@ -79,8 +121,10 @@ class TeamJoinView(generics.CreateAPIView):
     serializer_class = TeamSerializer
     permission_classes = [IsAuthenticated]
 
-    def perform_create(self, serializer):
-        TeamService.join(user=self.request.user, team_id=self.kwargs['id'])
+    def create(self, request, *args, **kwargs):
+        # Joining takes no input; the team is identified by the URL
+        team = TeamService.join(user=request.user, team_id=self.kwargs['id'])
+        return Response(self.get_serializer(team).data, status=status.HTTP_201_CREATED)
 
 
 
@@ -0,0 +1,96 @@
+"""
+In-process index of the challenges running today, keyed by target
+"""
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from apps.waste.models import SubCategory
+from .models import Challenge
+
+
+class ActiveChallengeIndex:
+    """
+    Answers "which challenges are running today?" and "which of them count
+    logs of this subcategory?" from memory.
+
+    The index is rebuilt lazily when the local date changes, after `ttl`
+    seconds, or when the version token in the Django cache no longer matches
+    the one it was built under. invalidate() replaces that token once a
+    challenge or subcategory change commits, so every worker sharing the
+    cache rebuilds on its next lookup; the TTL only bounds staleness when the
+    cache is not shared between processes.
+    """
+    VERSION_CACHE_KEY = 'challenges:active_index_version'
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._state = None
+
+    def invalidate(self, shared=True):
+        """
+        Drops this process' copy and, unless `shared` is False, makes every
+        other process rebuild too by replacing the shared version token.
+        """
+        if shared:
+            cache.set(self.VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        with self._lock:
+            self._state = None
+
+    def active_ids(self):
+        """Ids of all challenges running today."""
+        return self._current()['active']
+
+    def for_subcategory(self, sub_category_id):
+        """Ids of running challenges that count logs of this subcategory, directly or via its category."""
+        return self._current()['by_subcategory'].get(sub_category_id, frozenset())
+
+    def for_category(self, category_id):
+        """Ids of running challenges that target this category."""
+        return self._current()['by_category'].get(category_id, frozenset())
+
+    def _current(self):
+        today = timezone.localdate()
+        version = cache.get(self.VERSION_CACHE_KEY)
+        state = self._state
+        if (state is None or state['day'] != today or state['version'] != version
+                or time.monotonic() >= state['expires']):
+            # The version is read before the rows, so a change committed in
+            # between leaves a stale version behind and is picked up next time
+            state = self._build(today, version)
+            with self._lock:
+                self._state = state
+        return state
+
+    def _build(self, today, version):
+        rows = Challenge.objects.filter(start_date__lte=today, end_date__gte=today).values_list(
+            'id', 'target_category_id', 'target_subcategory_id'
+        )
+        active, by_category, by_subcategory = set(), {}, {}
+        for challenge_id, category_id, sub_category_id in rows:
+            active.add(challenge_id)
+            if sub_category_id:
+                by_subcategory.setdefault(sub_category_id, set()).add(challenge_id)
+            elif category_id:
+                by_category.setdefault(category_id, set()).add(challenge_id)
+        if by_category:
+            for sub_category_id, category_id in SubCategory.objects.filter(
+                category_id__in=by_category
+            ).values_list('id', 'category_id'):
+                by_subcategory.setdefault(sub_category_id, set()).update(by_category[category_id])
+
+        ttl = self.ttl if self.ttl is not None else getattr(settings, 'ACTIVE_CHALLENGE_INDEX_TTL', 300)
+        return {
+            'day': today,
+            'version': version,
+            'expires': time.monotonic() + ttl,
+            'active': frozenset(active),
+            'by_category': {key: frozenset(ids) for key, ids in by_category.items()},
+            'by_subcategory': {key: frozenset(ids) for key, ids in by_subcategory.items()},
+        }
+
+
+active_challenges = ActiveChallengeIndex()
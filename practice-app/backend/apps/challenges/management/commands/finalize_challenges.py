@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from apps.challenges.services import ChallengeService
+
+
+class Command(BaseCommand):
+    help = 'Freeze the results of ended challenges, mark completions and award badges'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of challenges finalized per batch')
+
+    def handle(self, *args, **options):
+        finalized = 0
+        while True:
+            count = ChallengeService.finalize_ended(batch_size=options['batch_size'])
+            if not count:
+                break
+            finalized += count
+
+        self.stdout.write(self.style.SUCCESS(f'Finalized {finalized} challenges.'))
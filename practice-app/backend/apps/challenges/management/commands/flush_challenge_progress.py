@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.challenges.services import ChallengeService
+
+
+class Command(BaseCommand):
+    help = 'Applies queued waste log progress changes to challenge participations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of queued changes applied per statement')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and flush the queue every interval instead of exiting when it is empty')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to wait between flushes when --loop is set')
+
+    def handle(self, *args, **options):
+        while True:
+            applied = updated = failed = 0
+            while True:
+                result = ChallengeService.flush_progress_queue(options['batch_size'])
+                if result is None:
+                    break
+                applied += result[0]
+                updated += result[1]
+                failed += result[2]
+                if result[2]:
+                    # Failed rows back off; retry on a later run instead of spinning
+                    break
+
+            if applied or failed:
+                self.stdout.write(f'Applied {applied} queued changes to {updated} participations, {failed} failed.')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Challenge progress queue flushed.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.challenges.models import Challenge
+from apps.challenges.services import ChallengeService
+
+
+class Command(BaseCommand):
+    help = 'Recompute participation progress of running challenges from waste logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--challenge', type=int, action='append', dest='challenges',
+                            help='Only recompute this challenge (can be repeated)')
+
+    def handle(self, *args, **options):
+        if options['challenges']:
+            challenges = Challenge.objects.filter(pk__in=options['challenges'])
+        else:
+            today = timezone.localdate()
+            challenges = Challenge.objects.filter(start_date__lte=today, end_date__gte=today)
+
+        updated = 0
+        for challenge in challenges.order_by('pk'):
+            updated += ChallengeService.recompute_progress(challenge)
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} participations.'))
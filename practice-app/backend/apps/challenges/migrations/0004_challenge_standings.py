@@ -0,0 +1,45 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0003_pendingchallengeprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChallengeTeamProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('progress', models.FloatField(default=0.0)),
+                ('members', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='challengeparticipation',
+            index=models.Index(fields=['challenge', '-progress'], name='participation_standing_idx'),
+        ),
+        migrations.AddField(
+            model_name='challengeteamprogress',
+            name='challenge',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_totals', to='challenges.challenge'),
+        ),
+        migrations.AddField(
+            model_name='challengeteamprogress',
+            name='team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='challenge_totals', to='challenges.team'),
+        ),
+        migrations.AddIndex(
+            model_name='challengeteamprogress',
+            index=models.Index(fields=['challenge', '-progress'], name='team_progress_standing_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='challengeteamprogress',
+            constraint=models.UniqueConstraint(fields=('challenge', 'team'), name='unique_challenge_team_progress'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0004_challenge_standings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChallengeResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participants', models.PositiveIntegerField()),
+                ('completions', models.PositiveIntegerField()),
+                ('standings', models.JSONField()),
+                ('finalized_at', models.DateTimeField(auto_now_add=True)),
+                ('challenge', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result', to='challenges.challenge')),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:58
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def drop_duplicate_participations(apps, schema_editor):
+    """Keep the earliest participation of each (user, challenge) so the unique constraint can be added."""
+    ChallengeParticipation = apps.get_model('challenges', 'ChallengeParticipation')
+    keep = (
+        ChallengeParticipation.objects.values('user_id', 'challenge_id')
+        .annotate(first_id=models.Min('id')).values('first_id')
+    )
+    ChallengeParticipation.objects.exclude(id__in=keep).delete()
+
+
+def count_team_members(apps, schema_editor):
+    Team = apps.get_model('challenges', 'Team')
+    Team.objects.update(member_count=Coalesce(models.Subquery(
+        Team.members.through.objects.filter(team_id=models.OuterRef('pk'))
+        .values('team_id').annotate(count=models.Count('id')).values('count')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0005_challengeresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='challenge',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='teams', to='challenges.challenge'),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_team_members, migrations.RunPython.noop),
+        migrations.RunPython(drop_duplicate_participations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='challengeparticipation',
+            constraint=models.UniqueConstraint(fields=('user', 'challenge'), name='unique_challenge_participation'),
+        ),
+    ]
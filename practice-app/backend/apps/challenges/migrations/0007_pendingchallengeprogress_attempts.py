@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-19 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0006_participation_unique_team_capacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingchallengeprogress',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-19 19:58
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0007_pendingchallengeprogress_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingchallengeprogress',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
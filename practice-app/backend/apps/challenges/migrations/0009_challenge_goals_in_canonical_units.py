@@ -0,0 +1,42 @@
+# Generated by Django 4.2.20 on 2026-10-19 21:05
+
+from decimal import Decimal
+from django.db import migrations
+
+# Frozen copy of the non-trivial apps.waste.services.units.UNIT_CONVERSIONS entries
+CONVERSIONS = {'g': ('kg', Decimal('0.001')), 'mg': ('kg', Decimal('0.000001')), 'ml': ('l', Decimal('0.001'))}
+SMALLEST_GOAL = Decimal('0.01')
+
+
+def goals_to_canonical_units(apps, schema_editor):
+    """
+    Progress is summed in kg, l or pcs, so goals entered in g, mg or ml are converted.
+
+    The unit typed on the goal is used, or the target subcategory's unit when
+    none was typed. goal_quantity keeps two decimals; goals that would round
+    to zero become 0.01.
+    """
+    for model_name in ('Challenge', 'ChallengeTemplate'):
+        model = apps.get_model('challenges', model_name)
+        rows = model.objects.select_related('target_subcategory').only(
+            'goal_quantity', 'unit', 'target_subcategory__unit'
+        )
+        for row in rows:
+            # The typed unit wins; goals without one are in their subcategory's unit
+            unit = (row.unit or '').strip().lower() or (row.target_subcategory and row.target_subcategory.unit)
+            if unit not in CONVERSIONS:
+                continue
+            canonical, factor = CONVERSIONS[unit]
+            quantity = (row.goal_quantity * factor).quantize(SMALLEST_GOAL)
+            model.objects.filter(pk=row.pk).update(goal_quantity=max(quantity, SMALLEST_GOAL), unit=canonical)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0008_pendingchallengeprogress_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(goals_to_canonical_units, migrations.RunPython.noop),
+    ]
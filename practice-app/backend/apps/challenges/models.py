@@ -1,5 +1,8 @@
+from datetime import datetime, time, timedelta
 from django.db import models
+from django.db.models import Count, Q, Sum
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from apps.waste.models import WasteCategory, SubCategory
 
 User = get_user_model()
@@ -67,6 +70,20 @@ class Challenge(models.Model):
     def __str__(self):
         return self.name
 
+    def get_window(self):
+        """Start (inclusive) and end (exclusive) datetimes covering start_date through end_date."""
+        start = timezone.make_aware(datetime.combine(self.start_date, time.min))
+        end = timezone.make_aware(datetime.combine(self.end_date + timedelta(days=1), time.min))
+        return start, end
+
+    def log_filter(self, prefix=''):
+        """Q matching the waste logs that count towards this challenge (target and window)."""
+        start, end = self.get_window()
+        q = Q(**{f'{prefix}date_logged__gte': start, f'{prefix}date_logged__lt': end})
+        if self.target_subcategory_id:
+            return q & Q(**{f'{prefix}sub_category_id': self.target_subcategory_id})
+        return q & Q(**{f'{prefix}sub_category__category_id': self.target_category_id})
+
     def clean(self):
         """Ensure only one of category or subcategory is set."""
         from django.core.exceptions import ValidationError
@@ -77,8 +94,13 @@ class Challenge(models.Model):
 
 
 class Team(models.Model):
+    CAPACITY = 5
+
     name = models.CharField(max_length=255, unique=True)
+    challenge = models.ForeignKey(Challenge, null=True, blank=True, on_delete=models.CASCADE, related_name='teams')
     members = models.ManyToManyField(User, related_name='teams')
+    # Seats taken, reserved with a conditional UPDATE so concurrent joins cannot over-fill the team
+    member_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -100,3 +122,130 @@ class ChallengeParticipation(models.Model):
     joined_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     exited_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'challenge'], name='unique_challenge_participation'),
+        ]
+        indexes = [
+            models.Index(fields=['challenge', '-progress'], name='participation_standing_idx'),
+        ]
+
+
+class ChallengeTeamProgress(models.Model):
+    """
+    Materialized team totals per challenge, used for team standings.
+
+    Rows are refreshed for the affected (challenge, team) pairs whenever
+    participation progress or team membership changes, so standings never
+    aggregate over every participation of a challenge.
+    """
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='team_totals')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='challenge_totals')
+    progress = models.FloatField(default=0.0)
+    members = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Teams per statement when refreshing totals
+    REFRESH_CHUNK = 200
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['challenge', 'team'], name='unique_challenge_team_progress'),
+        ]
+        indexes = [
+            models.Index(fields=['challenge', '-progress'], name='team_progress_standing_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.team_id} in {self.challenge_id}: {self.progress}"
+
+    @classmethod
+    def refresh(cls, pairs):
+        """
+        Recomputes the totals of the given (challenge_id, team_id) pairs with grouped queries.
+
+        Pairs whose team no longer has active participants are removed.
+        """
+        pairs = {(challenge_id, team_id) for challenge_id, team_id in pairs if team_id is not None}
+        if not pairs:
+            return
+        # One bounded team_id__in filter per challenge and chunk, so the query
+        # does not grow into an OR per pair
+        totals = []
+        for challenge_id, team_ids in cls._chunks(pairs):
+            rows = (
+                ChallengeParticipation.objects.filter(challenge_id=challenge_id, team_id__in=team_ids)
+                .exclude(status='exited')
+                .values('challenge_id', 'team_id')
+                .annotate(total=Sum('progress'), count=Count('id'))
+            )
+            totals.extend(
+                cls(challenge_id=row['challenge_id'], team_id=row['team_id'],
+                    progress=row['total'] or 0.0, members=row['count'], updated_at=timezone.now())
+                for row in rows
+            )
+        cls.objects.bulk_create(
+            totals, update_conflicts=True, unique_fields=['challenge', 'team'],
+            update_fields=['progress', 'members', 'updated_at'],
+        )
+        emptied = pairs - {(total.challenge_id, total.team_id) for total in totals}
+        for challenge_id, team_ids in cls._chunks(emptied):
+            cls.objects.filter(challenge_id=challenge_id, team_id__in=team_ids).delete()
+
+    @classmethod
+    def _chunks(cls, pairs):
+        """Yields (challenge_id, team_ids) with at most REFRESH_CHUNK teams each"""
+        teams_by_challenge = {}
+        for challenge_id, team_id in pairs:
+            teams_by_challenge.setdefault(challenge_id, []).append(team_id)
+        for challenge_id, team_ids in teams_by_challenge.items():
+            for offset in range(0, len(team_ids), cls.REFRESH_CHUNK):
+                yield challenge_id, team_ids[offset:offset + cls.REFRESH_CHUNK]
+
+
+class ChallengeResult(models.Model):
+    """
+    Frozen outcome of a finalized challenge.
+
+    Written once by the finalization job; pages about ended challenges read
+    the snapshot instead of live participation data.
+    """
+    challenge = models.OneToOneField(Challenge, on_delete=models.CASCADE, related_name='result')
+    participants = models.PositiveIntegerField()
+    completions = models.PositiveIntegerField()
+    standings = models.JSONField()
+    finalized_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Result of {self.challenge_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Challenge results are immutable.")
+        super().save(*args, **kwargs)
+
+
+class PendingChallengeProgress(models.Model):
+    """
+    Queue of progress changes waiting to be applied to challenge participations.
+
+    Waste log writes append one row per affected (user, challenge); the
+    flush_challenge_progress worker coalesces the rows per key and applies
+    them in a single UPDATE, so log writes stay cheap however many challenges
+    a user has joined.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='+')
+    delta = models.FloatField()
+    queued_at = models.DateTimeField(auto_now_add=True)
+    # Failed flush attempts; rows at the limit are skipped and kept for inspection
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Failed rows are not picked up again before this time
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.user_id} / {self.challenge_id}: {self.delta:+}"
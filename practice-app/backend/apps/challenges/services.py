@@ -1,10 +1,41 @@
+import logging
+from datetime import timedelta
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Sum
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Case, F, FloatField, Q, Sum, Value, When
 from rest_framework.exceptions import ValidationError
-from .models import Challenge, ChallengeParticipation, Team
+from .models import (
+    Challenge, ChallengeParticipation, ChallengeResult, ChallengeTeamProgress, PendingChallengeProgress, Team,
+)
+from .index import active_challenges
+from apps.rewards.models import Badge, UserBadge
 from apps.waste.models import WasteLog
 
 
+logger = logging.getLogger(__name__)
+
+STANDINGS_LIMIT = 100
+# Failed flushes of a queued progress row before it is set aside
+PROGRESS_QUEUE_MAX_ATTEMPTS = 5
+# Seconds before a failed row is retried, doubled per attempt up to the cap
+PROGRESS_QUEUE_RETRY_DELAY = 30
+PROGRESS_QUEUE_MAX_RETRY_DELAY = 3600
+# Participations looked up or updated per statement when flushing the queue
+PROGRESS_UPDATE_CHUNK = 200
+
+
+def _ranked(rows):
+    """Adds competition ranks (1, 2, 2, 4) to rows ordered by descending progress."""
+    ranked, previous = [], None
+    for position, row in enumerate(rows, start=1):
+        if previous is None or row['progress'] != previous['progress']:
+            rank = position
+        ranked.append({'rank': rank, **row})
+        previous = row
+    return ranked
+
+
 class ChallengeService:
 
     @staticmethod
@@ -14,9 +45,10 @@ class ChallengeService:
             name=data['name'],
             description=data['description'],
             goal_quantity=data['goal_quantity'],
-            unit=data['unit'],
-            target_category=data['target_category'],
-            target_subcategory=data.get('target_subcategory'),  # optional
+            unit=data.get('unit'),
+            # only one of the two targets is set
+            target_category=data.get('target_category'),
+            target_subcategory=data.get('target_subcategory'),
             start_date=data['start_date'],
             end_date=data['end_date'],
             entry_type=data['entry_type'],
@@ -25,47 +57,408 @@ class ChallengeService:
         return challenge
 
     @staticmethod
-    def join(user, challenge_id):
+    def join(user, challenge_id, team=None):
+        """
+        Creates the user's participation in a challenge.
+
+        The (user, challenge) unique constraint is the only duplicate check, so
+        concurrent joins cannot insert two participations.
+        """
         challenge = Challenge.objects.get(id=challenge_id)
 
-        if challenge.start_date <= timezone.now():
+        if challenge.start_date <= timezone.localdate():
             raise ValidationError("This challenge has already started.")
 
-        if ChallengeParticipation.objects.filter(user=user, challenge=challenge).exists():
+        if challenge.entry_type == 'team' and team is None:
+            raise ValidationError("You must be part of a team to join this challenge.")
+
+        try:
+            with transaction.atomic():
+                return ChallengeParticipation.objects.create(user=user, challenge=challenge, team=team)
+        except IntegrityError:
             raise ValidationError("You are already participating in this challenge.")
 
-        participation = ChallengeParticipation.objects.create(
-            user=user,
-            challenge=challenge,
-            score=0
-        )
-        return participation
+    @staticmethod
+    def leave(user, challenge_id):
+        """Removes the user's participation and frees their team seat."""
+        with transaction.atomic():
+            participation = ChallengeParticipation.objects.get(user=user, challenge_id=challenge_id)
+            participation.delete()
+            if participation.team_id:
+                Team.objects.filter(pk=participation.team_id, member_count__gt=0).update(
+                    member_count=F('member_count') - 1
+                )
+                participation.team.members.remove(user)
+
+    @staticmethod
+    def enroll(challenge, users, batch_size=1000):
+        """
+        Enrolls every user of the `users` queryset in an open challenge.
+
+        Initial progress comes from one grouped aggregate over the challenge
+        window, and participations are inserted with chunked bulk_create.
+        Users that already participate are skipped.
+
+        Returns:
+            int: Number of participations created
+        """
+        if challenge.entry_type != 'open':
+            raise ValidationError("Only open challenges support bulk enrollment.")
+        if challenge.end_date < timezone.localdate():
+            raise ValidationError("This challenge has already ended.")
+
+        participants = ChallengeParticipation.objects.filter(challenge=challenge)
+        user_ids = users.exclude(pk__in=participants.values('user_id')).values('pk')
+        totals = ChallengeService.compute_totals(challenge, user_ids)
+        cohort = list(user_ids.values_list('pk', flat=True).distinct().order_by('pk'))
+
+        before = participants.count()
+        for offset in range(0, len(cohort), batch_size):
+            ChallengeParticipation.objects.bulk_create(
+                [ChallengeParticipation(user_id=user_id, challenge=challenge,
+                                        progress=float(totals.get(user_id) or 0.0))
+                 for user_id in cohort[offset:offset + batch_size]],
+                ignore_conflicts=True,
+            )
+        return participants.count() - before
 
     @staticmethod
     def track_progress(user=None, waste_log=None):
         if waste_log:
-            # Only update relevant participations for the given waste_log
+            # Only update challenges running when the waste_log was logged
+            log_day = timezone.localdate(waste_log.date_logged)
+            user = waste_log.user
             participations = ChallengeParticipation.objects.filter(
-                user=waste_log.user,
-                challenge__start_date__lte=waste_log.disposal_date,
-                challenge__end_date__gte=waste_log.disposal_date
+                user=user,
+                challenge__start_date__lte=log_day,
+                challenge__end_date__gte=log_day
             )
         elif user:
             participations = ChallengeParticipation.objects.filter(user=user)
         else:
             participations = ChallengeParticipation.objects.all()
 
-        for participation in participations:
-            challenge = participation.challenge
-            waste_logs = WasteLog.objects.filter(
-                user=participation.user,
-                disposal_date__range=[challenge.start_date, challenge.end_date]
+        challenges = Challenge.objects.filter(pk__in=participations.values('challenge_id'))
+        for challenge in challenges:
+            ChallengeService.recompute_progress(challenge, user_ids=[user.pk] if user else None)
+
+    @staticmethod
+    def compute_totals(challenge, user_ids):
+        """
+        Sums each user's normalized quantity logged towards the challenge in one grouped query.
+
+        Args:
+            challenge: The challenge whose target and window filter the logs
+            user_ids: Iterable or subquery of user ids to compute totals for
+
+        Returns:
+            dict: user id -> total (users without logs are omitted)
+        """
+        return dict(
+            WasteLog.objects.filter(challenge.log_filter(), user_id__in=user_ids)
+            .values('user_id')
+            .annotate(total=Sum('normalized_quantity'))
+            .values_list('user_id', 'total')
+        )
+
+    @staticmethod
+    def recompute_progress(challenge, user_ids=None, batch_size=1000):
+        """
+        Recomputes the progress of a challenge's participations from waste logs.
+
+        Runs one grouped aggregate for all participants and writes the changed
+        rows with bulk_update. Exited participations are left untouched.
+
+        Returns:
+            int: Number of participations whose progress changed
+        """
+        participations = ChallengeParticipation.objects.filter(challenge=challenge).exclude(status='exited')
+        pending = PendingChallengeProgress.objects.filter(challenge=challenge)
+        if user_ids is not None:
+            participations = participations.filter(user_id__in=user_ids)
+            pending = pending.filter(user_id__in=user_ids)
+
+        with transaction.atomic():
+            # Queued deltas are already part of the recomputed totals
+            pending.delete()
+            totals = ChallengeService.compute_totals(challenge, participations.values('user_id'))
+            changed = []
+            for participation in participations.only('id', 'user_id', 'progress'):
+                progress = float(totals.get(participation.user_id) or 0.0)
+                if abs(participation.progress - progress) > 1e-6:
+                    participation.progress = progress
+                    changed.append(participation)
+            ChallengeParticipation.objects.bulk_update(changed, ['progress'], batch_size=batch_size)
+            if changed:
+                ChallengeService.refresh_team_totals(challenge)
+        return len(changed)
+
+    @staticmethod
+    def refresh_team_totals(challenge):
+        """Rebuilds the materialized team totals of a challenge, including teams that lost all members."""
+        team_ids = set(
+            ChallengeParticipation.objects.filter(challenge=challenge, team__isnull=False)
+            .values_list('team_id', flat=True).distinct()
+        )
+        team_ids.update(ChallengeTeamProgress.objects.filter(challenge=challenge).values_list('team_id', flat=True))
+        ChallengeTeamProgress.refresh((challenge.pk, team_id) for team_id in team_ids)
+
+    @staticmethod
+    def standings(challenge, limit=STANDINGS_LIMIT):
+        """
+        Individual and team rankings of a challenge, best progress first.
+
+        Finalized challenges are served from their result snapshot, cached without expiry.
+
+        Returns:
+            dict: challenge id, whether the standings are final, and the ranked individuals and teams
+        """
+        cache_key = f'challenge-standings:{challenge.pk}:{limit}'
+        if challenge.end_date < timezone.localdate():
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+            snapshot = ChallengeResult.objects.filter(challenge=challenge).values_list('standings', flat=True).first()
+            if snapshot is not None:
+                result = {
+                    'challenge': challenge.pk,
+                    'final': True,
+                    'individuals': snapshot['individuals'][:limit],
+                    'teams': snapshot['teams'][:limit],
+                }
+                cache.set(cache_key, result, None)
+                return result
+        return ChallengeService.live_standings(challenge, limit)
+
+    @staticmethod
+    def live_standings(challenge, limit=None):
+        """Rankings computed from the current participations and team totals."""
+        individuals = (
+            ChallengeParticipation.objects.filter(challenge=challenge).exclude(status='exited')
+            .order_by('-progress', 'joined_at', 'id')
+            .values('user_id', 'team_id', 'progress', 'status', username=F('user__username'))[:limit]
+        )
+        teams = (
+            ChallengeTeamProgress.objects.filter(challenge=challenge)
+            .order_by('-progress', 'team_id')
+            .values('team_id', 'progress', 'members', name=F('team__name'))[:limit]
+        )
+        return {
+            'challenge': challenge.pk,
+            'final': False,
+            'individuals': _ranked(individuals),
+            'teams': _ranked(teams),
+        }
+
+    @staticmethod
+    def finalize(challenge, batch_size=1000):
+        """
+        Freezes the results of an ended challenge.
+
+        Recomputes final progress in one grouped aggregate, marks participations
+        that reached the goal as completed, awards the challenge badge in bulk
+        and writes the result snapshot. Does nothing if the challenge is already
+        finalized.
+
+        Returns:
+            ChallengeResult: The snapshot, or None if another run already wrote it
+        """
+        with transaction.atomic():
+            challenge = Challenge.objects.select_for_update().get(pk=challenge.pk)
+            if ChallengeResult.objects.filter(challenge=challenge).exists():
+                return None
+
+            ChallengeService.recompute_progress(challenge, batch_size=batch_size)
+            ChallengeService.refresh_team_totals(challenge)
+
+            now = timezone.now()
+            goal = float(challenge.goal_quantity)
+            participations = list(
+                ChallengeParticipation.objects.filter(challenge=challenge).exclude(status='exited')
+                .only('id', 'user_id', 'progress', 'status', 'completed_at')
             )
+            completed = []
+            for participation in participations:
+                if participation.status == 'ongoing' and participation.progress >= goal:
+                    participation.status = 'completed'
+                    participation.completed_at = now
+                    completed.append(participation)
+            ChallengeParticipation.objects.bulk_update(completed, ['status', 'completed_at'], batch_size=batch_size)
 
-            total_score = sum([log.quantity for log in waste_logs])
-            participation.score = total_score
-            participation.save()
+            winners = [participation.user_id for participation in participations if participation.status == 'completed']
+            if winners:
+                badge, _ = Badge.objects.get_or_create(
+                    code=f'challenge-{challenge.pk}-completed',
+                    defaults={'name': f'{challenge.name} finisher', 'icon': '🏁',
+                              'description': f'Completed the "{challenge.name}" challenge.'},
+                )
+                UserBadge.objects.bulk_create(
+                    [UserBadge(user_id=user_id, badge=badge) for user_id in winners],
+                    ignore_conflicts=True, batch_size=batch_size,
+                )
 
+            return ChallengeResult.objects.create(
+                challenge=challenge,
+                participants=len(participations),
+                completions=len(winners),
+                standings=ChallengeService.live_standings(challenge),
+            )
+
+    @staticmethod
+    def finalize_ended(batch_size=100, today=None):
+        """
+        Finalizes one batch of ended challenges that have no result yet.
+
+        Returns:
+            int: Number of challenges finalized
+        """
+        today = today or timezone.localdate()
+        ended = (
+            Challenge.objects.filter(end_date__lt=today, result__isnull=True)
+            .order_by('end_date', 'pk')[:batch_size]
+        )
+        return sum(1 for challenge in ended if ChallengeService.finalize(challenge) is not None)
+
+    @staticmethod
+    def queue_progress_deltas(deltas):
+        """
+        Queues waste log progress deltas for the challenges they count towards.
+
+        Args:
+            deltas: (user_id, sub_category_id, date_logged, delta) tuples, see WasteLog.progress_deltas()
+        """
+        pending = []
+        today = timezone.localdate()
+        for user_id, sub_category_id, logged_at, delta in deltas:
+            log_day = timezone.localdate(logged_at)
+            participations = ChallengeParticipation.objects.filter(user_id=user_id).exclude(status='exited')
+            if log_day == today:
+                # Most logs are for today: the in-process index narrows the candidates without a join
+                candidates = active_challenges.for_subcategory(sub_category_id)
+                if not candidates:
+                    continue
+                participations = participations.filter(challenge_id__in=candidates)
+            else:
+                participations = participations.filter(
+                    Q(challenge__target_subcategory_id=sub_category_id)
+                    | Q(challenge__target_category__subcategory__id=sub_category_id),
+                    challenge__start_date__lte=log_day, challenge__end_date__gte=log_day,
+                )
+            challenge_ids = participations.values_list('challenge_id', flat=True).distinct()
+            pending.extend(
+                PendingChallengeProgress(user_id=user_id, challenge_id=challenge_id, delta=delta)
+                for challenge_id in challenge_ids
+            )
+        PendingChallengeProgress.objects.bulk_create(pending)
+
+    @staticmethod
+    def flush_progress_queue(batch_size=1000):
+        """
+        Applies one batch of queued progress deltas.
+
+        Deltas are summed per (user, challenge) and written with a few chunked
+        UPDATEs. If the batch fails, each key is retried on its own so one bad
+        key cannot hold back the rest. Rows of keys that still fail are kept,
+        their attempt counter raised and next_attempt_at pushed out with
+        exponential backoff; rows that reach PROGRESS_QUEUE_MAX_ATTEMPTS are
+        left in the table for inspection and no longer picked up.
+
+        Returns:
+            tuple: (queued rows applied, participations updated, queued rows that failed),
+            or None when no row is due
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                PendingChallengeProgress.objects.select_for_update(skip_locked=True)
+                .filter(attempts__lt=PROGRESS_QUEUE_MAX_ATTEMPTS, next_attempt_at__lte=now)
+                .order_by('id')
+                .values_list('id', 'user_id', 'challenge_id', 'delta', 'attempts')[:batch_size]
+            )
+            if not rows:
+                return None
+
+            totals = {}
+            for _, user_id, challenge_id, delta, _ in rows:
+                totals[(user_id, challenge_id)] = totals.get((user_id, challenge_id), 0.0) + delta
+            totals = {key: delta for key, delta in totals.items() if delta}
+
+            failed_keys = set()
+            try:
+                with transaction.atomic():
+                    updated = ChallengeService.apply_progress_totals(totals)
+            except DatabaseError:
+                logger.exception("Applying %d queued challenge progress changes failed, retrying per key", len(rows))
+                updated = 0
+                for key, delta in totals.items():
+                    try:
+                        with transaction.atomic():
+                            updated += ChallengeService.apply_progress_totals({key: delta})
+                    except DatabaseError:
+                        logger.exception("Applying queued challenge progress of %s failed", key)
+                        failed_keys.add(key)
+
+            failed = [row for row in rows if (row[1], row[2]) in failed_keys]
+            ChallengeService._retry_later(failed, now)
+            failed_ids = {row[0] for row in failed}
+            PendingChallengeProgress.objects.filter(
+                id__in=[row[0] for row in rows if row[0] not in failed_ids]
+            ).delete()
+        return len(rows) - len(failed), updated, len(failed)
+
+    @staticmethod
+    def _retry_later(rows, now):
+        """Raises the attempt counter of failed queue rows and backs off their next attempt."""
+        by_attempts = {}
+        for row in rows:
+            by_attempts.setdefault(row[4] + 1, []).append(row[0])
+        for attempts, ids in by_attempts.items():
+            delay = min(PROGRESS_QUEUE_MAX_RETRY_DELAY, PROGRESS_QUEUE_RETRY_DELAY * 2 ** (attempts - 1))
+            PendingChallengeProgress.objects.filter(id__in=ids).update(
+                attempts=attempts, next_attempt_at=now + timedelta(seconds=delay)
+            )
+
+    @staticmethod
+    def apply_progress_totals(totals):
+        """
+        Adds summed deltas to the matching non-exited participations and refreshes their team totals.
+
+        Args:
+            totals: dict of (user_id, challenge_id) -> delta
+
+        Returns:
+            int: Number of participations updated
+        """
+        by_challenge = {}
+        for (user_id, challenge_id), delta in totals.items():
+            by_challenge.setdefault(challenge_id, {})[user_id] = delta
+
+        # Participations are looked up per challenge with id__in chunks so no
+        # statement grows with the batch size (SQLite limits expression depth)
+        deltas, team_pairs = {}, set()
+        for challenge_id, user_deltas in by_challenge.items():
+            user_ids = list(user_deltas)
+            for offset in range(0, len(user_ids), PROGRESS_UPDATE_CHUNK):
+                for pk, user_id, team_id in (
+                    ChallengeParticipation.objects
+                    .filter(challenge_id=challenge_id, user_id__in=user_ids[offset:offset + PROGRESS_UPDATE_CHUNK])
+                    .exclude(status='exited')
+                    .values_list('id', 'user_id', 'team_id')
+                ):
+                    deltas[pk] = user_deltas[user_id]
+                    if team_id is not None:
+                        team_pairs.add((challenge_id, team_id))
+
+        ids = list(deltas)
+        for offset in range(0, len(ids), PROGRESS_UPDATE_CHUNK):
+            chunk = ids[offset:offset + PROGRESS_UPDATE_CHUNK]
+            ChallengeParticipation.objects.filter(id__in=chunk).update(progress=Case(
+                *(When(id=pk, then=F('progress') + Value(deltas[pk])) for pk in chunk),
+                default=F('progress'),
+                output_field=FloatField(),
+            ))
+        ChallengeTeamProgress.refresh(team_pairs)
+        return len(ids)
 
 
 class TeamService:
@@ -85,18 +478,25 @@ class TeamService:
 
     @staticmethod
     def join(user, team_id):
-        team = Team.objects.get(id=team_id)
+        """
+        Adds the user to a team and the team's challenge.
+
+        A seat is reserved with a conditional UPDATE on member_count, so
+        concurrent joins cannot push a team past Team.CAPACITY; the reservation
+        is rolled back if the participation cannot be created.
+        """
+        team = Team.objects.select_related('challenge').get(id=team_id)
         challenge = team.challenge
 
-        if challenge.entry_type != 'team':
+        if challenge is None or challenge.entry_type != 'team':
             raise ValidationError("This challenge does not support team entries.")
 
-        if team.members.count() >= 5:
-            raise ValidationError("This team is already full.")
-
-        if ChallengeParticipation.objects.filter(user=user, challenge=challenge).exists():
-            raise ValidationError("You are already participating in this challenge.")
-
-        team.members.add(user)
-        ChallengeParticipation.objects.create(user=user, challenge=challenge, team=team, score=0)
+        with transaction.atomic():
+            reserved = Team.objects.filter(pk=team.pk, member_count__lt=Team.CAPACITY).update(
+                member_count=F('member_count') + 1
+            )
+            if not reserved:
+                raise ValidationError("This team is already full.")
+            ChallengeService.join(user, challenge.pk, team=team)
+            team.members.add(user)
         return team
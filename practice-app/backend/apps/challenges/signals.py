@@ -1,11 +1,37 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from apps.waste.models import WasteLog
+from apps.waste.models import SubCategory, WasteLog
+from .index import active_challenges
+from .models import Challenge, ChallengeParticipation, ChallengeTeamProgress
 from .services import ChallengeService
 
-# @receiver(post_save, sender=WasteLog)
-# def update_challenge_progress_on_wastelog(sender, instance, created, **kwargs):
-#     if not created:
-#         return  # Only act on new entries
 
-#     ChallengeService.track_progress(user=instance.user)
\ No newline at end of file
+@receiver(post_save, sender=WasteLog)
+def queue_challenge_progress_on_wastelog(sender, instance, created, **kwargs):
+    """Queue the progress change of a created or edited WasteLog for the challenges it counts towards."""
+    ChallengeService.queue_progress_deltas(instance.progress_deltas(created=created))
+
+
+@receiver(post_delete, sender=WasteLog)
+def queue_challenge_progress_on_wastelog_delete(sender, instance, **kwargs):
+    """Queue the removal of a deleted WasteLog from challenge progress."""
+    ChallengeService.queue_progress_deltas(instance.progress_deltas(deleted=True))
+
+
+@receiver(post_save, sender=ChallengeParticipation)
+@receiver(post_delete, sender=ChallengeParticipation)
+def refresh_team_progress(sender, instance, **kwargs):
+    """Keep the team totals in line when a member joins, leaves or changes status."""
+    ChallengeTeamProgress.refresh([(instance.challenge_id, instance.team_id)])
+
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+def invalidate_active_challenges(sender, **kwargs):
+    """Rebuild the active challenge index on next use after a challenge or its targets change."""
+    # This transaction already sees the change; other processes only once it commits
+    active_challenges.invalidate(shared=False)
+    transaction.on_commit(active_challenges.invalidate)
@@ -0,0 +1,35 @@
+import factory
+from datetime import timedelta
+from django.utils import timezone
+from factory.django import DjangoModelFactory
+from apps.challenges.models import Challenge, ChallengeParticipation, Team
+from apps.waste.tests.factories import UserFactory, SubCategoryFactory
+
+
+class ChallengeFactory(DjangoModelFactory):
+    class Meta:
+        model = Challenge
+
+    creator = factory.SubFactory(UserFactory)
+    name = factory.Sequence(lambda n: f'Challenge {n}')
+    description = 'Log as much as you can'
+    goal_quantity = 10
+    target_subcategory = factory.SubFactory(SubCategoryFactory)
+    start_date = factory.LazyFunction(lambda: timezone.localdate() - timedelta(days=1))
+    end_date = factory.LazyFunction(lambda: timezone.localdate() + timedelta(days=7))
+    entry_type = 'individual'
+
+
+class TeamFactory(DjangoModelFactory):
+    class Meta:
+        model = Team
+
+    name = factory.Sequence(lambda n: f'Team {n}')
+
+
+class ChallengeParticipationFactory(DjangoModelFactory):
+    class Meta:
+        model = ChallengeParticipation
+
+    user = factory.SubFactory(UserFactory)
+    challenge = factory.SubFactory(ChallengeFactory)
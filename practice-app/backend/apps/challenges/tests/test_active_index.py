@@ -0,0 +1,73 @@
+import pytest
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.challenges.index import ActiveChallengeIndex, active_challenges
+from apps.challenges.models import PendingChallengeProgress
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import SubCategoryFactory, UserFactory
+from .factories import ChallengeFactory, ChallengeParticipationFactory
+
+
+@pytest.mark.django_db
+class TestActiveChallengeIndex:
+
+    def test_keys_running_challenges_by_target(self):
+        sub_category = SubCategoryFactory()
+        sibling = SubCategoryFactory(category=sub_category.category)
+        direct = ChallengeFactory(target_subcategory=sub_category)
+        by_category = ChallengeFactory(target_subcategory=None, target_category=sub_category.category)
+        ChallengeFactory(target_subcategory=sub_category, start_date=timezone.localdate() + timedelta(days=1))
+        ChallengeFactory(target_subcategory=sub_category, end_date=timezone.localdate() - timedelta(days=1))
+
+        assert active_challenges.for_subcategory(sub_category.pk) == {direct.pk, by_category.pk}
+        assert active_challenges.for_subcategory(sibling.pk) == {by_category.pk}
+        assert active_challenges.for_category(sub_category.category_id) == {by_category.pk}
+        assert active_challenges.active_ids() == {direct.pk, by_category.pk}
+
+    def test_refreshed_when_challenges_or_subcategories_change(self):
+        challenge = ChallengeFactory(target_subcategory=None, target_category=SubCategoryFactory().category)
+        assert active_challenges.active_ids() == {challenge.pk}
+
+        added = SubCategoryFactory(category=challenge.target_category)
+        assert active_challenges.for_subcategory(added.pk) == {challenge.pk}
+
+        challenge.end_date = timezone.localdate() - timedelta(days=1)
+        challenge.save()
+        assert active_challenges.active_ids() == frozenset()
+
+    def test_other_processes_rebuild_once_the_change_commits(self, django_capture_on_commit_callbacks):
+        other_worker = ActiveChallengeIndex(ttl=3600)
+        assert other_worker.active_ids() == frozenset()
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            challenge = ChallengeFactory()
+        # Not committed yet: other workers keep their copy
+        assert other_worker.active_ids() == frozenset()
+
+        for callback in callbacks:
+            callback()
+        assert other_worker.active_ids() == {challenge.pk}
+
+    def test_unmatched_log_skips_participation_lookup(self, django_assert_num_queries):
+        participation = ChallengeParticipationFactory()
+        user, other = participation.user, SubCategoryFactory()
+        active_challenges.active_ids()
+
+        # insert and the goal update; no challenge lookup
+        with django_assert_num_queries(2):
+            WasteLog.objects.create(user=user, sub_category=other, quantity=1)
+
+        WasteLog.objects.create(user=user, sub_category=participation.challenge.target_subcategory, quantity=1)
+        assert PendingChallengeProgress.objects.count() == 1
+
+    def test_active_listing(self):
+        running = ChallengeFactory()
+        ChallengeFactory(end_date=timezone.localdate() - timedelta(days=1))
+        client = APIClient()
+        client.force_authenticate(user=UserFactory())
+
+        response = client.get(reverse('challenge-list'), {'status': 'active'})
+
+        assert [challenge['id'] for challenge in response.data['results']] == [running.pk]
@@ -0,0 +1,54 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.waste.tests.factories import SubCategoryFactory, UserFactory
+from .factories import ChallengeFactory, ChallengeParticipationFactory
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(user=UserFactory())
+    return client
+
+
+@pytest.mark.django_db
+class TestChallengeList:
+
+    def test_participant_counts_use_constant_queries(self, client, django_assert_num_queries):
+        challenges = [ChallengeFactory() for _ in range(12)]
+        for index, challenge in enumerate(challenges):
+            for _ in range(index % 4):
+                ChallengeParticipationFactory(challenge=challenge)
+
+        # count and one annotated page
+        with django_assert_num_queries(2):
+            response = client.get(reverse('challenge-list'))
+
+        assert response.status_code == 200
+        assert len(response.data['results']) == 10
+        assert [challenge['participants_count'] for challenge in response.data['results']] == [
+            index % 4 for index in range(10)
+        ]
+
+    def test_detail_counts_participants(self, client):
+        participation = ChallengeParticipationFactory()
+        ChallengeParticipationFactory(challenge=participation.challenge, status='exited')
+
+        response = client.get(reverse('challenge-detail', args=[participation.challenge_id]))
+
+        assert response.data['participants_count'] == 2
+
+    def test_goal_unit_must_be_canonical(self, client):
+        grams = SubCategoryFactory(unit='g')
+        data = {'name': 'Less paper', 'description': 'Recycle it', 'goal_quantity': 500,
+                'target_subcategory': grams.pk, 'start_date': '2030-01-01', 'end_date': '2030-01-08',
+                'entry_type': 'individual'}
+
+        response = client.post(reverse('challenge-list'), {**data, 'unit': 'g'}, format='json')
+        assert response.status_code == 400
+        assert 'unit' in response.data
+
+        response = client.post(reverse('challenge-list'), {**data, 'goal_quantity': 0.5}, format='json')
+        assert response.status_code == 201
+        assert response.data['unit'] == 'kg'
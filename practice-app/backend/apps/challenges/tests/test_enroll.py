@@ -0,0 +1,57 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.challenges.models import ChallengeParticipation
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import UserFactory
+from .factories import ChallengeFactory, ChallengeParticipationFactory
+
+
+@pytest.mark.django_db
+class TestChallengeEnroll:
+
+    def test_enrolls_cohort_with_initial_progress(self, admin_client, django_assert_max_num_queries):
+        client, _ = admin_client
+        challenge = ChallengeFactory(entry_type='open')
+        cohort = [UserFactory(city='Izmir') for _ in range(30)]
+        UserFactory(city='Ankara')
+        WasteLog.objects.create(user=cohort[0], sub_category=challenge.target_subcategory, quantity=4)
+        ChallengeParticipationFactory(challenge=challenge, user=cohort[1], progress=9)
+
+        # challenge, totals aggregate, cohort, two counts and one insert
+        with django_assert_max_num_queries(7):
+            response = client.post(reverse('challenge-enroll', args=[challenge.pk]), {'city': 'izmir'},
+                                         format='json')
+
+        assert response.status_code == 201
+        assert response.data == {'created': 29}
+        progress = dict(ChallengeParticipation.objects.filter(challenge=challenge).values_list('user_id', 'progress'))
+        assert set(progress) == {user.pk for user in cohort}
+        assert (progress[cohort[0].pk], progress[cohort[1].pk], progress[cohort[2].pk]) == (4, 9, 0)
+
+    def test_user_ids(self, admin_client):
+        client, _ = admin_client
+        challenge = ChallengeFactory(entry_type='open')
+        users = [UserFactory() for _ in range(3)]
+
+        response = client.post(reverse('challenge-enroll', args=[challenge.pk]),
+                                     {'user_ids': [users[0].pk, users[2].pk]}, format='json')
+
+        assert response.data == {'created': 2}
+
+    def test_rejects_non_open_challenges_and_empty_filters(self, admin_client):
+        client, _ = admin_client
+        individual = ChallengeFactory()
+        url = reverse('challenge-enroll', args=[individual.pk])
+
+        assert client.post(url, {'user_ids': [UserFactory().pk]}, format='json').status_code == 400
+        assert client.post(url, {}, format='json').status_code == 400
+
+    def test_requires_admin(self):
+        client = APIClient()
+        client.force_authenticate(user=UserFactory())
+
+        response = client.post(reverse('challenge-enroll', args=[ChallengeFactory(entry_type='open').pk]),
+                               {'user_ids': [1]}, format='json')
+
+        assert response.status_code == 403
@@ -0,0 +1,84 @@
+import importlib
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.apps import apps
+from django.core.management import call_command
+from django.utils import timezone
+from apps.challenges.models import ChallengeParticipation, ChallengeResult
+from apps.challenges.services import ChallengeService
+from apps.rewards.models import UserBadge
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import SubCategoryFactory
+from .factories import ChallengeFactory, ChallengeParticipationFactory
+
+
+def log_waste(user, sub_category, quantity, days_ago):
+    log = WasteLog.objects.create(user=user, sub_category=sub_category, quantity=quantity)
+    WasteLog.objects.filter(pk=log.pk).update(date_logged=timezone.now() - timedelta(days=days_ago))
+
+
+def ended_challenge(**kwargs):
+    today = timezone.localdate()
+    return ChallengeFactory(start_date=today - timedelta(days=10), end_date=today - timedelta(days=1), **kwargs)
+
+
+@pytest.mark.django_db
+class TestFinalizeChallenges:
+
+    def test_marks_completions_and_awards_badges(self):
+        challenge = ended_challenge(goal_quantity=5)
+        winner, loser = ChallengeParticipationFactory(challenge=challenge), ChallengeParticipationFactory(challenge=challenge)
+        quitter = ChallengeParticipationFactory(challenge=challenge, status='exited')
+        log_waste(winner.user, challenge.target_subcategory, 6, days_ago=3)
+        log_waste(loser.user, challenge.target_subcategory, 2, days_ago=3)
+        log_waste(loser.user, challenge.target_subcategory, 9, days_ago=0)  # after the end
+        log_waste(quitter.user, challenge.target_subcategory, 9, days_ago=3)
+
+        result = ChallengeService.finalize(challenge)
+
+        statuses = dict(ChallengeParticipation.objects.values_list('user_id', 'status'))
+        assert statuses == {winner.user_id: 'completed', loser.user_id: 'ongoing', quitter.user_id: 'exited'}
+        winner.refresh_from_db()
+        assert winner.completed_at is not None
+        assert list(UserBadge.objects.values_list('user_id', flat=True)) == [winner.user_id]
+        assert (result.participants, result.completions) == (2, 1)
+        assert [row['user_id'] for row in result.standings['individuals']] == [winner.user_id, loser.user_id]
+
+    def test_finalizes_once(self):
+        challenge = ended_challenge(goal_quantity=1)
+        participation = ChallengeParticipationFactory(challenge=challenge)
+        log_waste(participation.user, challenge.target_subcategory, 1, days_ago=3)
+        result = ChallengeService.finalize(challenge)
+
+        assert ChallengeService.finalize(challenge) is None
+        assert UserBadge.objects.count() == 1
+        with pytest.raises(ValueError):
+            result.save()
+
+    def test_command_skips_running_challenges(self):
+        ended = [ended_challenge() for _ in range(3)]
+        running = ChallengeFactory()
+
+        call_command('finalize_challenges', batch_size=2)
+
+        assert set(ChallengeResult.objects.values_list('challenge_id', flat=True)) == {c.pk for c in ended}
+        assert not ChallengeResult.objects.filter(challenge=running).exists()
+
+    def test_gram_goals_complete_after_migration(self):
+        migration = importlib.import_module('apps.challenges.migrations.0009_challenge_goals_in_canonical_units')
+        grams = SubCategoryFactory(unit='g')
+        challenge = ended_challenge(target_subcategory=grams, goal_quantity=500, unit='g')
+        untyped = ended_challenge(target_subcategory=grams, goal_quantity=2)
+        participation = ChallengeParticipationFactory(challenge=challenge)
+        log_waste(participation.user, grams, 600, days_ago=3)
+
+        migration.goals_to_canonical_units(apps, None)
+
+        challenge.refresh_from_db()
+        untyped.refresh_from_db()
+        assert (challenge.goal_quantity, challenge.unit) == (Decimal('0.50'), 'kg')
+        assert (untyped.goal_quantity, untyped.unit) == (Decimal('0.01'), 'kg')
+        ChallengeService.finalize(challenge)
+        participation.refresh_from_db()
+        assert participation.status == 'completed'
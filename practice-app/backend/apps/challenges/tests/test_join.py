@@ -0,0 +1,88 @@
+import pytest
+from datetime import timedelta
+from django.db import IntegrityError
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from apps.challenges.models import ChallengeParticipation, Team
+from apps.challenges.services import ChallengeService, TeamService
+from apps.waste.tests.factories import UserFactory
+from .factories import ChallengeFactory, ChallengeParticipationFactory, TeamFactory
+
+
+def upcoming_challenge(**kwargs):
+    today = timezone.localdate()
+    return ChallengeFactory(start_date=today + timedelta(days=1), end_date=today + timedelta(days=8), **kwargs)
+
+
+@pytest.mark.django_db
+class TestChallengeJoin:
+
+    def test_join_and_leave_endpoints(self):
+        user, challenge = UserFactory(), upcoming_challenge()
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post(reverse('challenge-join', args=[challenge.pk]))
+        assert response.status_code == 201
+        assert response.data['status'] == 'ongoing'
+
+        response = client.post(reverse('challenge-join', args=[challenge.pk]))
+        assert response.status_code == 400
+
+        response = client.delete(reverse('challenge-leave', args=[challenge.pk]))
+        assert response.status_code == 204
+        assert not ChallengeParticipation.objects.exists()
+
+    def test_duplicate_participation_rejected_by_database(self):
+        participation = ChallengeParticipationFactory()
+
+        with pytest.raises(IntegrityError):
+            ChallengeParticipation.objects.create(user=participation.user, challenge=participation.challenge)
+
+    def test_started_challenge_cannot_be_joined(self):
+        with pytest.raises(ValidationError):
+            ChallengeService.join(UserFactory(), ChallengeFactory().pk)
+
+
+@pytest.mark.django_db
+class TestTeamJoin:
+
+    def test_capacity_enforced(self):
+        team = TeamFactory(challenge=upcoming_challenge(entry_type='team'))
+        for _ in range(Team.CAPACITY):
+            TeamService.join(UserFactory(), team.pk)
+
+        with pytest.raises(ValidationError):
+            TeamService.join(UserFactory(), team.pk)
+
+        team.refresh_from_db()
+        assert team.member_count == team.members.count() == Team.CAPACITY
+        assert ChallengeParticipation.objects.filter(team=team).count() == Team.CAPACITY
+
+    def test_failed_join_releases_seat(self):
+        team = TeamFactory(challenge=upcoming_challenge(entry_type='team'))
+        user = UserFactory()
+        TeamService.join(user, team.pk)
+
+        with pytest.raises(ValidationError):
+            TeamService.join(user, team.pk)
+
+        team.refresh_from_db()
+        assert team.member_count == 1
+
+    def test_leaving_frees_seat(self):
+        team = TeamFactory(challenge=upcoming_challenge(entry_type='team'))
+        user = UserFactory()
+        TeamService.join(user, team.pk)
+
+        ChallengeService.leave(user, team.challenge_id)
+
+        team.refresh_from_db()
+        assert team.member_count == 0
+        assert not team.members.exists()
+
+    def test_team_challenge_requires_team(self):
+        with pytest.raises(ValidationError):
+            ChallengeService.join(UserFactory(), upcoming_challenge(entry_type='team').pk)
@@ -0,0 +1,191 @@
+import pytest
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.utils import timezone
+from apps.challenges.models import ChallengeParticipation, ChallengeTeamProgress, PendingChallengeProgress, Team
+from apps.challenges.services import PROGRESS_QUEUE_MAX_ATTEMPTS, ChallengeService
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import SubCategoryFactory
+from .factories import ChallengeFactory, ChallengeParticipationFactory
+
+
+def log_waste(user, sub_category, quantity, days_ago=0):
+    log = WasteLog.objects.create(user=user, sub_category=sub_category, quantity=quantity)
+    WasteLog.objects.filter(pk=log.pk).update(date_logged=timezone.now() - timedelta(days=days_ago))
+
+
+@pytest.mark.django_db
+class TestRecomputeProgress:
+
+    def test_grouped_recompute_respects_target_and_window(self, django_assert_num_queries):
+        challenge = ChallengeFactory()
+        participations = [ChallengeParticipationFactory(challenge=challenge) for _ in range(20)]
+        first, second = participations[0].user, participations[1].user
+        log_waste(first, challenge.target_subcategory, 2)
+        log_waste(first, challenge.target_subcategory, 3)
+        log_waste(first, challenge.target_subcategory, 50, days_ago=5)  # before the challenge
+        log_waste(first, SubCategoryFactory(), 50)  # other target
+        log_waste(second, challenge.target_subcategory, 1)
+
+        # savepoint, clearing queued deltas, aggregate, participations, one bulk update
+        # and looking up the teams to refresh
+        with django_assert_num_queries(8):
+            assert ChallengeService.recompute_progress(challenge) == 2
+
+        progress = dict(ChallengeParticipation.objects.values_list('user_id', 'progress'))
+        assert progress[first.pk] == 5
+        assert progress[second.pk] == 1
+        assert progress[participations[2].user_id] == 0
+
+    def test_category_target_sums_across_subcategories(self):
+        sub_category = SubCategoryFactory(unit='g')
+        sibling = SubCategoryFactory(category=sub_category.category, unit='kg')
+        challenge = ChallengeFactory(target_subcategory=None, target_category=sub_category.category)
+        participation = ChallengeParticipationFactory(challenge=challenge)
+        log_waste(participation.user, sub_category, 500)
+        log_waste(participation.user, sibling, 1)
+
+        call_command('recompute_challenge_progress')
+
+        participation.refresh_from_db()
+        assert participation.progress == pytest.approx(1.5)
+
+    def test_exited_participations_untouched(self):
+        participation = ChallengeParticipationFactory(status='exited', progress=4)
+        log_waste(participation.user, participation.challenge.target_subcategory, 9)
+
+        ChallengeService.recompute_progress(participation.challenge)
+
+        participation.refresh_from_db()
+        assert participation.progress == 4
+
+
+@pytest.mark.django_db
+class TestQueuedProgress:
+
+    def test_log_writes_are_coalesced_and_flushed(self, django_assert_max_num_queries):
+        challenge = ChallengeFactory()
+        participation = ChallengeParticipationFactory(challenge=challenge)
+        other = ChallengeParticipationFactory(challenge=ChallengeFactory(target_subcategory=challenge.target_subcategory),
+                                              user=participation.user)
+        ChallengeParticipationFactory(challenge=ChallengeFactory(), user=participation.user)  # other target
+
+        log = WasteLog.objects.create(user=participation.user, sub_category=challenge.target_subcategory, quantity=2)
+        log.quantity = 5
+        log.save()
+        WasteLog.objects.create(user=participation.user, sub_category=challenge.target_subcategory, quantity=1)
+
+        assert PendingChallengeProgress.objects.count() == 6
+        participation.refresh_from_db()
+        assert participation.progress == 0
+
+        # select batch, participation lookup per challenge, one update, delete batch, final empty select,
+        # plus the batch and apply savepoints
+        with django_assert_max_num_queries(12):
+            call_command('flush_challenge_progress')
+
+        assert not PendingChallengeProgress.objects.exists()
+        participation.refresh_from_db()
+        other.refresh_from_db()
+        assert participation.progress == other.progress == 6
+
+    def test_deleting_a_log_queues_negative_delta(self):
+        participation = ChallengeParticipationFactory(progress=3)
+        log = WasteLog.objects.create(user=participation.user, sub_category=participation.challenge.target_subcategory,
+                                      quantity=3)
+        PendingChallengeProgress.objects.all().delete()
+
+        log.delete()
+        ChallengeService.flush_progress_queue()
+
+        participation.refresh_from_db()
+        assert participation.progress == 0
+
+    def test_recompute_discards_queued_deltas(self):
+        participation = ChallengeParticipationFactory()
+        WasteLog.objects.create(user=participation.user, sub_category=participation.challenge.target_subcategory,
+                                quantity=4)
+
+        ChallengeService.recompute_progress(participation.challenge)
+        assert ChallengeService.flush_progress_queue() is None
+
+        participation.refresh_from_db()
+        assert participation.progress == 4
+
+    def test_flushes_a_full_batch_of_distinct_keys(self):
+        challenges = [ChallengeFactory(entry_type='team'), ChallengeFactory(entry_type='team')]
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f'bulk{i}', email=f'bulk{i}@example.com') for i in range(500)
+        )
+        teams = Team.objects.bulk_create(Team(name=f'Bulk {i}') for i in range(250))
+        ChallengeParticipation.objects.bulk_create(
+            ChallengeParticipation(challenge=challenge, user=user, team=teams[i // 2])
+            for challenge in challenges for i, user in enumerate(users)
+        )
+        PendingChallengeProgress.objects.bulk_create(
+            PendingChallengeProgress(challenge=challenge, user=user, delta=2)
+            for challenge in challenges for user in users
+        )
+
+        assert ChallengeService.flush_progress_queue(batch_size=1000) == (1000, 1000, 0)
+
+        assert not PendingChallengeProgress.objects.exists()
+        assert set(ChallengeParticipation.objects.values_list('progress', flat=True)) == {2}
+        assert ChallengeTeamProgress.objects.count() == 500
+        assert set(ChallengeTeamProgress.objects.values_list('progress', 'members')) == {(4, 2)}
+
+    def test_transient_batch_failure_loses_nothing(self):
+        participation = ChallengeParticipationFactory()
+        WasteLog.objects.create(user=participation.user, sub_category=participation.challenge.target_subcategory,
+                                quantity=4)
+        apply = ChallengeService.apply_progress_totals
+        calls = []
+
+        def deadlock_once(totals):
+            calls.append(totals)
+            if len(calls) == 1:
+                raise DatabaseError('deadlock')
+            return apply(totals)
+
+        with mock.patch.object(ChallengeService, 'apply_progress_totals', side_effect=deadlock_once):
+            call_command('flush_challenge_progress', stdout=mock.MagicMock())
+
+        assert not PendingChallengeProgress.objects.exists()
+        participation.refresh_from_db()
+        assert participation.progress == 4
+
+    def test_failing_key_backs_off_without_blocking_others(self):
+        broken, healthy = ChallengeParticipationFactory(), ChallengeParticipationFactory()
+        for participation in (broken, healthy):
+            WasteLog.objects.create(user=participation.user, sub_category=participation.challenge.target_subcategory,
+                                    quantity=4)
+        apply = ChallengeService.apply_progress_totals
+
+        def apply_unless_broken(totals):
+            if (broken.user_id, broken.challenge_id) in totals:
+                raise DatabaseError('boom')
+            return apply(totals)
+
+        with mock.patch.object(ChallengeService, 'apply_progress_totals', side_effect=apply_unless_broken):
+            call_command('flush_challenge_progress', stdout=mock.MagicMock())
+            # Backing off: a second run does not touch the failed row
+            call_command('flush_challenge_progress', stdout=mock.MagicMock())
+
+        pending = PendingChallengeProgress.objects.get()
+        assert (pending.user_id, pending.attempts) == (broken.user_id, 1)
+        assert pending.next_attempt_at > timezone.now()
+        healthy.refresh_from_db()
+        assert healthy.progress == 4
+
+    def test_exhausted_rows_are_set_aside(self):
+        participation = ChallengeParticipationFactory()
+        WasteLog.objects.create(user=participation.user, sub_category=participation.challenge.target_subcategory,
+                                quantity=4)
+        PendingChallengeProgress.objects.update(attempts=PROGRESS_QUEUE_MAX_ATTEMPTS)
+
+        assert ChallengeService.flush_progress_queue() is None
+        participation.refresh_from_db()
+        assert participation.progress == 0
@@ -0,0 +1,132 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.challenges.models import ChallengeParticipation, ChallengeTeamProgress, Team
+from apps.challenges.services import ChallengeService
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import UserFactory
+from .factories import ChallengeFactory, ChallengeParticipationFactory, TeamFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(user=UserFactory())
+    return client
+
+
+@pytest.mark.django_db
+class TestStandings:
+
+    def test_ranks_individuals_and_teams(self, client):
+        challenge = ChallengeFactory(entry_type='team')
+        red, blue = TeamFactory(), TeamFactory()
+        ChallengeParticipationFactory(challenge=challenge, team=red, progress=5)
+        ChallengeParticipationFactory(challenge=challenge, team=red, progress=1)
+        ChallengeParticipationFactory(challenge=challenge, team=blue, progress=7)
+        ChallengeParticipationFactory(challenge=challenge, progress=1)
+        ChallengeParticipationFactory(challenge=challenge, team=blue, progress=50, status='exited')
+
+        response = client.get(reverse('challenge-standings', args=[challenge.pk]))
+
+        assert response.status_code == 200
+        assert response.data['final'] is False
+        assert [(row['rank'], row['progress']) for row in response.data['individuals']] == [
+            (1, 7), (2, 5), (3, 1), (3, 1)
+        ]
+        assert [(row['rank'], row['name'], row['progress'], row['members']) for row in response.data['teams']] == [
+            (1, blue.name, 7, 1), (2, red.name, 6, 2)
+        ]
+
+    def test_invalid_limit(self, client):
+        challenge = ChallengeFactory()
+
+        response = client.get(reverse('challenge-standings', args=[challenge.pk]), {'limit': 'all'})
+
+        assert response.status_code == 400
+
+    def test_team_totals_follow_queued_progress(self):
+        challenge = ChallengeFactory(entry_type='team')
+        team = TeamFactory()
+        first = ChallengeParticipationFactory(challenge=challenge, team=team)
+        second = ChallengeParticipationFactory(challenge=challenge, team=team)
+        WasteLog.objects.create(user=first.user, sub_category=challenge.target_subcategory, quantity=2)
+        WasteLog.objects.create(user=second.user, sub_category=challenge.target_subcategory, quantity=3)
+
+        ChallengeService.flush_progress_queue()
+
+        total = ChallengeTeamProgress.objects.get(challenge=challenge, team=team)
+        assert (total.progress, total.members) == (5, 2)
+
+        second.status = 'exited'
+        second.save()
+        total.refresh_from_db()
+        assert (total.progress, total.members) == (2, 1)
+
+        first.delete()
+        assert not ChallengeTeamProgress.objects.filter(challenge=challenge).exists()
+
+    def test_refresh_handles_many_teams(self):
+        challenge = ChallengeFactory(entry_type='team')
+        teams = Team.objects.bulk_create(Team(name=f'Bulk {i}') for i in range(1200))
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f'bulk{i}', email=f'bulk{i}@example.com') for i in range(1200)
+        )
+        ChallengeParticipation.objects.bulk_create(
+            ChallengeParticipation(challenge=challenge, user=user, team=team, progress=1)
+            for user, team in zip(users, teams)
+        )
+        pairs = [(challenge.pk, team.pk) for team in teams]
+
+        ChallengeTeamProgress.refresh(pairs)
+        assert ChallengeTeamProgress.objects.filter(challenge=challenge, progress=1, members=1).count() == 1200
+
+        ChallengeParticipation.objects.filter(team__in=teams[:700]).update(status='exited')
+        ChallengeTeamProgress.refresh(pairs)
+        assert ChallengeTeamProgress.objects.filter(challenge=challenge).count() == 500
+
+    def test_recompute_refreshes_team_totals(self):
+        challenge = ChallengeFactory(entry_type='team')
+        team = TeamFactory()
+        participation = ChallengeParticipationFactory(challenge=challenge, team=team)
+        WasteLog.objects.create(user=participation.user, sub_category=challenge.target_subcategory, quantity=4)
+
+        ChallengeService.recompute_progress(challenge)
+
+        assert ChallengeTeamProgress.objects.get(challenge=challenge, team=team).progress == 4
+
+    def test_ended_challenge_live_until_finalized(self):
+        today = timezone.localdate()
+        challenge = ChallengeFactory(start_date=today - timedelta(days=10), end_date=today - timedelta(days=1))
+        ChallengeParticipationFactory(challenge=challenge, progress=3)
+
+        assert ChallengeService.standings(challenge)['final'] is False
+
+    def test_finalized_challenge_cached(self, django_assert_num_queries):
+        today = timezone.localdate()
+        challenge = ChallengeFactory(start_date=today - timedelta(days=10), end_date=today - timedelta(days=1))
+        participation = ChallengeParticipationFactory(challenge=challenge, progress=3)
+        WasteLog.objects.filter(pk=WasteLog.objects.create(
+            user=participation.user, sub_category=challenge.target_subcategory, quantity=3
+        ).pk).update(date_logged=timezone.now() - timedelta(days=2))
+        ChallengeService.finalize(challenge)
+
+        first = ChallengeService.standings(challenge)
+        participation.progress = 9
+        participation.save()
+
+        with django_assert_num_queries(0):
+            assert ChallengeService.standings(challenge) == first
+        assert first['final'] is True
+        assert first['individuals'][0]['progress'] == 3
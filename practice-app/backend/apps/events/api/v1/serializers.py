@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from apps.events.models import Event
-from common.supabase_storage import upload_image, upload_base64_image, delete_image, extract_path_from_url
+from common.supabase_storage import upload_image, upload_base64_image, release_image
 
 
 class EventSerializer(serializers.ModelSerializer):
@@ -17,7 +17,7 @@ class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = [
-            'id', 'title', 'description', 'location', 'date', 'image_url',
+            'id', 'title', 'description', 'location', 'latitude', 'longitude', 'date', 'image_url',
             'image_file', 'image_base64',  # Upload fields
             'creator', 'creator_username',
             'participants_count', 'likes_count',
@@ -26,17 +26,22 @@ class EventSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['creator', 'creator_username', 'participants_count', 'likes_count', 'created_at', 'updated_at', 'image_url']
 
+    # Viewer state is annotated by EventViewSet.get_queryset;
+    # the fallbacks cover instances that were not loaded through it
+
     def get_i_am_participating(self, obj):
         user = self.context['request'].user
         if user.is_anonymous:
             return False
-        return obj.participants.filter(pk=user.pk).exists()
+        participating = getattr(obj, 'viewer_participating', None)
+        return obj.participants.filter(pk=user.pk).exists() if participating is None else participating
 
     def get_i_liked(self, obj):
         user = self.context['request'].user
         if user.is_anonymous:
             return False
-        return obj.likes.filter(pk=user.pk).exists()
+        liked = getattr(obj, 'viewer_liked', None)
+        return obj.likes.filter(pk=user.pk).exists() if liked is None else liked
 
     def validate(self, data):
         """Validate that only one image upload method is used"""
@@ -47,6 +52,13 @@ class EventSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Cannot provide both image_file and image_base64. Use only one."
             )
+
+        latitude = data.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = data.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError("Provide both latitude and longitude, or neither.")
+        if latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise serializers.ValidationError("Coordinates are out of range.")
         return data
 
     def create(self, validated_data):
@@ -85,14 +97,10 @@ class EventSerializer(serializers.ModelSerializer):
         image_file = validated_data.pop('image_file', None)
         image_base64 = validated_data.pop('image_base64', None)
         
+        old_image_url = instance.image_url
+
         # Upload image to Supabase if provided
         if image_file or image_base64:
-            # Delete old image if exists
-            if instance.image_url:
-                old_path = extract_path_from_url(instance.image_url)
-                if old_path:
-                    delete_image(old_path)
-            
             # Upload new image
             if image_file:
                 try:
@@ -114,4 +122,16 @@ class EventSerializer(serializers.ModelSerializer):
                 except Exception as e:
                     raise serializers.ValidationError(f"Failed to upload image: {str(e)}")
         
-        return super().update(instance, validated_data)
+        instance = super().update(instance, validated_data)
+
+        # Release the old image only after the new one is stored on the instance
+        if old_image_url and 'image_url' in validated_data:
+            release_image(old_image_url)
+        return instance
+
+
+class NearbyEventSerializer(EventSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(EventSerializer.Meta):
+        fields = EventSerializer.Meta.fields + ['distance_km']
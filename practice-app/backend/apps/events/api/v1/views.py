@@ -1,15 +1,19 @@
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, JSONParser
-from django.shortcuts import get_object_or_404
+from django.db.models import Exists, OuterRef
+from django.http import Http404
 from apps.events.models import Event
-from apps.events.api.v1.serializers import EventSerializer
+from apps.events.api.v1.serializers import EventSerializer, NearbyEventSerializer
 from apps.events.api.v1.permissions import IsCreatorOrAdmin, IsAdminForDelete
 from rest_framework.decorators import action
 
+NEARBY_DEFAULT_RADIUS_KM = 10
+NEARBY_MAX_RADIUS_KM = 100
+
 
 @extend_schema(
     tags=["Events"],
@@ -22,11 +26,24 @@ from rest_framework.decorators import action
     )
 )
 class EventViewSet(viewsets.ModelViewSet):
-    queryset = Event.objects.select_related('creator').prefetch_related('participants', 'likes').all()
+    queryset = Event.objects.select_related('creator').all()
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsCreatorOrAdmin, IsAdminForDelete]
     parser_classes = [MultiPartParser, JSONParser]  # Support both multipart and JSON
 
+    def get_queryset(self):
+        """Annotates the viewer's state so serializing a page needs no per-event queries"""
+        participants = Event.participants.through.objects.filter(event_id=OuterRef('pk'))
+        likes = Event.likes.through.objects.filter(event_id=OuterRef('pk'))
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                viewer_participating=Exists(participants.filter(customuser_id=user.pk)),
+                viewer_liked=Exists(likes.filter(customuser_id=user.pk)),
+            )
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user)
     
@@ -48,6 +65,43 @@ class EventViewSet(viewsets.ModelViewSet):
             logger.error(f"Error type: {type(e).__name__}")
             raise
 
+    # ----------------------------------------
+    # Nearby Endpoint
+    # ----------------------------------------
+    @extend_schema(
+        tags=["Events"],
+        summary="Events near a point",
+        description=(
+            "Lists events with coordinates within `radius` km (default 10, max 100) "
+            "of `lat`/`lon`, nearest first, with their distance in `distance_km`."
+        ),
+        parameters=[
+            OpenApiParameter('lat', float, required=True),
+            OpenApiParameter('lon', float, required=True),
+            OpenApiParameter('radius', float, required=False),
+        ],
+        responses={200: NearbyEventSerializer(many=True), 400: None}
+    )
+    @action(detail=False, methods=["get"], url_path="nearby")
+    def nearby(self, request):
+        try:
+            latitude = float(request.query_params['lat'])
+            longitude = float(request.query_params['lon'])
+            radius = float(request.query_params.get('radius', NEARBY_DEFAULT_RADIUS_KM))
+        except (KeyError, ValueError):
+            return Response({"detail": "lat and lon are required numbers; radius must be a number."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or not 0 < radius <= NEARBY_MAX_RADIUS_KM:
+            return Response(
+                {"detail": f"Coordinates must be valid and radius between 0 and {NEARBY_MAX_RADIUS_KM} km."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        events = Event.nearby(self.get_queryset(), latitude, longitude, radius)
+        page = self.paginate_queryset(events)
+        serializer = NearbyEventSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
     # ----------------------------------------
     # Participate Endpoint
     # ----------------------------------------
@@ -67,18 +121,13 @@ class EventViewSet(viewsets.ModelViewSet):
     )
     @action(detail=True, methods=["post"], url_path="participate")
     def participate(self, request, pk=None):
-        event = get_object_or_404(Event, pk=pk)
-        user = request.user
-
-        if event.participants.filter(pk=user.pk).exists():
-            event.participants.remove(user)
-            participating = False
-        else:
-            event.participants.add(user)
-            participating = True
+        try:
+            participating, count = Event.toggle(pk, request.user.pk, 'participants')
+        except Event.DoesNotExist:
+            raise Http404
 
         return Response({
-            'participants_count': event.participants.count(),
+            'participants_count': count,
             'i_am_participating': participating
         }, status=status.HTTP_200_OK)
 
@@ -101,17 +150,12 @@ class EventViewSet(viewsets.ModelViewSet):
     )
     @action(detail=True, methods=["post"], url_path="like")
     def like(self, request, pk=None):
-        event = get_object_or_404(Event, pk=pk)
-        user = request.user
-
-        if event.likes.filter(pk=user.pk).exists():
-            event.likes.remove(user)
-            liked = False
-        else:
-            event.likes.add(user)
-            liked = True
+        try:
+            liked, count = Event.toggle(pk, request.user.pk, 'likes')
+        except Event.DoesNotExist:
+            raise Http404
 
         return Response({
-            'likes_count': event.likes.count(),
+            'likes_count': count,
             'i_liked': liked
         }, status=status.HTTP_200_OK)
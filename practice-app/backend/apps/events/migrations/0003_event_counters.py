@@ -0,0 +1,35 @@
+# Generated by Django 4.2.20 on 2026-10-19 19:12
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_relations(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    for relation in ('participants', 'likes'):
+        rows = (
+            getattr(Event, relation).through.objects.filter(event_id=models.OuterRef('pk'))
+            .values('event_id').annotate(total=models.Count('*')).values('total')
+        )
+        Event.objects.update(**{f'{relation}_count': Coalesce(models.Subquery(rows), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_remove_event_image_event_image_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='participants_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_relations, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,13 @@
-from django.db import models
-from django.db.models.signals import pre_delete
+from functools import reduce
+from operator import or_
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
 from django.dispatch import receiver
 from django.conf import settings
 from django.utils import timezone
+from common.geo import cell_ranges, grid_cell, haversine_km
 
 User = settings.AUTH_USER_MODEL
 
@@ -19,30 +24,143 @@ class Event(models.Model):
     likes = models.ManyToManyField(
         User, related_name='liked_events', blank=True
     )
+    # Maintained counters of the two relations above (see toggle() and sync_event_counters)
+    participants_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+
+    # Optional coordinates; the grid cell is derived on save for radius searches (see common.geo)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    grid_row = models.IntegerField(null=True, blank=True, editable=False)
+    grid_column = models.IntegerField(null=True, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['grid_row', 'grid_column'], name='event_grid_cell_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.date.date()})"
 
-    @property
-    def participants_count(self):
-        return self.participants.count()
+    def save(self, *args, **kwargs):
+        if self.latitude is None or self.longitude is None:
+            self.grid_row = self.grid_column = None
+        else:
+            self.grid_row, self.grid_column = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'grid_row', 'grid_column'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def nearby(cls, queryset, latitude, longitude, radius_km):
+        """
+        Events of `queryset` within `radius_km` of a point, nearest first.
+
+        Candidates come from an index range scan over the grid cells covering
+        the radius and are refined with the haversine distance. Each returned
+        event carries its distance in `distance_km`.
+        """
+        (first_row, last_row), columns = cell_ranges(latitude, longitude, radius_km)
+        candidates = queryset.filter(grid_row__gte=first_row, grid_row__lte=last_row)
+        if columns is not None:
+            candidates = candidates.filter(reduce(or_, (
+                Q(grid_column__gte=first, grid_column__lte=last) for first, last in columns
+            )))
+
+        events = []
+        for event in candidates:
+            event.distance_km = haversine_km(latitude, longitude, event.latitude, event.longitude)
+            if event.distance_km <= radius_km:
+                events.append(event)
+        events.sort(key=lambda event: (event.distance_km, event.pk))
+        return events
+
+    @classmethod
+    def toggle(cls, event_id, user_id, relation):
+        """
+        Adds the user to `relation` ('participants' or 'likes') or removes them if already there.
+
+        The through row is deleted or inserted and the matching counter is moved
+        with an F() update in the same transaction. The insert runs in a savepoint
+        so a concurrent duplicate is not counted twice, and the counter is read
+        back because the update cannot return it. Raises Event.DoesNotExist for
+        an unknown event.
+
+        Returns:
+            tuple: (whether the user is now in the relation, new counter value)
+        """
+        through = getattr(cls, relation).through
+        counter = f'{relation}_count'
+        with transaction.atomic():
+            removed, _ = through.objects.filter(event_id=event_id, customuser_id=user_id).delete()
+            delta = -1 if removed else 1
+            if not removed:
+                try:
+                    with transaction.atomic():
+                        through.objects.create(event_id=event_id, customuser_id=user_id)
+                except IntegrityError:
+                    # A concurrent request added the same row and counted it
+                    delta = 0
+            if not cls.objects.filter(pk=event_id).update(**{counter: F(counter) + delta}):
+                raise cls.DoesNotExist
+            count = cls.objects.values_list(counter, flat=True).get(pk=event_id)
+        return not removed, count
+
+    @classmethod
+    def recount(cls, event_ids, relation):
+        """Resets the `relation` counter of the given events from the through table"""
+        through = getattr(cls, relation).through
+        rows = through.objects.filter(event_id=OuterRef('pk')).values('event_id').annotate(total=Count('*'))
+        cls.objects.filter(pk__in=event_ids).update(
+            **{f'{relation}_count': Coalesce(Subquery(rows.values('total')), 0)}
+        )
+
+
+@receiver(m2m_changed, sender=Event.participants.through)
+@receiver(m2m_changed, sender=Event.likes.through)
+def sync_event_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    """Recount the affected events when the relations are changed through the related managers"""
+    relation = 'participants' if sender is Event.participants.through else 'likes'
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            Event.recount([instance.pk], relation)
+    elif action == 'pre_clear':
+        # Changed from the user side: remember which events lose the user
+        instance._cleared_event_ids = list(
+            sender.objects.filter(customuser_id=instance.pk).values_list('event_id', flat=True)
+        )
+    elif action == 'post_clear':
+        Event.recount(getattr(instance, '_cleared_event_ids', []), relation)
+    elif action in ('post_add', 'post_remove'):
+        Event.recount(pk_set, relation)
+
+
+@receiver(pre_delete, sender=User)
+def remember_user_events(sender, instance, **kwargs):
+    """Deleting a user cascades to the through rows without m2m_changed, so note the events first"""
+    instance._counted_event_ids = {
+        relation: list(getattr(Event, relation).through.objects.filter(customuser_id=instance.pk)
+                       .values_list('event_id', flat=True))
+        for relation in ('participants', 'likes')
+    }
+
 
-    @property
-    def likes_count(self):
-        return self.likes.count()
+@receiver(post_delete, sender=User)
+def recount_user_events(sender, instance, **kwargs):
+    """Recount the events the deleted user took part in or liked"""
+    for relation, event_ids in getattr(instance, '_counted_event_ids', {}).items():
+        if event_ids:
+            Event.recount(event_ids, relation)
 
 
 @receiver(pre_delete, sender=Event)
 def delete_event_image(sender, instance, **kwargs):
-    """Delete associated image from Supabase storage when event is deleted"""
+    """Release associated image in Supabase storage when event is deleted"""
     if instance.image_url:
-        from common.supabase_storage import delete_image, extract_path_from_url
-        path = extract_path_from_url(instance.image_url)
-        if path:
-            delete_image(path)
+        from common.supabase_storage import release_image
+        release_image(instance.image_url)
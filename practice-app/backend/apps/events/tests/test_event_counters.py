@@ -0,0 +1,77 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.events.models import Event
+from apps.user.tests.factories import UserFactory
+
+
+@pytest.fixture
+def event():
+    return Event.objects.create(title='Cleanup', creator=UserFactory(), date=timezone.now())
+
+
+@pytest.mark.django_db
+class TestEventCounters:
+
+    def test_toggle_writes(self, event, django_assert_num_queries):
+        user = UserFactory()
+
+        # delete, insert (in a savepoint), counter update and read-back, inside the transaction
+        with django_assert_num_queries(8):
+            assert Event.toggle(event.pk, user.pk, 'likes') == (True, 1)
+        # delete, counter update and read-back, inside the transaction
+        with django_assert_num_queries(5):
+            assert Event.toggle(event.pk, user.pk, 'likes') == (False, 0)
+
+        event.refresh_from_db()
+        assert (event.likes_count, event.likes.count()) == (0, 0)
+
+    def test_toggle_endpoint_counts(self, event):
+        users = [UserFactory() for _ in range(3)]
+        for user in users:
+            client = APIClient()
+            client.force_authenticate(user=user)
+            response = client.post(reverse('event-participate', args=[event.pk]))
+
+        assert response.data == {'participants_count': 3, 'i_am_participating': True}
+        event.refresh_from_db()
+        assert event.participants_count == 3
+
+    def test_unknown_event(self, event):
+        client = APIClient()
+        client.force_authenticate(user=UserFactory())
+
+        response = client.post(reverse('event-like', args=[event.pk + 100]))
+
+        assert response.status_code == 404
+
+    def test_related_manager_changes_keep_counters(self, event):
+        first, second = UserFactory(), UserFactory()
+
+        event.participants.add(first, second)
+        event.participants.add(first)
+        event.participants.remove(first, UserFactory())
+        second.liked_events.add(event)
+        event.refresh_from_db()
+        assert (event.participants_count, event.likes_count) == (1, 1)
+
+        second.participated_events.clear()
+        event.likes.clear()
+        event.refresh_from_db()
+        assert (event.participants_count, event.likes_count) == (0, 0)
+
+    def test_deleting_a_user_recounts_their_events(self, event):
+        other = Event.objects.create(title='Planting', creator=UserFactory(), date=timezone.now())
+        user, staying = UserFactory(), UserFactory()
+        Event.toggle(event.pk, user.pk, 'likes')
+        Event.toggle(event.pk, user.pk, 'participants')
+        Event.toggle(other.pk, user.pk, 'participants')
+        Event.toggle(other.pk, staying.pk, 'participants')
+
+        user.delete()
+
+        event.refresh_from_db()
+        other.refresh_from_db()
+        assert (event.likes_count, event.participants_count) == (0, 0)
+        assert other.participants_count == other.participants.count() == 1
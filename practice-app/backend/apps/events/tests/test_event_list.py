@@ -0,0 +1,53 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.events.models import Event
+from apps.user.tests.factories import UserFactory
+
+
+@pytest.fixture
+def viewer():
+    return UserFactory()
+
+
+def create_events(count, participants, likers):
+    creator = UserFactory()
+    events = [Event.objects.create(title=f'Event {index}', creator=creator, date=timezone.now())
+              for index in range(count)]
+    for event in events:
+        event.participants.add(*participants)
+        event.likes.add(*likers)
+    return events
+
+
+@pytest.mark.django_db
+class TestEventList:
+
+    def test_viewer_state_and_totals_use_constant_queries(self, viewer, django_assert_num_queries):
+        others = [UserFactory() for _ in range(3)]
+        events = create_events(8, participants=[viewer, *others], likers=others[:2])
+        events[0].participants.remove(viewer)
+        events[1].likes.add(viewer)
+        client = APIClient()
+        client.force_authenticate(user=viewer)
+
+        # count and one annotated page
+        with django_assert_num_queries(2):
+            response = client.get(reverse('event-list'))
+
+        results = {event['id']: event for event in response.data['results']}
+        assert len(results) == 8
+        assert (results[events[0].pk]['participants_count'], results[events[0].pk]['i_am_participating']) == (3, False)
+        assert (results[events[1].pk]['likes_count'], results[events[1].pk]['i_liked']) == (3, True)
+        assert (results[events[2].pk]['participants_count'], results[events[2].pk]['i_am_participating']) == (4, True)
+        assert (results[events[2].pk]['likes_count'], results[events[2].pk]['i_liked']) == (2, False)
+
+    def test_anonymous_viewer(self):
+        event = create_events(1, participants=[UserFactory()], likers=[])[0]
+
+        response = APIClient().get(reverse('event-detail', args=[event.pk]))
+
+        assert response.data['participants_count'] == 1
+        assert response.data['i_am_participating'] is False
+        assert response.data['likes_count'] == 0
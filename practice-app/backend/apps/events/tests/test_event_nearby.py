@@ -0,0 +1,63 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.events.models import Event
+from apps.user.tests.factories import UserFactory
+
+
+def create_event(title, latitude=None, longitude=None):
+    return Event.objects.create(title=title, creator=UserFactory(), date=timezone.now(),
+                                latitude=latitude, longitude=longitude)
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(user=UserFactory())
+    return client
+
+
+@pytest.mark.django_db
+class TestNearbyEvents:
+
+    def test_returns_events_within_radius_nearest_first(self, client):
+        taksim = create_event('Taksim', 41.0370, 28.9850)
+        kadikoy = create_event('Kadikoy', 40.9900, 29.0290)
+        create_event('Ankara', 39.9208, 32.8541)
+        create_event('No coordinates')
+
+        response = client.get(reverse('event-nearby'), {'lat': 41.0369, 'lon': 28.9860, 'radius': 15})
+
+        assert response.status_code == 200
+        assert [event['id'] for event in response.data['results']] == [taksim.pk, kadikoy.pk]
+        assert response.data['results'][0]['distance_km'] < 0.2
+        assert 5 < response.data['results'][1]['distance_km'] < 7
+
+    def test_grid_cells_maintained_on_save(self):
+        event = create_event('Moving', 41.0370, 28.9850)
+        assert (event.grid_row, event.grid_column) == (410, 289)
+
+        event.latitude, event.longitude = None, None
+        event.save(update_fields=['latitude', 'longitude'])
+        event.refresh_from_db()
+        assert event.grid_row is None
+
+    def test_across_antimeridian(self, client):
+        east = create_event('Taveuni', -16.80, 179.99)
+        west = create_event('Across', -16.80, -179.99)
+
+        response = client.get(reverse('event-nearby'), {'lat': -16.80, 'lon': 179.999, 'radius': 5})
+
+        assert {event['id'] for event in response.data['results']} == {east.pk, west.pk}
+
+    @pytest.mark.parametrize('params', [{}, {'lat': 'x', 'lon': 1}, {'lat': 91, 'lon': 0},
+                                        {'lat': 0, 'lon': 0, 'radius': 500}])
+    def test_invalid_parameters(self, client, params):
+        assert client.get(reverse('event-nearby'), params).status_code == 400
+
+    def test_coordinates_validated_on_create(self, client):
+        response = client.post(reverse('event-list'), {'title': 'Half', 'date': timezone.now().isoformat(),
+                                                      'latitude': 41.0}, format='json')
+
+        assert response.status_code == 400
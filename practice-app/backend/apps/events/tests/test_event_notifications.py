@@ -0,0 +1,72 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from apps.events.models import Event
+from apps.notifications.models import Notification, NotificationFanout
+from apps.user.tests.factories import UserFactory
+
+
+def create_event(creator, location, capture):
+    with capture(execute=True):
+        return Event.objects.create(title='Cleanup', creator=creator, location=location, date=timezone.now())
+
+
+@pytest.mark.django_db
+class TestEventNotifications:
+
+    def test_notifies_users_in_normalized_city(self, django_capture_on_commit_callbacks):
+        creator = UserFactory(city='Istanbul')
+        spaced = UserFactory(city='  ISTANBUL\xa0')
+        compatible = UserFactory(city='Ｉｓｔａｎｂｕｌ')  # full-width
+        UserFactory(city='Istanbul', notifications_enabled=False)
+        UserFactory(city='Ankara')
+        UserFactory(city=None)
+
+        event = create_event(creator, ' istanbul ', django_capture_on_commit_callbacks)
+        assert not Notification.objects.exists()
+
+        output = StringIO()
+        call_command('process_notification_fanouts', stdout=output)
+
+        recipients = set(Notification.objects.filter(event=event).values_list('recipient_id', flat=True))
+        assert recipients == {spaced.pk, compatible.pk}
+        job = NotificationFanout.objects.get()
+        assert job.queued_at <= job.started_at <= job.finished_at
+        assert job.run_seconds >= 0
+        assert f'Fan-out job {job.pk} (event {event.pk}) created 2 notifications' in output.getvalue()
+
+    def test_event_creation_only_queues_the_job(self, django_capture_on_commit_callbacks, django_assert_num_queries):
+        creator = UserFactory(city='Izmir')
+        for _ in range(5):
+            UserFactory(city='Izmir')
+
+        # event insert, then the job insert after commit
+        with django_assert_num_queries(2):
+            event = create_event(creator, 'Izmir', django_capture_on_commit_callbacks)
+
+        assert NotificationFanout.objects.get().event == event
+        assert not Notification.objects.exists()
+
+    def test_chunks_resume_from_checkpoint(self, django_capture_on_commit_callbacks):
+        creator = UserFactory(city='Bursa')
+        users = [UserFactory(city='Bursa') for _ in range(5)]
+        create_event(creator, 'Bursa', django_capture_on_commit_callbacks)
+
+        job, created = NotificationFanout.process_next_chunk(chunk_size=2)
+        assert (created, job.last_recipient_id, job.finished_at) == (2, users[1].pk, None)
+
+        # a new worker picks up where the previous one stopped
+        call_command('process_notification_fanouts', chunk_size=2, batch_size=1)
+
+        job.refresh_from_db()
+        assert job.finished_at is not None
+        assert job.created == 5
+        assert sorted(Notification.objects.values_list('recipient_id', flat=True)) == [user.pk for user in users]
+
+    def test_blank_location_queues_nothing(self, django_capture_on_commit_callbacks):
+        UserFactory(city='')
+
+        create_event(UserFactory(), '', django_capture_on_commit_callbacks)
+
+        assert not NotificationFanout.objects.exists()
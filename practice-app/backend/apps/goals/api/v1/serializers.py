@@ -22,7 +22,7 @@ class GoalTemplateSerializer(serializers.ModelSerializer):
             'name': {'help_text': 'Name of the goal template'},
             'description': {'help_text': 'Detailed description of the goal template'},
             'category': {'help_text': 'Waste category ID associated with this template'},
-            'target': {'help_text': 'Target value to reach (in kg)'},
+            'target': {'help_text': 'Target value to reach, in kg, l or pcs depending on the category unit'},
             'timeframe': {'help_text': 'Time period for the goal (e.g., "weekly", "monthly")'},
             'start_date': {
                 'required': False,
@@ -58,14 +58,17 @@ class GoalSerializer(serializers.ModelSerializer):
         model = Goal
         fields = [
             'id', 'user', 'category', 'category_id', 'timeframe',
-            'target', 'progress', 'is_complete', 'created_at', 'start_date', 'status'
+            'target', 'progress', 'is_complete', 'created_at', 'start_date', 'status',
+            'recurring', 'series'
         ]
         # 'progress' is now calculated, so it should be read_only
-        read_only_fields = ['id', 'progress', 'is_complete', 'status', 'created_at']
+        read_only_fields = ['id', 'progress', 'is_complete', 'status', 'created_at', 'series']
         extra_kwargs = {
             'user': {'write_only': True},
             'timeframe': {'help_text': 'Timeframe for the goal (daily, weekly, monthly)'},
-            'target': {'help_text': 'Target amount in kg'},
+            'target': {'help_text': 'Target amount in kg, l or pcs depending on the category unit'},
+            'recurring': {'help_text': 'Repeat the goal every timeframe period (a new goal is created per period)'},
+            'series': {'help_text': 'ID of the recurring goal this goal is a period of'},
             'start_date': {
                 'required': False,
                 'help_text': 'Date when the goal starts (optional, defaults to creation date if not provided)'
@@ -75,8 +78,12 @@ class GoalSerializer(serializers.ModelSerializer):
     def get_progress(self, obj):
         """
         This method is called by the SerializerMethodField to get the value for 'progress'.
-        It calls the model's method to perform the calculation.
+        It calls the model's method to perform the calculation, unless the view
+        precomputed progress for the whole list in context['goal_progress'].
         """
+        goal_progress = self.context.get('goal_progress')
+        if goal_progress is not None and obj.id in goal_progress:
+            return goal_progress[obj.id]
         return obj.calculate_current_progress()
 
     def create(self, validated_data):
@@ -91,4 +98,28 @@ class GoalSerializer(serializers.ModelSerializer):
         # Default update behavior
         instance = super().update(instance, validated_data)
         instance.update_progress()
-        return instance
\ No newline at end of file
+        return instance
+
+
+class GoalProgressPointSerializer(serializers.Serializer):
+    day = serializers.DateField(help_text="Day of the snapshot")
+    progress = serializers.FloatField(help_text="Cumulative progress at the end of the day")
+
+
+class GoalTemplateAssignSerializer(serializers.Serializer):
+    city = serializers.CharField(required=False, help_text="Assign to users in this city (case-insensitive)")
+    team_id = serializers.IntegerField(required=False, help_text="Assign to members of this team")
+    challenge_id = serializers.IntegerField(required=False, help_text="Assign to participants of this challenge")
+    start_date = serializers.DateTimeField(
+        required=False,
+        help_text="Date when the assigned goals start (defaults to the start of the current day)"
+    )
+
+    def validate(self, data):
+        if not any(key in data for key in ('city', 'team_id', 'challenge_id')):
+            raise serializers.ValidationError("Provide at least one of city, team_id or challenge_id.")
+        return data
+
+
+class GoalTemplateAssignResponseSerializer(serializers.Serializer):
+    created = serializers.IntegerField(help_text="Number of goals created")
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import GoalTemplateListView, GoalViewSet
+from .views import GoalTemplateListView, GoalTemplateAssignView, GoalViewSet
 
 router = DefaultRouter()
 router.register(r'goals', GoalViewSet, basename='goal')
 
 urlpatterns = [
     path('templates/', GoalTemplateListView.as_view(), name='goal-templates'),
+    path('templates/<int:pk>/assign/', GoalTemplateAssignView.as_view(), name='goal-template-assign'),
     path('', include(router.urls)),
 ]
@@ -7,9 +7,15 @@ from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import TemplateView
 from django.http import JsonResponse
-from apps.goals.models import Goal, GoalTemplate
+from django.contrib.auth import get_user_model
+from apps.user.models import normalize_city
+from rest_framework.views import APIView
+from apps.goals.models import Goal, GoalProgressPoint, GoalTemplate
 from apps.waste.models import SubCategory, WasteLog
-from .serializers import GoalTemplateSerializer, GoalSerializer
+from .serializers import (
+    GoalTemplateSerializer, GoalSerializer, GoalProgressPointSerializer,
+    GoalTemplateAssignSerializer, GoalTemplateAssignResponseSerializer
+)
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, extend_schema_view
 from drf_spectacular.types import OpenApiTypes
 
@@ -25,12 +31,48 @@ class GoalTemplateListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
+class GoalTemplateAssignView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        tags=['Goal Templates'],
+        summary='Assign a goal template to a cohort',
+        description='Admin endpoint that creates a goal from the template for every active user matching '
+                    'all given filters (city, team, challenge). Users already assigned the template with '
+                    'the same start date, or still holding an active goal from it, are skipped.',
+        request=GoalTemplateAssignSerializer,
+        responses={201: GoalTemplateAssignResponseSerializer, 400: None, 404: None}
+    )
+    def post(self, request, pk):
+        template = get_object_or_404(GoalTemplate, pk=pk)
+        if template.timeframe not in dict(Goal.TIMEFRAME_CHOICES):
+            return Response(
+                {"detail": f"Template timeframe '{template.timeframe}' is not a goal timeframe."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = GoalTemplateAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+
+        users = get_user_model().objects.filter(is_active=True)
+        if 'city' in filters:
+            users = users.filter(city_normalized=normalize_city(filters['city']))
+        if 'team_id' in filters:
+            users = users.filter(teams__id=filters['team_id'])
+        if 'challenge_id' in filters:
+            users = users.filter(challengeparticipation__challenge_id=filters['challenge_id'])
+
+        created = template.assign(users, start_date=filters.get('start_date'))
+        return Response({'created': created}, status=status.HTTP_201_CREATED)
+
+
 class GoalViewSet(viewsets.ModelViewSet):
     serializer_class = GoalSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Goal.objects.filter(user=self.request.user)
+        return Goal.objects.filter(user=self.request.user).select_related('category').order_by('id')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -42,7 +84,21 @@ class GoalViewSet(viewsets.ModelViewSet):
         responses={200: GoalSerializer(many=True)}
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        # Recurring goals get their current period on first access
+        Goal.roll_over(Goal.objects.filter(user=request.user, recurring=True, series__isnull=True))
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        goals = page if page is not None else list(queryset)
+
+        # Progress for the whole page in one query instead of one per goal
+        context = self.get_serializer_context()
+        context['goal_progress'] = Goal.calculate_progress_bulk(goals)
+        serializer = self.get_serializer_class()(goals, many=True, context=context)
+
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
 
     @extend_schema(
         tags=['Goals'],
@@ -53,6 +109,32 @@ class GoalViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
+    @extend_schema(
+        tags=['Goals'],
+        summary='Get goal progress history',
+        description='Returns daily cumulative progress snapshots of a goal for charts, '
+                    'downsampled to at most `points` entries',
+        parameters=[
+            OpenApiParameter(
+                name='points',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Maximum number of points to return (default 60, max 365)',
+                required=False
+            )
+        ],
+        responses={200: GoalProgressPointSerializer(many=True), 404: None}
+    )
+    @action(detail=True, methods=['get'], url_path='progress-history')
+    def progress_history(self, request, pk=None):
+        goal = self.get_object()
+        try:
+            max_points = min(365, max(1, int(request.query_params.get('points', 60))))
+        except ValueError:
+            return Response({"detail": "points must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        points = GoalProgressPoint.series(goal, max_points)
+        return Response(GoalProgressPointSerializer(points, many=True).data)
+
     @extend_schema(
         tags=['Goals'],
         summary='Create a goal',
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from apps.goals.models import Goal
+
+
+class Command(BaseCommand):
+    help = 'Close active goals whose timeframe has ended, marking them achieved or failed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of goals updated per statement')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = Goal.objects.filter(Goal.window_ended_before(now), status='active').order_by('pk')
+        reached = Q(target__lte=F('progress'))
+
+        closed = 0
+        last_pk = 0
+        while True:
+            ids = list(expired.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            last_pk = ids[-1]
+
+            # status is re-checked so goals updated since the select are left alone
+            closed += Goal.objects.filter(pk__in=ids, status='active').update(
+                status=Case(When(reached, then=Value('achieved')), default=Value('failed')),
+                is_complete=Case(When(reached, then=Value(True)), default=Value(False)),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Closed {closed} expired goals.'))
@@ -0,0 +1,46 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.goals.models import Goal, GoalProgressPoint
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored goal progress from waste logs and correct drift from incremental updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Number of goals recomputed per aggregate query')
+        parser.add_argument('--days', type=float, default=1,
+                            help='Also reconcile goals whose window ended within this many days')
+        parser.add_argument('--all', action='store_true',
+                            help='Reconcile every goal, including long-finished ones')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        goals = Goal.objects.order_by('pk')
+        if not options['all']:
+            goals = goals.exclude(Goal.window_ended_before(now - timedelta(days=options['days'])))
+
+        checked = corrected = 0
+        last_pk = 0
+        while True:
+            batch = list(goals.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            progress = Goal.calculate_progress_bulk(batch)
+            changed = []
+            for goal in batch:
+                stored_progress, stored_state = goal.progress, (goal.is_complete, goal.status)
+                goal.set_progress(float(progress[goal.pk]), now)
+                # Ignore float rounding from summing deltas
+                if abs(goal.progress - stored_progress) > 1e-6 or (goal.is_complete, goal.status) != stored_state:
+                    changed.append(goal)
+            Goal.objects.bulk_update(changed, ['progress', 'is_complete', 'status'])
+            GoalProgressPoint.record((goal.pk, goal.progress) for goal in changed)
+
+            checked += len(batch)
+            corrected += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} goals, corrected {corrected}.'))
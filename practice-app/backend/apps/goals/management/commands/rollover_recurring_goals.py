@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.goals.models import Goal
+
+
+class Command(BaseCommand):
+    help = 'Create the current period of every recurring goal that does not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of recurring goals rolled over per batch')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        roots = Goal.objects.filter(recurring=True, series__isnull=True).order_by('pk')
+
+        created = 0
+        last_pk = 0
+        while True:
+            batch = list(roots.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            created += len(Goal.roll_over(batch, now))
+
+        self.stdout.write(self.style.SUCCESS(f'Created {created} goal periods.'))
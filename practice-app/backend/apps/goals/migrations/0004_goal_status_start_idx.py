@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0003_goaltemplate_start_date_alter_goal_start_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['status', 'start_date', 'timeframe'], name='goal_status_start_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0004_goal_status_start_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoalProgressPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('progress', models.FloatField()),
+                ('goal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_points', to='goals.goal')),
+            ],
+            options={
+                'ordering': ['goal', 'day'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='goalprogresspoint',
+            constraint=models.UniqueConstraint(fields=('goal', 'day'), name='unique_goal_progress_day'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0005_goalprogresspoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='recurring',
+            field=models.BooleanField(default=False, help_text='Repeat the goal every timeframe period'),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='series',
+            field=models.ForeignKey(blank=True, help_text='Recurring goal this goal is a later period of', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='periods', to='goals.goal'),
+        ),
+        migrations.AddConstraint(
+            model_name='goal',
+            constraint=models.UniqueConstraint(fields=('series', 'start_date'), name='unique_goal_series_period'),
+        ),
+    ]
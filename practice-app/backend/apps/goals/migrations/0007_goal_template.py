@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0006_goal_recurring'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='template',
+            field=models.ForeignKey(blank=True, help_text='Template the goal was assigned from', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='goals', to='goals.goaltemplate'),
+        ),
+    ]
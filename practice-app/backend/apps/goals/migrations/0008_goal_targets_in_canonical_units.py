@@ -0,0 +1,41 @@
+# Generated by Django 4.2.20 on 2026-10-19 20:10
+
+from django.db import migrations, models
+
+# Frozen copy of the non-trivial apps.waste.services.units.UNIT_CONVERSIONS factors
+CONVERSION_FACTORS = {'g': 0.001, 'mg': 0.000001, 'ml': 0.001}
+
+
+def scale_goals(apps, factor_of):
+    """Multiply goal targets and progress on subcategories of each unit by factor_of(unit)."""
+    Goal = apps.get_model('goals', 'Goal')
+    GoalTemplate = apps.get_model('goals', 'GoalTemplate')
+    GoalProgressPoint = apps.get_model('goals', 'GoalProgressPoint')
+    for unit, factor in CONVERSION_FACTORS.items():
+        factor = models.Value(factor_of(factor))
+        Goal.objects.filter(category__unit=unit).update(
+            target=models.F('target') * factor, progress=models.F('progress') * factor
+        )
+        GoalTemplate.objects.filter(category__unit=unit).update(target=models.F('target') * factor)
+        GoalProgressPoint.objects.filter(goal__category__unit=unit).update(progress=models.F('progress') * factor)
+
+
+def targets_to_canonical_units(apps, schema_editor):
+    """Goals now compare against normalized quantities, so targets entered in g, mg or ml are converted."""
+    scale_goals(apps, lambda factor: factor)
+
+
+def targets_to_subcategory_units(apps, schema_editor):
+    scale_goals(apps, lambda factor: 1 / factor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0007_goal_template'),
+        ('waste', '0004_wastelog_normalized_quantity'),
+    ]
+
+    operations = [
+        migrations.RunPython(targets_to_canonical_units, targets_to_subcategory_units),
+    ]
@@ -3,11 +3,35 @@ from django.conf import settings
 from apps.waste.models import SubCategory
 from apps.waste.models import WasteLog
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDay
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.utils import timezone
 
+
+def _month_start(moment):
+    """First instant of the (UTC) month containing moment"""
+    return moment.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _monthly_end_q(moment, after):
+    """
+    Q for monthly goals whose window ends after (or at) `moment`, or before it.
+
+    A monthly window ends on the first day of the following month at the
+    start's time of day, so goals that started in the previous month are
+    decided by comparing their time of day with `moment`.
+    """
+    month_start = _month_start(moment)
+    previous_month_start = _month_start(month_start - timedelta(days=1))
+    # start_date shifted to the first day of this month, i.e. the window end
+    end_time_of_day = TruncDay('start_date', tzinfo=dt_timezone.utc) + (moment - month_start)
+    started_last_month = Q(start_date__gte=previous_month_start, start_date__lt=month_start)
+    if after:
+        return Q(start_date__gte=month_start) | (started_last_month & Q(start_date__gte=end_time_of_day))
+    return Q(start_date__lt=previous_month_start) | (started_last_month & Q(start_date__lt=end_time_of_day))
+
 class Goal(models.Model):
 
     TIMEFRAME_CHOICES = [
@@ -25,6 +49,24 @@ class Goal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, default='active', help_text="Status of the goal (e.g., active, achieved, failed)")
     start_date = models.DateTimeField(default=timezone.now, help_text="Date when the goal starts (defaults to creation date)")
+    recurring = models.BooleanField(default=False, help_text="Repeat the goal every timeframe period")
+    series = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.CASCADE, related_name='periods',
+        help_text="Recurring goal this goal is a later period of"
+    )
+    template = models.ForeignKey(
+        'GoalTemplate', null=True, blank=True, on_delete=models.SET_NULL, related_name='goals',
+        help_text="Template the goal was assigned from"
+    )
+
+    class Meta:
+        indexes = [
+            # Lets expire_goals find active goals whose window has ended
+            models.Index(fields=['status', 'start_date', 'timeframe'], name='goal_status_start_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['series', 'start_date'], name='unique_goal_series_period'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.category.name}"
@@ -46,6 +88,110 @@ class Goal(models.Model):
 
         return s_datetime, e_datetime
 
+    def current_period_start(self, now=None):
+        """
+        Start of the recurrence period containing `now`.
+
+        Periods follow each other without gaps: daily and weekly ones every
+        1 or 7 days from start_date, monthly ones on the first day of each
+        month at the start's time of day.
+        """
+        now = now or timezone.now()
+        _, end = self.get_timeframe_dates()
+        if end is None or now <= end:
+            return self.start_date
+
+        if self.timeframe == 'monthly':
+            start = self.start_date.astimezone(dt_timezone.utc)
+            time_of_day = start - start.replace(hour=0, minute=0, second=0, microsecond=0)
+            period_start = _month_start(now) + time_of_day
+            if period_start > now:
+                period_start = _month_start(_month_start(now) - timedelta(days=1)) + time_of_day
+            return period_start
+
+        length = end - self.start_date
+        return self.start_date + ((now - self.start_date) // length) * length
+
+    @staticmethod
+    def roll_over(roots, now=None):
+        """
+        Creates the current period of each recurring goal that does not have it yet.
+
+        Progress of all new periods comes from one aggregate query and the
+        periods are inserted in one statement. Returns the created goals.
+        """
+        now = now or timezone.now()
+        due = {}
+        for root in roots:
+            period_start = root.current_period_start(now)
+            if period_start != root.start_date:
+                due[(root.pk, period_start)] = root
+        if not due:
+            return []
+
+        existing = set(Goal.objects.filter(
+            series_id__in={root_pk for root_pk, _ in due},
+            start_date__in={period_start for _, period_start in due},
+        ).values_list('series_id', 'start_date'))
+        periods = [
+            Goal(user_id=root.user_id, category_id=root.category_id, timeframe=root.timeframe,
+                 target=root.target, start_date=period_start, series=root)
+            for (root_pk, period_start), root in due.items()
+            if (root_pk, period_start) not in existing
+        ]
+        for period, total in zip(periods, Goal._window_totals(periods)):
+            period.set_progress(float(total), now)
+        return Goal.objects.bulk_create(periods, ignore_conflicts=True)
+
+    @staticmethod
+    def window_contains(moment):
+        """Q for goals whose timeframe window includes `moment` (same bounds as get_timeframe_dates)"""
+        return Q(start_date__lte=moment) & (
+            Q(timeframe='daily', start_date__gte=moment - timedelta(days=1))
+            | Q(timeframe='weekly', start_date__gte=moment - timedelta(days=7))
+            | (Q(timeframe='monthly') & _monthly_end_q(moment, after=True))
+        )
+
+    @staticmethod
+    def window_ended_before(moment):
+        """Q for goals whose timeframe window ended before `moment`"""
+        return (
+            Q(timeframe='daily', start_date__lt=moment - timedelta(days=1))
+            | Q(timeframe='weekly', start_date__lt=moment - timedelta(days=7))
+            | (Q(timeframe='monthly') & _monthly_end_q(moment, after=False))
+        )
+
+    @staticmethod
+    def apply_progress_delta(user_id, category_id, logged_at, delta):
+        """
+        Adds a waste log's quantity change to every goal whose window contains it.
+
+        Progress, completion and status are resolved in a single UPDATE, so the
+        cost does not depend on how many goals the user has.
+        """
+        if not delta:
+            return 0
+        now = timezone.now()
+        new_progress = F('progress') + Value(float(delta))
+        reached = Q(target__lte=new_progress)
+        goals = Goal.objects.filter(
+            Goal.window_contains(logged_at),
+            user_id=user_id,
+            category_id=category_id,
+        )
+        updated = goals.update(
+            progress=new_progress,
+            is_complete=Case(When(reached, then=Value(True)), default=Value(False)),
+            status=Case(
+                When(reached, then=Value('achieved')),
+                When(Goal.window_ended_before(now), then=Value('failed')),
+                default=Value('active'),
+            ),
+        )
+        if updated:
+            GoalProgressPoint.record(goals.values_list('pk', 'progress'))
+        return updated
+
     def calculate_current_progress(self):
         """Calculates and returns the current progress without saving the model."""
         now = timezone.now()
@@ -72,13 +218,68 @@ class Goal(models.Model):
         # print(f"Found {logs_query.count()} logs", file=sys.stderr)
         # print(f"---------------------------", file=sys.stderr)
 
-        total = logs_query.aggregate(total=Sum('quantity'))['total'] or 0.0
+        total = logs_query.aggregate(total=Sum('normalized_quantity'))['total'] or 0.0
         return total
 
+    @staticmethod
+    def calculate_progress_bulk(goals):
+        """
+        Calculates the current progress of many goals in a single aggregate query.
+
+        Goals sharing a user, category and window share one conditional sum.
+        Returns a dict of goal id to the value calculate_current_progress() would return.
+        """
+        goals = list(goals)
+        return {goal.id: total for goal, total in zip(goals, Goal._window_totals(goals))}
+
+    @staticmethod
+    def _window_totals(goals):
+        """Progress of each goal, in order, from one aggregate query (goals need not be saved)."""
+        now = timezone.now()
+        windows = {}
+        progress = [0.0] * len(goals)
+        for index, goal in enumerate(goals):
+            effective_start, effective_end = goal.get_timeframe_dates()
+            if not effective_start or not effective_end:
+                continue
+            key = (goal.user_id, goal.category_id, effective_start, min(now, effective_end))
+            windows.setdefault(key, []).append(index)
+
+        if not windows:
+            return progress
+
+        sums = {}
+        for index, (user_id, category_id, start, end) in enumerate(windows):
+            sums[f'window_{index}'] = Sum('normalized_quantity', filter=Q(
+                user_id=user_id,
+                sub_category_id=category_id,
+                date_logged__gte=start,
+                date_logged__lte=end,
+            ))
+        keys = list(windows)
+        totals = WasteLog.objects.filter(
+            user_id__in={key[0] for key in keys},
+            sub_category_id__in={key[1] for key in keys},
+            date_logged__gte=min(key[2] for key in keys),
+            date_logged__lte=max(key[3] for key in keys),
+        ).aggregate(**sums)
+
+        for index, key in enumerate(keys):
+            total = totals[f'window_{index}'] or 0.0
+            for goal_index in windows[key]:
+                progress[goal_index] = total
+        return progress
+
     def update_progress(self):
         """Updates the goal's progress, completion, and status fields in the database."""
-        now = timezone.now()
-        self.progress = self.calculate_current_progress()
+        self.set_progress(self.calculate_current_progress())
+        self.save(update_fields=['progress', 'is_complete', 'status'])
+        GoalProgressPoint.record([(self.pk, self.progress)])
+
+    def set_progress(self, progress, now=None):
+        """Sets progress and resolves is_complete and status without saving."""
+        now = now or timezone.now()
+        self.progress = progress
         
         _, effective_end_date = self.get_timeframe_dates()
 
@@ -93,7 +294,48 @@ class Goal(models.Model):
             else:
                 self.status = 'active'
 
-        self.save(update_fields=['progress', 'is_complete', 'status'])
+
+class GoalProgressPoint(models.Model):
+    """
+    Daily snapshot of a goal's cumulative progress, used for progress charts.
+
+    One row per goal and day, overwritten with the latest value whenever the
+    goal's progress changes that day.
+    """
+    goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name='progress_points')
+    day = models.DateField()
+    progress = models.FloatField()
+
+    class Meta:
+        ordering = ['goal', 'day']
+        constraints = [
+            models.UniqueConstraint(fields=['goal', 'day'], name='unique_goal_progress_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.goal_id} @ {self.day}: {self.progress}"
+
+    @classmethod
+    def record(cls, progress_by_goal, day=None):
+        """Upserts today's point for each (goal id, progress) pair in one statement."""
+        day = day or timezone.localdate()
+        points = [cls(goal_id=goal_id, day=day, progress=float(progress)) for goal_id, progress in progress_by_goal]
+        cls.objects.bulk_create(
+            points, update_conflicts=True, unique_fields=['goal', 'day'], update_fields=['progress']
+        )
+
+    @classmethod
+    def series(cls, goal, max_points):
+        """
+        Returns the goal's points ordered by day, downsampled to at most max_points.
+
+        Each kept point is the last one of its bucket, so the latest value is always included.
+        """
+        points = list(cls.objects.filter(goal=goal).order_by('day').values('day', 'progress'))
+        if len(points) <= max_points:
+            return points
+        step = len(points) / max_points
+        return [points[int((index + 1) * step) - 1] for index in range(max_points)]
 
 
 class GoalTemplate(models.Model):
@@ -106,4 +348,45 @@ class GoalTemplate(models.Model):
     start_date = models.DateTimeField(default=timezone.now, help_text="Date when the template starts (defaults to creation date)")
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+    def assign(self, users, start_date=None, batch_size=1000):
+        """
+        Creates a goal from this template for every user in the `users` queryset.
+
+        The start date defaults to the beginning of the current day, so a
+        repeated request assigns nothing new. Users that already got this
+        template for the same start date, or still have an active goal from it,
+        are skipped. Initial progress of all goals comes from one aggregate
+        grouped by user, and goals are inserted with chunked bulk_create.
+        Returns the number created.
+        """
+        now = timezone.now()
+        start_date = start_date or timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        assigned = Goal.objects.filter(
+            Q(start_date=start_date) | Q(status='active'), template=self
+        ).values('user_id')
+        user_ids = users.exclude(pk__in=assigned).values('pk')
+
+        window = Goal(timeframe=self.timeframe, start_date=start_date)
+        window_start, window_end = window.get_timeframe_dates()
+        totals = dict(
+            WasteLog.objects.filter(
+                user_id__in=user_ids,
+                sub_category_id=self.category_id,
+                date_logged__gte=window_start,
+                date_logged__lte=min(now, window_end),
+            ).values('user_id').annotate(total=Sum('normalized_quantity')).values_list('user_id', 'total')
+        )
+
+        cohort = list(user_ids.values_list('pk', flat=True).distinct().order_by('pk'))
+        created = 0
+        for offset in range(0, len(cohort), batch_size):
+            goals = []
+            for user_id in cohort[offset:offset + batch_size]:
+                goal = Goal(user_id=user_id, category_id=self.category_id, timeframe=self.timeframe,
+                            target=self.target, start_date=start_date, template=self)
+                goal.set_progress(float(totals.get(user_id) or 0.0), now)
+                goals.append(goal)
+            created += len(Goal.objects.bulk_create(goals))
+        return created
@@ -3,22 +3,16 @@ from django.dispatch import receiver
 from apps.waste.models import WasteLog
 from .models import Goal
 
+
 @receiver(post_save, sender=WasteLog)
-@receiver(post_delete, sender=WasteLog)
-def update_related_goals(sender, instance, **kwargs):
-    """Update goal progress when a relevant WasteLog is created or deleted."""
-    # Ensure sub_category exists before proceeding
-    if not instance.sub_category:
-        return
-        
-    # Find active goals for the same user and category
-    related_goals = Goal.objects.filter(
-        user=instance.user,
-        category=instance.sub_category, # Access category via sub_category
-        is_complete=False
-    )
-    
-    for goal in related_goals:
-        goal.update_progress()
+def update_related_goals(sender, instance, created, **kwargs):
+    """Apply the quantity change of a created or edited WasteLog to the goals it counts towards."""
+    for user_id, sub_category_id, logged_at, delta in instance.progress_deltas(created=created):
+        Goal.apply_progress_delta(user_id, sub_category_id, logged_at, delta)
 
 
+@receiver(post_delete, sender=WasteLog)
+def remove_log_from_goals(sender, instance, **kwargs):
+    """Subtract a deleted WasteLog from the goals it counted towards."""
+    for user_id, sub_category_id, logged_at, delta in instance.progress_deltas(deleted=True):
+        Goal.apply_progress_delta(user_id, sub_category_id, logged_at, delta)
@@ -0,0 +1,33 @@
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.utils import timezone
+from apps.goals.models import Goal
+from apps.waste.tests.factories import UserFactory, SubCategoryFactory
+
+
+@pytest.mark.django_db
+class TestExpireGoals:
+
+    def make_goal(self, timeframe, days_ago, progress=0, status='active'):
+        return Goal.objects.create(
+            user=UserFactory(), category=SubCategoryFactory(), timeframe=timeframe, target=5,
+            progress=progress, status=status, start_date=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def test_closes_expired_goals_in_batches(self, django_assert_max_num_queries):
+        failed = [self.make_goal('daily', 2), self.make_goal('weekly', 8), self.make_goal('monthly', 70)]
+        achieved = self.make_goal('weekly', 10, progress=6)
+        running = [self.make_goal('daily', 0.5), self.make_goal('weekly', 3)]
+        already_closed = self.make_goal('daily', 5, progress=9, status='achieved')
+
+        # one select and one update per batch of two, plus the final empty select
+        with django_assert_max_num_queries(5):
+            call_command('expire_goals', '--batch-size', '2')
+
+        statuses = dict(Goal.objects.values_list('pk', 'status'))
+        assert all(statuses[goal.pk] == 'failed' for goal in failed)
+        assert statuses[achieved.pk] == 'achieved'
+        assert Goal.objects.get(pk=achieved.pk).is_complete
+        assert all(statuses[goal.pk] == 'active' for goal in running)
+        assert statuses[already_closed.pk] == 'achieved'
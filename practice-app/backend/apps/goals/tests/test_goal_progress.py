@@ -0,0 +1,100 @@
+import importlib
+import pytest
+from datetime import timedelta
+from django.apps import apps
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.goals.models import Goal, GoalTemplate
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import UserFactory, SubCategoryFactory
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def log_waste(user, sub_category, quantity, days_ago=0):
+    log = WasteLog.objects.create(user=user, sub_category=sub_category, quantity=quantity)
+    WasteLog.objects.filter(pk=log.pk).update(date_logged=timezone.now() - timedelta(days=days_ago))
+    return log
+
+
+@pytest.mark.django_db
+class TestBulkGoalProgress:
+
+    def test_matches_per_goal_calculation(self, user):
+        plastic, glass = SubCategoryFactory(), SubCategoryFactory()
+        other_user = UserFactory()
+        log_waste(user, plastic, 2)
+        log_waste(user, plastic, 3, days_ago=3)
+        log_waste(user, glass, 4)
+        log_waste(other_user, plastic, 10)
+        log_waste(user, plastic, 7, days_ago=20)
+
+        start = timezone.now() - timedelta(days=5)
+        goals = [
+            Goal.objects.create(user=user, category=plastic, timeframe='daily', target=10,
+                                start_date=timezone.now() - timedelta(hours=1)),
+            Goal.objects.create(user=user, category=plastic, timeframe='weekly', target=10, start_date=start),
+            Goal.objects.create(user=user, category=plastic, timeframe='weekly', target=50, start_date=start),
+            Goal.objects.create(user=user, category=glass, timeframe='monthly', target=10, start_date=start),
+            Goal.objects.create(user=other_user, category=plastic, timeframe='weekly', target=10, start_date=start),
+        ]
+        WasteLog.objects.filter(quantity=2).update(date_logged=timezone.now())
+
+        progress = Goal.calculate_progress_bulk(goals)
+
+        assert progress == {goal.id: goal.calculate_current_progress() for goal in goals}
+        assert progress[goals[1].id] == progress[goals[2].id] == 5
+
+    def test_empty(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert Goal.calculate_progress_bulk([]) == {}
+
+    def test_list_uses_constant_queries(self, client, user, django_assert_max_num_queries):
+        categories = [SubCategoryFactory() for _ in range(3)]
+        for category in categories:
+            log_waste(user, category, 1)
+        for index in range(30):
+            Goal.objects.create(user=user, category=categories[index % 3], timeframe='weekly', target=5,
+                                start_date=timezone.now() - timedelta(days=1))
+
+        # recurring goal lookup, count, page and one progress aggregate
+        with django_assert_max_num_queries(4):
+            response = client.get(reverse('goal-list'))
+
+        assert response.status_code == 200
+        assert len(response.data['results']) == 10
+        assert all(goal['progress'] == 1 for goal in response.data['results'])
+
+
+@pytest.mark.django_db
+def test_migration_converts_targets_to_canonical_units(user):
+    migration = importlib.import_module('apps.goals.migrations.0008_goal_targets_in_canonical_units')
+    grams, kilograms = SubCategoryFactory(unit='g'), SubCategoryFactory(unit='kg')
+    in_grams = Goal.objects.create(user=user, category=grams, timeframe='weekly', target=2000, progress=500)
+    in_kilograms = Goal.objects.create(user=user, category=kilograms, timeframe='weekly', target=2)
+    template = GoalTemplate.objects.create(name='Less paper', description='', category=grams, target=1500,
+                                           timeframe='weekly')
+
+    migration.targets_to_canonical_units(apps, None)
+
+    in_grams.refresh_from_db()
+    in_kilograms.refresh_from_db()
+    template.refresh_from_db()
+    assert (in_grams.target, in_grams.progress) == pytest.approx((2.0, 0.5))
+    assert in_kilograms.target == 2
+    assert template.target == pytest.approx(1.5)
+
+    migration.targets_to_subcategory_units(apps, None)
+    in_grams.refresh_from_db()
+    assert in_grams.target == pytest.approx(2000)
@@ -0,0 +1,53 @@
+import pytest
+from datetime import date, timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.goals.models import Goal, GoalProgressPoint
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import UserFactory, SubCategoryFactory
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def goal(user):
+    return Goal.objects.create(user=user, category=SubCategoryFactory(), timeframe='monthly', target=10,
+                               start_date=timezone.now() - timedelta(hours=1))
+
+
+@pytest.mark.django_db
+class TestGoalProgressPoints:
+
+    def test_log_writes_update_todays_point(self, user, goal):
+        WasteLog.objects.create(user=user, sub_category=goal.category, quantity=2)
+        WasteLog.objects.create(user=user, sub_category=goal.category, quantity=3)
+
+        point = GoalProgressPoint.objects.get(goal=goal)
+        assert (point.day, point.progress) == (timezone.localdate(), 5)
+
+    def test_series_downsampled_to_last_point_per_bucket(self, goal):
+        start = date(2025, 1, 1)
+        GoalProgressPoint.objects.bulk_create([
+            GoalProgressPoint(goal=goal, day=start + timedelta(days=index), progress=index) for index in range(10)
+        ])
+
+        assert [point['progress'] for point in GoalProgressPoint.series(goal, 20)] == list(range(10))
+        assert [point['progress'] for point in GoalProgressPoint.series(goal, 4)] == [1, 4, 6, 9]
+
+    def test_endpoint_returns_only_own_goals(self, user, goal):
+        GoalProgressPoint.record([(goal.pk, 4)], day=date(2025, 1, 2))
+        GoalProgressPoint.record([(goal.pk, 7)], day=date(2025, 1, 3))
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(reverse('goal-progress-history', args=[goal.pk]), {'points': 1})
+
+        assert response.status_code == 200
+        assert response.data == [{'day': '2025-01-03', 'progress': 7.0}]
+
+        client.force_authenticate(user=UserFactory())
+        assert client.get(reverse('goal-progress-history', args=[goal.pk])).status_code == 404
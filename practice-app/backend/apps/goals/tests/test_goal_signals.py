@@ -0,0 +1,128 @@
+import pytest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management import call_command
+from django.utils import timezone
+from apps.goals.models import Goal
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import UserFactory, SubCategoryFactory
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def plastic():
+    return SubCategoryFactory()
+
+
+def make_goal(user, category, timeframe='weekly', target=10, start=None):
+    return Goal.objects.create(
+        user=user, category=category, timeframe=timeframe, target=target,
+        start_date=start or timezone.now() - timedelta(hours=1),
+    )
+
+
+@pytest.mark.django_db
+class TestGoalWindows:
+
+    @pytest.mark.parametrize('timeframe', ['daily', 'weekly', 'monthly'])
+    def test_queries_match_timeframe_dates(self, user, plastic, timeframe):
+        moment = datetime(2025, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+        starts = [
+            moment - timedelta(days=days, hours=hours)
+            for days in (0, 1, 2, 6, 7, 8, 20, 27, 28, 29, 40, 70)
+            for hours in (-1, 0, 1)
+        ]
+        goals = [make_goal(user, plastic, timeframe, start=start) for start in starts]
+
+        contains = set(Goal.objects.filter(Goal.window_contains(moment)).values_list('pk', flat=True))
+        ended = set(Goal.objects.filter(Goal.window_ended_before(moment)).values_list('pk', flat=True))
+
+        for goal in goals:
+            start, end = goal.get_timeframe_dates()
+            assert (goal.pk in contains) == (start <= moment <= end), goal.start_date
+            assert (goal.pk in ended) == (end < moment), goal.start_date
+
+
+@pytest.mark.django_db
+class TestIncrementalGoalProgress:
+
+    def test_log_lifecycle_updates_progress_and_status(self, user, plastic):
+        goal = make_goal(user, plastic, target=5)
+
+        log = WasteLog.objects.create(user=user, sub_category=plastic, quantity=3)
+        goal.refresh_from_db()
+        assert (goal.progress, goal.status, goal.is_complete) == (3, 'active', False)
+
+        log.quantity = 6
+        log.save()
+        goal.refresh_from_db()
+        assert (goal.progress, goal.status, goal.is_complete) == (6, 'achieved', True)
+
+        log.delete()
+        goal.refresh_from_db()
+        assert (goal.progress, goal.status, goal.is_complete) == (0, 'active', False)
+
+    def test_moving_log_between_categories(self, user, plastic):
+        glass = SubCategoryFactory()
+        plastic_goal, glass_goal = make_goal(user, plastic), make_goal(user, glass)
+
+        log = WasteLog.objects.create(user=user, sub_category=plastic, quantity=2)
+        log.sub_category = glass
+        log.save()
+
+        plastic_goal.refresh_from_db()
+        glass_goal.refresh_from_db()
+        assert plastic_goal.progress == 0
+        assert glass_goal.progress == 2
+
+    def test_goals_outside_window_untouched(self, user, plastic):
+        expired = make_goal(user, plastic, 'daily', start=timezone.now() - timedelta(days=3))
+        other_user_goal = make_goal(UserFactory(), plastic)
+
+        WasteLog.objects.create(user=user, sub_category=plastic, quantity=2)
+
+        expired.refresh_from_db()
+        other_user_goal.refresh_from_db()
+        assert expired.progress == 0
+        assert other_user_goal.progress == 0
+
+    def test_log_write_cost_independent_of_goal_count(self, user, plastic, django_assert_num_queries):
+        for _ in range(20):
+            make_goal(user, plastic)
+
+        # insert, one goal update, reading back and upserting the progress points,
+        # and building the active challenge index
+        with django_assert_num_queries(5):
+            WasteLog.objects.create(user=user, sub_category=plastic, quantity=1)
+
+        assert set(Goal.objects.values_list('progress', flat=True)) == {1}
+
+
+@pytest.mark.django_db
+class TestReconcileGoalProgress:
+
+    def test_corrects_drift(self, user, plastic):
+        goal = make_goal(user, plastic, target=5)
+        WasteLog.objects.create(user=user, sub_category=plastic, quantity=6)
+        # Writes that bypass signals
+        WasteLog.objects.filter(user=user).update(quantity=2, normalized_quantity=2)
+
+        call_command('reconcile_goal_progress')
+
+        goal.refresh_from_db()
+        assert (goal.progress, goal.status, goal.is_complete) == (2, 'active', False)
+
+    def test_skips_long_finished_goals(self, user, plastic):
+        old = make_goal(user, plastic, 'daily', start=timezone.now() - timedelta(days=10))
+        Goal.objects.filter(pk=old.pk).update(progress=99)
+
+        call_command('reconcile_goal_progress')
+        old.refresh_from_db()
+        assert old.progress == 99
+
+        call_command('reconcile_goal_progress', '--all')
+        old.refresh_from_db()
+        assert (old.progress, old.status) == (0, 'failed')
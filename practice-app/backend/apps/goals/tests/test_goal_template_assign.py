@@ -0,0 +1,77 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.challenges.models import Team
+from apps.goals.models import Goal, GoalTemplate
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import UserFactory, SubCategoryFactory
+
+
+@pytest.fixture
+def template():
+    return GoalTemplate.objects.create(name='Recycle more', description='', category=SubCategoryFactory(),
+                                       target=5, timeframe='weekly')
+
+
+@pytest.mark.django_db
+class TestGoalTemplateAssign:
+
+    def test_assign_by_city_with_initial_progress(self, template, admin_client, django_assert_max_num_queries):
+        client, _ = admin_client
+        cohort = [UserFactory(city='Ankara') for _ in range(5)]
+        UserFactory(city='Izmir')
+        WasteLog.objects.create(user=cohort[0], sub_category=template.category, quantity=6)
+        WasteLog.objects.create(user=cohort[1], sub_category=template.category, quantity=2)
+        start = timezone.now() - timedelta(days=1)
+
+        # progress aggregate, cohort ids and two insert chunks
+        with django_assert_max_num_queries(4):
+            template.assign(get_user_model().objects.filter(city='Ankara'), start_date=start, batch_size=3)
+
+        goals = {goal.user_id: goal for goal in Goal.objects.filter(template=template)}
+        assert set(goals) == {user.pk for user in cohort}
+        assert (goals[cohort[0].pk].progress, goals[cohort[0].pk].status) == (6, 'achieved')
+        assert (goals[cohort[1].pk].progress, goals[cohort[1].pk].status) == (2, 'active')
+
+        response = client.post(reverse('goal-template-assign', args=[template.pk]),
+                                     {'city': 'ankara', 'start_date': start.isoformat()}, format='json')
+        assert response.status_code == 201
+        assert response.data == {'created': 0}
+
+    def test_assign_to_team_members(self, template, admin_client):
+        client, _ = admin_client
+        team = Team.objects.create(name='Green')
+        members = [UserFactory(), UserFactory()]
+        team.members.add(*members)
+        UserFactory()
+
+        response = client.post(reverse('goal-template-assign', args=[template.pk]),
+                                     {'team_id': team.pk}, format='json')
+
+        assert response.data == {'created': 2}
+        assert set(Goal.objects.values_list('user_id', flat=True)) == {user.pk for user in members}
+
+    def test_repeated_request_without_start_date_assigns_once(self, template, admin_client):
+        client, _ = admin_client
+        team = Team.objects.create(name='Blue')
+        team.members.add(UserFactory(), UserFactory())
+        url = reverse('goal-template-assign', args=[template.pk])
+
+        assert client.post(url, {'team_id': team.pk}, format='json').data == {'created': 2}
+        assert client.post(url, {'team_id': team.pk}, format='json').data == {'created': 0}
+        # An active goal from the template also blocks a different start date
+        later = (timezone.now() + timedelta(days=1)).isoformat()
+        assert client.post(url, {'team_id': team.pk, 'start_date': later}, format='json').data == {'created': 0}
+        assert Goal.objects.filter(template=template).count() == 2
+
+    def test_requires_filter_and_admin(self, template, admin_client):
+        client, _ = admin_client
+        url = reverse('goal-template-assign', args=[template.pk])
+        assert client.post(url, {}, format='json').status_code == 400
+
+        regular = APIClient()
+        regular.force_authenticate(user=UserFactory())
+        assert regular.post(url, {'city': 'Ankara'}, format='json').status_code == 403
@@ -0,0 +1,71 @@
+import pytest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.goals.models import Goal
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import UserFactory, SubCategoryFactory
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+def make_recurring(user, timeframe, start):
+    return Goal.objects.create(user=user, category=SubCategoryFactory(), timeframe=timeframe,
+                               target=3, start_date=start, recurring=True)
+
+
+@pytest.mark.django_db
+class TestRecurringGoals:
+
+    @pytest.mark.parametrize('timeframe, start, now, expected', [
+        ('daily', datetime(2025, 3, 1, 8), datetime(2025, 3, 1, 20), datetime(2025, 3, 1, 8)),
+        ('daily', datetime(2025, 3, 1, 8), datetime(2025, 3, 4, 7), datetime(2025, 3, 3, 8)),
+        ('weekly', datetime(2025, 3, 1, 8), datetime(2025, 3, 16, 9), datetime(2025, 3, 15, 8)),
+        ('monthly', datetime(2025, 1, 20, 8), datetime(2025, 3, 10), datetime(2025, 3, 1, 8)),
+        ('monthly', datetime(2025, 1, 20, 8), datetime(2025, 3, 1, 7), datetime(2025, 2, 1, 8)),
+    ])
+    def test_current_period_start(self, timeframe, start, now, expected):
+        goal = Goal(timeframe=timeframe, start_date=start.replace(tzinfo=dt_timezone.utc))
+        period_start = goal.current_period_start(now.replace(tzinfo=dt_timezone.utc))
+        assert period_start == expected.replace(tzinfo=dt_timezone.utc)
+
+        period = Goal(timeframe=timeframe, start_date=period_start)
+        period_end = period.get_timeframe_dates()[1]
+        assert period_start <= now.replace(tzinfo=dt_timezone.utc) <= period_end
+
+    def test_roll_over_creates_period_once_with_progress(self, user):
+        root = make_recurring(user, 'daily', timezone.now() - timedelta(days=2, hours=1))
+        WasteLog.objects.create(user=user, sub_category=root.category, quantity=4)
+
+        created = Goal.roll_over([root])
+        assert Goal.roll_over([root]) == []
+
+        assert len(created) == 1
+        period = Goal.objects.get(series=root)
+        assert period.start_date == root.start_date + timedelta(days=2)
+        assert (period.progress, period.status, period.target) == (4, 'achieved', 3)
+
+    def test_goal_list_materializes_current_period(self, user):
+        root = make_recurring(user, 'weekly', timezone.now() - timedelta(days=8))
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(reverse('goal-list'))
+
+        assert response.data['count'] == 2
+        assert response.data['results'][1]['series'] == root.pk
+
+    def test_rollover_command(self, user):
+        make_recurring(user, 'daily', timezone.now() - timedelta(days=1, hours=1))
+        make_recurring(user, 'daily', timezone.now() - timedelta(hours=1))
+        Goal.objects.create(user=user, category=SubCategoryFactory(), timeframe='daily', target=1,
+                            start_date=timezone.now() - timedelta(days=3))
+
+        call_command('rollover_recurring_goals', '--batch-size', '1')
+
+        assert Goal.objects.filter(series__isnull=False).count() == 1
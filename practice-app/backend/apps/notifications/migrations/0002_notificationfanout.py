@@ -0,0 +1,30 @@
+# Generated by Django 4.2.20 on 2026-10-19 19:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_remove_event_image_event_image_url'),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationFanout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=100)),
+                ('last_recipient_id', models.BigIntegerField(default=0)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_fanouts', to='events.event')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-19 19:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notificationfanout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationfanout',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='When the first chunk was processed', null=True),
+        ),
+    ]
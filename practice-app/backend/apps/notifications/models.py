@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
 from apps.events.models import Event  # Assuming Event is accessible from apps.events.models
+from apps.user.models import normalize_city
 
 User = settings.AUTH_USER_MODEL
 
@@ -49,6 +52,94 @@ class Notification(models.Model):
     def __str__(self):
         return f"Notif for {self.recipient.username}: {self.get_notification_type_display()}"
 
+    @staticmethod
+    def event_recipients(event, city=None):
+        """
+        Ids of the users to notify about an event: notifications enabled, same
+        normalized city, not the creator. Selected on the indexed
+        CustomUser.city_normalized column, in primary key order.
+        """
+        city = normalize_city(event.location) if city is None else city
+        return (
+            get_user_model().objects.filter(city_normalized=city, notifications_enabled=True)
+            .exclude(pk=event.creator_id).order_by('pk').values_list('pk', flat=True)
+        )
+
+
 # The Many-to-Many approach you suggested is best managed through the
 # is_read field on this dedicated Notification model, which simplifies querying.
-# We create a new Notification object for each user who should see it.
\ No newline at end of file
+# We create a new Notification object for each user who should see it.
+
+
+class NotificationFanout(models.Model):
+    """
+    Background job creating the notifications for one new event.
+
+    Jobs are queued after the event's transaction commits and processed in
+    chunks of recipients by the process_notification_fanouts command. Each
+    chunk is inserted in the same transaction that advances the checkpoint
+    (last_recipient_id), so a crashed worker resumes without duplicates.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='notification_fanouts')
+    city = models.CharField(max_length=100)
+    last_recipient_id = models.BigIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, help_text="When the first chunk was processed")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"Fan-out of event {self.event_id} to {self.city!r}"
+
+    @property
+    def run_seconds(self):
+        """Seconds from the first chunk to completion, or None while the job is unfinished"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    @classmethod
+    def enqueue(cls, event):
+        """Queues the fan-out of an event once the current transaction commits."""
+        city = normalize_city(event.location)
+        if city:
+            transaction.on_commit(lambda: cls.objects.create(event=event, city=city))
+
+    @classmethod
+    def process_next_chunk(cls, chunk_size=5000, batch_size=1000):
+        """
+        Inserts the next chunk of notifications of the oldest unfinished job.
+
+        Returns:
+            tuple: (job, notifications created), or None when no job is waiting
+        """
+        started = timezone.now()
+        with transaction.atomic():
+            job = (
+                cls.objects.select_for_update(skip_locked=True).select_related('event')
+                .filter(finished_at__isnull=True).order_by('id').first()
+            )
+            if job is None:
+                return None
+
+            recipient_ids = list(
+                Notification.event_recipients(job.event, job.city)
+                .filter(pk__gt=job.last_recipient_id)[:chunk_size]
+            )
+            Notification.objects.bulk_create(
+                [Notification(recipient_id=user_id, notification_type='EVENT_CREATED', event_id=job.event_id)
+                 for user_id in recipient_ids],
+                batch_size=batch_size,
+            )
+            if job.started_at is None:
+                job.started_at = started
+            if recipient_ids:
+                job.last_recipient_id = recipient_ids[-1]
+                job.created += len(recipient_ids)
+            if len(recipient_ids) < chunk_size:
+                job.finished_at = timezone.now()
+            job.save(update_fields=['last_recipient_id', 'created', 'started_at', 'finished_at'])
+        return job, len(recipient_ids)
@@ -2,7 +2,7 @@
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from common.supabase_storage import upload_image, upload_base64_image, delete_image, extract_path_from_url
+from common.supabase_storage import upload_image, upload_base64_image, release_image
 
 User = get_user_model() # This should get CustomUser
 
@@ -56,14 +56,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
         picture_file = validated_data.pop('profile_picture_file', None)
         picture_base64 = validated_data.pop('profile_picture_base64', None)
         
+        old_picture_url = instance.profile_picture_url
+
         # Upload image to Supabase if provided
         if picture_file or picture_base64:
-            # Delete old image if exists
-            if instance.profile_picture_url:
-                old_path = extract_path_from_url(instance.profile_picture_url)
-                if old_path:
-                    delete_image(old_path)
-            
             # Upload new image
             if picture_file:
                 try:
@@ -85,7 +81,12 @@ class UserProfileSerializer(serializers.ModelSerializer):
                 except Exception as e:
                     raise serializers.ValidationError(f"Failed to upload image: {str(e)}")
         
-        return super().update(instance, validated_data)
+        instance = super().update(instance, validated_data)
+
+        # Release the old image only after the new one is stored on the instance
+        if old_picture_url and 'profile_picture_url' in validated_data:
+            release_image(old_picture_url)
+        return instance
 
 class AdminUserSerializer(serializers.ModelSerializer):
     """
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from apps.user.models import normalize_city
+
+
+class Command(BaseCommand):
+    help = 'Recompute CustomUser.city_normalized, e.g. after the normalization rules changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of users updated per statement')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        batch_size = options['batch_size']
+
+        updated = 0
+        last_pk = 0
+        while True:
+            users = list(
+                User.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'city', 'city_normalized')[:batch_size]
+            )
+            if not users:
+                break
+            last_pk = users[-1].pk
+
+            changed = []
+            for user in users:
+                city_normalized = normalize_city(user.city)
+                if user.city_normalized != city_normalized:
+                    user.city_normalized = city_normalized
+                    changed.append(user)
+            User.objects.bulk_update(changed, ['city_normalized'])
+            updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f'Normalized {updated} user cities.'))
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.20 on 2026-10-19 19:06
+
+import unicodedata
+from django.db import migrations, models
+
+
+def normalize_city(city):
+    """Frozen copy of apps.user.models.normalize_city."""
+    if not city:
+        return ''
+    return ' '.join(unicodedata.normalize('NFKC', city).lower().split())
+
+
+def normalize_cities(apps, schema_editor):
+    """Fill city_normalized for existing users, one UPDATE per distinct city."""
+    CustomUser = apps.get_model('user', 'CustomUser')
+    cities = CustomUser.objects.exclude(city__isnull=True).exclude(city='').values_list('city', flat=True).distinct()
+    for city in list(cities):
+        CustomUser.objects.filter(city=city).update(city_normalized=normalize_city(city))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_rename_profile_picture_to_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='city_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(normalize_cities, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['city_normalized', 'notifications_enabled'], name='user_city_notify_idx'),
+        ),
+    ]
@@ -1,9 +1,17 @@
+import unicodedata
 from django.db import models
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
+def normalize_city(city):
+    """Canonical form of a city name used for matching: NFKC, lower case, single spaces."""
+    if not city:
+        return ''
+    return ' '.join(unicodedata.normalize('NFKC', city).lower().split())
+
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
@@ -49,6 +57,8 @@ class CustomUser(AbstractUser):
     bio = models.TextField(_('bio'), blank=True, null=True)
     profile_picture_url = models.URLField(_('profile picture'), blank=True, null=True, max_length=500)
     city = models.CharField(_('city'), max_length=100, blank=True, null=True)
+    # normalize_city(city), kept in sync on save so city matching can use an index
+    city_normalized = models.CharField(max_length=100, blank=True, default='', editable=False)
     country = models.CharField(_('country'), max_length=100, blank=True, null=True)
 
     # Settings & Stats
@@ -60,15 +70,25 @@ class CustomUser(AbstractUser):
     # Username is required, but first_name and last_name are not
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['city_normalized', 'notifications_enabled'], name='user_city_notify_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        self.city_normalized = normalize_city(self.city)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'city' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'city_normalized'}
+        super().save(*args, **kwargs)
+
 
 @receiver(pre_delete, sender=CustomUser)
 def delete_user_profile_picture(sender, instance, **kwargs):
-    """Delete associated profile picture from Supabase storage when user is deleted"""
+    """Release associated profile picture in Supabase storage when user is deleted"""
     if instance.profile_picture_url:
-        from common.supabase_storage import delete_image, extract_path_from_url
-        path = extract_path_from_url(instance.profile_picture_url)
-        if path:
-            delete_image(path)
\ No newline at end of file
+        from common.supabase_storage import release_image
+        release_image(instance.profile_picture_url)
\ No newline at end of file
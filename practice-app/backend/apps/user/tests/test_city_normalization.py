@@ -0,0 +1,48 @@
+import importlib
+import pytest
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from apps.user.models import normalize_city
+from .factories import UserFactory
+
+User = get_user_model()
+
+
+def test_normalize_city():
+    assert normalize_city('  New\xa0 York ') == 'new york'
+    assert normalize_city('Ｉｚｍｉｒ') == 'izmir'
+    assert normalize_city(None) == ''
+
+
+@pytest.mark.django_db
+class TestCityNormalized:
+
+    def test_maintained_on_save(self):
+        user = UserFactory(city='Ankara ')
+        assert user.city_normalized == 'ankara'
+
+        user.city = 'Bursa'
+        user.save(update_fields=['city'])
+        user.refresh_from_db()
+        assert user.city_normalized == 'bursa'
+
+    def test_backfill_command(self):
+        user = UserFactory(city='Eskişehir')
+        User.objects.filter(pk=user.pk).update(city_normalized='')
+
+        call_command('backfill_normalized_cities', batch_size=1)
+
+        user.refresh_from_db()
+        assert user.city_normalized == 'eskişehir'
+
+    def test_migration_fills_existing_users(self):
+        migration = importlib.import_module('apps.user.migrations.0003_customuser_city_normalized')
+        users = [UserFactory(city=' İzmir '), UserFactory(city='İZMİR'), UserFactory(city=None)]
+        User.objects.update(city_normalized='')
+
+        migration.normalize_cities(apps, None)
+
+        assert [User.objects.get(pk=user.pk).city_normalized for user in users] == [
+            normalize_city(' İzmir '), normalize_city('İZMİR'), ''
+        ]
@@ -4,7 +4,7 @@ from apps.waste.models import (
 )
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
-from common.supabase_storage import upload_image, upload_base64_image, delete_image, extract_path_from_url
+from common.supabase_storage import upload_image, upload_base64_image, release_image
 
 class WasteCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -108,14 +108,10 @@ class WasteLogSerializer(serializers.ModelSerializer):
         photo_file = validated_data.pop('disposal_photo_file', None)
         photo_base64 = validated_data.pop('disposal_photo_base64', None)
         
+        old_photo_url = instance.disposal_photo_url
+
         # Upload image to Supabase if provided
         if photo_file or photo_base64:
-            # Delete old image if exists
-            if instance.disposal_photo_url:
-                old_path = extract_path_from_url(instance.disposal_photo_url)
-                if old_path:
-                    delete_image(old_path)
-            
             # Upload new image
             if photo_file:
                 try:
@@ -137,7 +133,12 @@ class WasteLogSerializer(serializers.ModelSerializer):
                 except Exception as e:
                     raise serializers.ValidationError(f"Failed to upload image: {str(e)}")
         
-        return super().update(instance, validated_data)
+        instance = super().update(instance, validated_data)
+
+        # Release the old image only after the new one is stored on the instance
+        if old_photo_url and 'disposal_photo_url' in validated_data:
+            release_image(old_photo_url)
+        return instance
 
 class CustomCategoryRequestSerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
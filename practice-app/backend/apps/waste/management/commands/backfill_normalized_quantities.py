@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, FloatField, Max, Value
+from django.db.models.functions import Cast
+from apps.waste.models import SubCategory, WasteLog
+from apps.waste.services.units import conversion_factor
+
+
+class Command(BaseCommand):
+    help = 'Fill WasteLog.normalized_quantity where it is missing, or recompute it with --all'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of primary keys covered per update statement')
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every log, e.g. after a subcategory unit was changed')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        logs = WasteLog.objects.filter(quantity__isnull=False, sub_category__isnull=False)
+        if not options['all']:
+            logs = logs.filter(normalized_quantity__isnull=True)
+
+        # One UPDATE per unit and primary key range
+        units = {}
+        for sub_category_id, unit in SubCategory.objects.values_list('pk', 'unit'):
+            units.setdefault(unit, []).append(sub_category_id)
+
+        max_pk = WasteLog.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        updated = 0
+        for start in range(0, max_pk, batch_size):
+            chunk = logs.filter(pk__gt=start, pk__lte=start + batch_size)
+            for unit, sub_category_ids in units.items():
+                updated += chunk.filter(sub_category_id__in=sub_category_ids).update(
+                    normalized_quantity=Cast(F('quantity'), FloatField()) * Value(conversion_factor(unit))
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Normalized {updated} waste log quantities.'))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waste', '0002_remove_wastelog_disposal_photo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wastelog',
+            index=models.Index(fields=['user', 'sub_category', 'date_logged'], name='wastelog_user_sub_date_idx'),
+        ),
+    ]
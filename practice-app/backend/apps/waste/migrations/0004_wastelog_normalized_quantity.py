@@ -0,0 +1,37 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:43
+
+from django.db import migrations, models
+from django.db.models.functions import Cast
+
+# Frozen copy of apps.waste.services.units.UNIT_CONVERSIONS factors
+CONVERSION_FACTORS = {'kg': 1.0, 'g': 0.001, 'mg': 0.000001, 'l': 1.0, 'ml': 0.001, 'pcs': 1.0}
+
+
+def normalize_quantities(apps, schema_editor):
+    """Fill normalized_quantity of existing logs, one UPDATE per unit."""
+    SubCategory = apps.get_model('waste', 'SubCategory')
+    WasteLog = apps.get_model('waste', 'WasteLog')
+    units = {}
+    for sub_category_id, unit in SubCategory.objects.values_list('pk', 'unit'):
+        units.setdefault(unit, []).append(sub_category_id)
+    for unit, sub_category_ids in units.items():
+        WasteLog.objects.filter(quantity__isnull=False, sub_category_id__in=sub_category_ids).update(
+            normalized_quantity=Cast(models.F('quantity'), models.FloatField())
+            * models.Value(CONVERSION_FACTORS.get(unit, 1.0))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waste', '0003_wastelog_user_sub_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wastelog',
+            name='normalized_quantity',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(normalize_quantities, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 from django.db import models
-from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_delete, pre_save
 from django.dispatch import receiver
 from django.conf import settings
+from apps.waste.services.units import normalize_quantity
 
 
 UNIT_CHOICES = [
@@ -47,6 +48,8 @@ class WasteLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
 
     quantity = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    # quantity converted to the canonical unit (kg, l or pcs) of the subcategory's unit
+    normalized_quantity = models.FloatField(null=True, blank=True, editable=False)
 
     date_logged = models.DateTimeField(auto_now_add=True) # when the waste was logged
     disposal_date = models.DateField(auto_now_add=False, null=True, blank=True) # when the waste was disposed
@@ -55,6 +58,56 @@ class WasteLog(models.Model):
     disposal_location = models.CharField(max_length=100, blank=True, null=True) 
     disposal_photo_url = models.URLField(blank=True, null=True, max_length=500)  # Supabase Storage URL 
 
+    class Meta:
+        indexes = [
+            # Goal and challenge progress sum a user's logs of a subcategory over a time window
+            models.Index(fields=['user', 'sub_category', 'date_logged'], name='wastelog_user_sub_date_idx'),
+        ]
+
+    # Fields that decide which goals and challenges a log counts towards, and by how much
+    PROGRESS_FIELDS = ('user_id', 'sub_category_id', 'date_logged', 'normalized_quantity')
+
+    def progress_deltas(self, created=False, deleted=False):
+        """
+        Changes a write of this log makes to progress totals.
+
+        Edits subtract the previously stored values (captured before saving)
+        and add the new ones; deletes subtract the log.
+
+        Returns:
+            list: (user_id, sub_category_id, date_logged, delta) tuples
+        """
+        def contribution(values):
+            if not values or not values['sub_category_id'] or not values['normalized_quantity'] or not values['date_logged']:
+                return None, 0.0
+            return (values['user_id'], values['sub_category_id'], values['date_logged']), values['normalized_quantity']
+
+        current = {field: getattr(self, field) for field in self.PROGRESS_FIELDS}
+        if deleted:
+            key, quantity = contribution(current)
+            return [(*key, -quantity)] if key else []
+
+        new_key, new_quantity = contribution(current)
+        previous = None if created else getattr(self, '_previous_values', None)
+        old_key, old_quantity = contribution(previous)
+        if old_key == new_key:
+            delta = new_quantity - old_quantity
+            return [(*new_key, delta)] if new_key and delta else []
+        deltas = []
+        if old_key:
+            deltas.append((*old_key, -old_quantity))
+        if new_key:
+            deltas.append((*new_key, new_quantity))
+        return deltas
+
+    def save(self, *args, **kwargs):
+        unit = self.sub_category.unit if self.sub_category_id else None
+        self.normalized_quantity = normalize_quantity(self.quantity, unit)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'quantity', 'sub_category'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'normalized_quantity'}
+        super().save(*args, **kwargs)
+
     def get_score(self):
         if not self.quantity or not self.sub_category or not self.sub_category.score_per_unit:
             return 0
@@ -94,9 +147,15 @@ class SustainableAction(models.Model):
 
 @receiver(pre_delete, sender=WasteLog)
 def delete_wastelog_image(sender, instance, **kwargs):
-    """Delete associated image from Supabase storage when waste log is deleted"""
+    """Release associated image in Supabase storage when waste log is deleted"""
     if instance.disposal_photo_url:
-        from common.supabase_storage import delete_image, extract_path_from_url
-        path = extract_path_from_url(instance.disposal_photo_url)
-        if path:
-            delete_image(path)
\ No newline at end of file
+        from common.supabase_storage import release_image
+        release_image(instance.disposal_photo_url)
+
+
+@receiver(pre_save, sender=WasteLog)
+def remember_previous_log_values(sender, instance, **kwargs):
+    """Keep the stored values of an edited WasteLog so progress deltas can be computed after saving"""
+    instance._previous_values = None
+    if instance.pk:
+        instance._previous_values = WasteLog.objects.filter(pk=instance.pk).values(*WasteLog.PROGRESS_FIELDS).first()
@@ -0,0 +1,38 @@
+"""
+Conversion of logged quantities to canonical units
+
+Mass is stored in kilograms, volume in liters and countable items in pieces,
+so quantities of subcategories with different units can be summed in SQL.
+"""
+
+# unit -> (canonical unit, factor to multiply by)
+UNIT_CONVERSIONS = {
+    'kg': ('kg', 1.0),
+    'g': ('kg', 0.001),
+    'mg': ('kg', 0.000001),
+    'l': ('l', 1.0),
+    'ml': ('l', 0.001),
+    'pcs': ('pcs', 1.0),
+}
+
+
+def canonical_unit(unit):
+    """Canonical unit quantities in `unit` are stored in (unknown units are their own)"""
+    return UNIT_CONVERSIONS.get(unit, (unit, 1.0))[0]
+
+
+def conversion_factor(unit):
+    """Factor converting a quantity in `unit` to its canonical unit"""
+    return UNIT_CONVERSIONS.get(unit, (unit, 1.0))[1]
+
+
+def normalize_quantity(quantity, unit):
+    """
+    Convert a quantity to its canonical unit
+
+    Returns:
+        float: The converted quantity, or None if quantity is None
+    """
+    if quantity is None:
+        return None
+    return float(quantity) * conversion_factor(unit)
@@ -0,0 +1,67 @@
+import importlib
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from apps.waste.models import WasteLog
+from apps.waste.services.units import canonical_unit, normalize_quantity
+from apps.waste.tests.factories import UserFactory, SubCategoryFactory
+
+
+@pytest.mark.parametrize('quantity, unit, expected', [
+    (2, 'kg', 2.0),
+    (500, 'g', 0.5),
+    (250, 'mg', 0.00025),
+    (1.5, 'l', 1.5),
+    (330, 'ml', 0.33),
+    (3, 'pcs', 3.0),
+    (None, 'kg', None),
+])
+def test_normalize_quantity(quantity, unit, expected):
+    assert normalize_quantity(quantity, unit) == pytest.approx(expected)
+
+
+def test_canonical_unit():
+    assert [canonical_unit(unit) for unit in ('g', 'ml', 'pcs', 'bags')] == ['kg', 'l', 'pcs', 'bags']
+
+
+@pytest.mark.django_db
+class TestNormalizedQuantity:
+
+    def test_set_on_save(self):
+        log = WasteLog.objects.create(user=UserFactory(), sub_category=SubCategoryFactory(unit='g'), quantity=750)
+        assert log.normalized_quantity == pytest.approx(0.75)
+
+        log.quantity = 250
+        log.save(update_fields=['quantity'])
+        log.refresh_from_db()
+        assert log.normalized_quantity == pytest.approx(0.25)
+
+    def test_backfill_command(self):
+        user = UserFactory()
+        grams, millilitres = SubCategoryFactory(unit='g'), SubCategoryFactory(unit='ml')
+        logs = [
+            WasteLog.objects.create(user=user, sub_category=grams, quantity=100),
+            WasteLog.objects.create(user=user, sub_category=millilitres, quantity=200),
+            WasteLog.objects.create(user=user, sub_category=grams, quantity=300),
+        ]
+        WasteLog.objects.update(normalized_quantity=None)
+
+        call_command('backfill_normalized_quantities', '--batch-size', '2')
+
+        values = [WasteLog.objects.get(pk=log.pk).normalized_quantity for log in logs]
+        assert values == pytest.approx([0.1, 0.2, 0.3])
+
+    def test_migration_backfills_existing_logs(self):
+        migration = importlib.import_module('apps.waste.migrations.0004_wastelog_normalized_quantity')
+        user = UserFactory()
+        grams, pieces = SubCategoryFactory(unit='g'), SubCategoryFactory(unit='pcs')
+        logs = [
+            WasteLog.objects.create(user=user, sub_category=grams, quantity=400),
+            WasteLog.objects.create(user=user, sub_category=pieces, quantity=3),
+        ]
+        WasteLog.objects.update(normalized_quantity=None)
+
+        migration.normalize_quantities(apps, None)
+
+        values = [WasteLog.objects.get(pk=log.pk).normalized_quantity for log in logs]
+        assert values == pytest.approx([0.4, 3.0])
@@ -0,0 +1,45 @@
+from rest_framework import serializers
+from common.supabase_storage import UPLOAD_FOLDERS
+
+
+class SignedUploadRequestSerializer(serializers.Serializer):
+    folder = serializers.ChoiceField(
+        choices=UPLOAD_FOLDERS,
+        help_text="Folder the image belongs to (waste, events or profiles)"
+    )
+    content_type = serializers.CharField(
+        required=False,
+        help_text="MIME type of the image, e.g. image/jpeg"
+    )
+
+    def validate_content_type(self, value):
+        if not value.startswith('image/'):
+            raise serializers.ValidationError("Only image uploads are allowed.")
+        return value
+
+
+class SignedUploadSerializer(serializers.Serializer):
+    upload_url = serializers.CharField(help_text="Signed URL to upload the image bytes to")
+    token = serializers.CharField(help_text="Storage upload token embedded in upload_url")
+    path = serializers.CharField(help_text="Path of the object within the bucket")
+    upload_token = serializers.CharField(help_text="Token to send to the confirm endpoint after uploading")
+    expires_in = serializers.IntegerField(help_text="Seconds until the upload and confirm must be completed")
+
+
+class SignedUploadConfirmSerializer(serializers.Serializer):
+    upload_token = serializers.CharField(help_text="upload_token returned when the upload URL was issued")
+    object_id = serializers.IntegerField(
+        required=False,
+        help_text="ID of the waste log or event to attach the image to. Defaults to the current user for profiles."
+    )
+
+
+class SignedUploadConfirmResponseSerializer(serializers.Serializer):
+    folder = serializers.CharField()
+    object_id = serializers.IntegerField()
+    image_url = serializers.URLField()
+
+
+class StorageHealthSerializer(serializers.Serializer):
+    circuit_breaker = serializers.DictField(help_text="State of the storage circuit breaker")
+    metrics = serializers.DictField(help_text="Counters and latency histograms of storage calls")
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import SignedUploadCreateView, SignedUploadConfirmView, LocalStorageUploadView, StorageHealthView
+
+urlpatterns = [
+    path('uploads/', SignedUploadCreateView.as_view(), name='storage-signed-upload'),
+    path('uploads/confirm/', SignedUploadConfirmView.as_view(), name='storage-signed-upload-confirm'),
+    path('health/', StorageHealthView.as_view(), name='storage-health'),
+    path('local/upload/', LocalStorageUploadView.as_view(), name='local-storage-upload'),
+]
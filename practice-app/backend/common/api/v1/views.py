@@ -0,0 +1,149 @@
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from common import metrics
+from common.exceptions import StorageUnavailableError
+from common.local_storage import LocalStorageBucket
+from common.supabase_storage import (
+    IMAGE_FIELDS, claim_signed_upload, create_signed_upload, confirm_signed_upload, release_image, storage_breaker
+)
+from .serializers import (
+    SignedUploadRequestSerializer, SignedUploadSerializer,
+    SignedUploadConfirmSerializer, SignedUploadConfirmResponseSerializer,
+    StorageHealthSerializer
+)
+
+def can_attach_upload(user, folder, obj):
+    """Users may attach images to their own logs and profile, and to events they created"""
+    if folder == 'waste':
+        return obj.user_id == user.id
+    if folder == 'events':
+        return user.is_staff or obj.creator_id == user.id
+    return obj.pk == user.pk
+
+
+class SignedUploadCreateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        tags=['Storage'],
+        summary='Request a signed upload URL',
+        description='Issues a short-lived URL the client uploads an image to directly, '
+                    'bypassing the API server. Confirm the upload afterwards to attach it to an object.',
+        request=SignedUploadRequestSerializer,
+        responses={201: SignedUploadSerializer}
+    )
+    def post(self, request):
+        serializer = SignedUploadRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            signed = create_signed_upload(
+                folder_path=serializer.validated_data['folder'],
+                user_id=request.user.id,
+                content_type=serializer.validated_data.get('content_type')
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(SignedUploadSerializer(signed).data, status=status.HTTP_201_CREATED)
+
+
+class SignedUploadConfirmView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        tags=['Storage'],
+        summary='Confirm a signed upload',
+        description='Attaches an image uploaded through a signed URL to a waste log, event or the user profile. '
+                    'Each upload token can be confirmed once. The previous image of the object is released.',
+        request=SignedUploadConfirmSerializer,
+        responses={200: SignedUploadConfirmResponseSerializer}
+    )
+    def post(self, request):
+        serializer = SignedUploadConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = confirm_signed_upload(serializer.validated_data['upload_token'], request.user.id)
+        except StorageUnavailableError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        folder = upload['folder']
+        model_label, url_field = IMAGE_FIELDS[folder]
+        object_id = serializer.validated_data.get('object_id')
+        if object_id is None:
+            if folder != 'profiles':
+                return Response({'detail': 'object_id is required.'}, status=status.HTTP_400_BAD_REQUEST)
+            object_id = request.user.pk
+
+        with transaction.atomic():
+            obj = get_object_or_404(apps.get_model(model_label).objects.select_for_update(), pk=object_id)
+            if not can_attach_upload(request.user, folder, obj):
+                return Response(
+                    {'detail': 'You do not have permission to change this image.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            try:
+                claim_signed_upload(upload)
+            except ValueError as e:
+                return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            old_url = getattr(obj, url_field)
+            setattr(obj, url_field, upload['public_url'])
+            obj.save(update_fields=[url_field])
+            if old_url and old_url != upload['public_url']:
+                release_image(old_url)
+
+        return Response({
+            'folder': folder,
+            'object_id': obj.pk,
+            'image_url': upload['public_url'],
+        }, status=status.HTTP_200_OK)
+
+
+class LocalStorageUploadView(APIView):
+    """
+    Receives uploads sent to signed URLs issued by the local storage backend.
+    The signed token authorizes the request, so no authentication is needed.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(exclude=True)
+    def put(self, request):
+        if getattr(settings, 'STORAGE_BACKEND', 'supabase') != 'local':
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        bucket = LocalStorageBucket(getattr(settings, 'SUPABASE_STORAGE_BUCKET', 'images'))
+        try:
+            result = bucket.upload_to_signed_url(
+                token=request.query_params.get('token', ''),
+                file=request.body,
+                max_age=settings.SIGNED_UPLOAD_EXPIRES
+            )
+        except signing.BadSignature:
+            return Response({'detail': 'Invalid or expired upload token.'}, status=status.HTTP_403_FORBIDDEN)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response({'Key': result['path']}, status=status.HTTP_200_OK)
+
+
+class StorageHealthView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        tags=['Storage'],
+        summary='Storage health',
+        description='Circuit breaker state and storage call metrics of the serving worker process. Admin only.',
+        responses={200: StorageHealthSerializer}
+    )
+    def get(self, request):
+        return Response({
+            'circuit_breaker': storage_breaker.snapshot(),
+            'metrics': metrics.snapshot(),
+        }, status=status.HTTP_200_OK)
@@ -1 +1,12 @@
 # Custom exception classes for the project
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit breaker is open"""
+
+
+class StorageUnavailableError(ValueError):
+    """
+    Raised when image storage is failing or its circuit breaker is open.
+    Subclasses ValueError so existing upload error handling still applies.
+    """
@@ -0,0 +1,64 @@
+"""
+Grid-cell index and great-circle distance helpers for "near me" queries
+
+Points are bucketed into cells of GRID_CELL_DEGREES on each axis and the
+integer cell coordinates are stored in indexed columns. A radius search
+first selects the cells overlapping the radius' bounding box with plain
+range lookups (SQLite and Postgres alike, no PostGIS), then refines the
+candidates with the haversine distance.
+"""
+import math
+from typing import List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+GRID_CELL_DEGREES = 0.1
+LONGITUDE_CELLS = round(360 / GRID_CELL_DEGREES)
+
+
+def grid_cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    """Integer (row, column) of the grid cell containing the point"""
+    longitude = (longitude + 180.0) % 360.0 - 180.0
+    return math.floor(latitude / GRID_CELL_DEGREES), math.floor(longitude / GRID_CELL_DEGREES)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cell_ranges(
+    latitude: float, longitude: float, radius_km: float
+) -> Tuple[Tuple[int, int], Optional[List[Tuple[int, int]]]]:
+    """
+    Grid rows and columns covering the bounding box of a radius around a point.
+
+    Returns:
+        tuple: (first_row, last_row) and a list of inclusive (first_column, last_column)
+        ranges, split in two when the box crosses the antimeridian. The column
+        ranges are None when the box spans every longitude (near the poles).
+    """
+    # Angular radius on the same sphere haversine_km measures on, so the box
+    # always contains every point the refinement would accept
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(-90.0, latitude - lat_delta), min(90.0, latitude + lat_delta)
+    rows = (grid_cell(south, 0)[0], grid_cell(north, 0)[0])
+
+    widest = max(abs(south), abs(north))
+    if widest >= 90.0:
+        return rows, None
+    lon_delta = lat_delta / math.cos(math.radians(widest))
+    if lon_delta >= 180.0:
+        return rows, None
+
+    west, east = longitude - lon_delta, longitude + lon_delta
+    first, last = math.floor(west / GRID_CELL_DEGREES), math.floor(east / GRID_CELL_DEGREES)
+    half = LONGITUDE_CELLS // 2
+    if first < -half:
+        return rows, [(first + LONGITUDE_CELLS, half - 1), (-half, last)]
+    if last >= half:
+        return rows, [(first, half - 1), (-half, last - LONGITUDE_CELLS)]
+    return rows, [(first, last)]
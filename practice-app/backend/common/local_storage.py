@@ -0,0 +1,101 @@
+"""
+Filesystem stand-in for a Supabase Storage bucket
+
+Used when STORAGE_BACKEND = 'local' so image uploads, signed uploads and
+deletions can run in development and tests without a Supabase project.
+Objects live under LOCAL_STORAGE_ROOT/<bucket>/ and are served from MEDIA_URL.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+SIGNED_UPLOAD_SALT = 'common.local_storage.signed_upload'
+
+
+class LocalStorageBucket:
+    """
+    Implements the subset of the storage3 bucket API used by common.supabase_storage
+    """
+
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+        self.root = Path(settings.LOCAL_STORAGE_ROOT) / bucket_name
+
+    def _resolve(self, path: str) -> Path:
+        full_path = (self.root / path).resolve()
+        if self.root.resolve() not in full_path.parents:
+            raise ValueError(f"Invalid storage path: {path}")
+        return full_path
+
+    def upload(self, path: str, file: bytes, file_options: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        full_path = self._resolve(path)
+        upsert = (file_options or {}).get('upsert') == 'true'
+        if full_path.exists() and not upsert:
+            raise ValueError("The resource already exists")
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_bytes(file)
+        return {'path': path}
+
+    def remove(self, paths: List[str]) -> List[Dict[str, Any]]:
+        removed = []
+        for path in paths:
+            full_path = self._resolve(path)
+            if full_path.exists():
+                full_path.unlink()
+                removed.append({'name': path})
+        return removed
+
+    def list(self, path: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        List the entries of a folder sorted by name, paged with limit/offset like Supabase
+        """
+        options = options or {}
+        folder = self._resolve(path) if path else self.root
+        if not folder.is_dir():
+            return []
+        entries = sorted(folder.iterdir(), key=lambda entry: entry.name)
+        offset = options.get('offset', 0)
+        entries = entries[offset:offset + options.get('limit', 100)]
+        return [self._describe(entry) for entry in entries]
+
+    def _describe(self, entry: Path) -> Dict[str, Any]:
+        if entry.is_dir():
+            return {'name': entry.name, 'id': None, 'created_at': None, 'metadata': None}
+        stat = entry.stat()
+        modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat()
+        return {
+            'name': entry.name,
+            'id': entry.name,
+            'created_at': modified,
+            'updated_at': modified,
+            'metadata': {'size': stat.st_size},
+        }
+
+    def exists(self, path: str) -> bool:
+        return self._resolve(path).is_file()
+
+    def get_public_url(self, path: str) -> str:
+        base_url = settings.LOCAL_STORAGE_BASE_URL.rstrip('/')
+        return f"{base_url}{settings.MEDIA_URL}storage/public/{self.bucket_name}/{path}"
+
+    def create_signed_upload_url(self, path: str) -> Dict[str, str]:
+        token = signing.dumps({'bucket': self.bucket_name, 'path': path}, salt=SIGNED_UPLOAD_SALT)
+        base_url = settings.LOCAL_STORAGE_BASE_URL.rstrip('/')
+        signed_url = f"{base_url}{reverse('local-storage-upload')}?{urlencode({'token': token})}"
+        return {'signed_url': signed_url, 'token': token, 'path': path}
+
+    def upload_to_signed_url(self, token: str, file: bytes, max_age: int) -> Dict[str, Any]:
+        """
+        Store bytes sent to a signed upload URL
+
+        Raises:
+            signing.BadSignature: If the token is invalid or expired
+        """
+        payload = signing.loads(token, salt=SIGNED_UPLOAD_SALT, max_age=max_age)
+        if payload['bucket'] != self.bucket_name:
+            raise signing.BadSignature("Token was issued for another bucket")
+        return self.upload(payload['path'], file)
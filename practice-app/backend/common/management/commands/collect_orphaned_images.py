@@ -0,0 +1,109 @@
+from datetime import timedelta
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from common.models import StoredImage
+from common.supabase_storage import IMAGE_FIELDS, delete_images, extract_path_from_url, list_images
+
+
+class Command(BaseCommand):
+    help = 'Deletes bucket images that no waste log, event or profile references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='Only delete objects older than this, so in-flight uploads are kept')
+        parser.add_argument('--page-size', type=int, default=1000,
+                            help='Number of objects fetched per bucket listing request')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of objects removed per storage request')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report orphans without deleting them')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        # Built before listing, so anything referenced later is newer than the cutoff
+        referenced = self.referenced_paths()
+        self.stdout.write(f'{len(referenced)} referenced images.')
+
+        total_orphans = 0
+        for folder in IMAGE_FIELDS:
+            orphans = self.collect_folder(folder, referenced, cutoff, options)
+            total_orphans += orphans
+            self.stdout.write(f'{folder}: {orphans} orphaned images.')
+
+        action = 'Found' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{action} {total_orphans} orphaned images.'))
+
+    def referenced_paths(self):
+        """Bucket paths of every image URL stored on a model"""
+        referenced = set()
+        for model_label, url_field in IMAGE_FIELDS.values():
+            urls = (
+                apps.get_model(model_label).objects
+                .exclude(**{f'{url_field}__isnull': True})
+                .exclude(**{url_field: ''})
+                .values_list(url_field, flat=True)
+                .iterator(chunk_size=2000)
+            )
+            for url in urls:
+                path = extract_path_from_url(url)
+                if path:
+                    referenced.add(path)
+        return referenced
+
+    def collect_folder(self, folder, referenced, cutoff, options):
+        """Stream one folder page by page and delete its orphans after each page"""
+        page_size = options['page_size']
+        offset = 0
+        orphans = 0
+        while True:
+            page = list_images(folder, limit=page_size, offset=offset)
+            if not page:
+                break
+
+            candidates = []
+            for entry in page:
+                if entry.get('id') is None:
+                    continue  # sub-folder placeholder
+                path = f"{folder}/{entry['name']}"
+                created_at = parse_datetime(entry.get('created_at') or '')
+                if path in referenced or created_at is None or created_at >= cutoff:
+                    continue
+                candidates.append(path)
+
+            deleted = 0
+            for start in range(0, len(candidates), options['batch_size']):
+                batch = candidates[start:start + options['batch_size']]
+                orphans_in_batch = self.delete_orphans(batch, cutoff, options['dry_run'])
+                orphans += orphans_in_batch
+                if not options['dry_run']:
+                    deleted += orphans_in_batch
+
+            if len(page) < page_size:
+                break
+            # Deleted objects no longer take up listing positions
+            offset += len(page) - deleted
+        return orphans
+
+    def delete_orphans(self, paths, cutoff, dry_run):
+        """
+        Delete a batch of unreferenced objects and return how many were orphaned.
+
+        Content-addressed images whose reference was acquired recently are kept,
+        as a request may be about to store their URL.
+        """
+        with transaction.atomic():
+            tracked = StoredImage.objects.filter(path__in=paths)
+            recent = set(tracked.filter(last_acquired_at__gte=cutoff).values_list('path', flat=True))
+            paths = [path for path in paths if path not in recent]
+            if dry_run or not paths:
+                return len(paths)
+            # Leaked references from failed requests
+            tracked.filter(path__in=paths).delete()
+
+        if not delete_images(paths):
+            self.stderr.write(f'Failed to delete {len(paths)} images, they will be retried on the next run.')
+            return 0
+        return len(paths)
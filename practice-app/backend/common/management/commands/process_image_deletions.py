@@ -0,0 +1,84 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from common.models import PendingImageDeletion, StoredImage
+from common.supabase_storage import delete_images
+
+
+class Command(BaseCommand):
+    help = 'Deletes queued images from Supabase Storage in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of objects removed per storage request')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and poll the queue instead of exiting when it is empty')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to wait between polls when --loop is set')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            deleted = failed = 0
+            while True:
+                result = self.process_batch(batch_size)
+                if result is None:
+                    break
+                deleted += result[0]
+                failed += result[1]
+                if result[1]:
+                    # Storage is failing, retry on the next run instead of spinning
+                    break
+
+            if deleted or failed:
+                self.stdout.write(f'Deleted {deleted} images, {failed} failed.')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Image deletion queue processed.'))
+
+    def process_batch(self, batch_size):
+        """
+        Remove one batch of queued objects.
+
+        Returns (deleted, failed) counts, or None when the queue is empty.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                PendingImageDeletion.objects.select_for_update(skip_locked=True)
+                .filter(attempts__lt=settings.IMAGE_DELETION_MAX_ATTEMPTS, next_attempt_at__lte=now)
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                return None
+
+            # Content-addressed paths can be uploaded again after being queued
+            reused = set(
+                StoredImage.objects.filter(path__in=[item.path for item in batch])
+                .values_list('path', flat=True)
+            )
+            paths = [item.path for item in batch if item.path not in reused]
+            ids = [item.id for item in batch]
+
+            if delete_images(paths):
+                PendingImageDeletion.objects.filter(id__in=ids).delete()
+                return len(paths), 0
+
+            for item in batch:
+                item.attempts += 1
+                item.next_attempt_at = now + timedelta(seconds=self.retry_delay(item.attempts))
+                item.last_error = 'Storage removal failed'
+            PendingImageDeletion.objects.bulk_update(batch, ['attempts', 'next_attempt_at', 'last_error'])
+            return 0, len(paths)
+
+    @staticmethod
+    def retry_delay(attempts):
+        """Seconds to wait before retrying a row that failed `attempts` times"""
+        return min(settings.IMAGE_DELETION_MAX_RETRY_DELAY, settings.IMAGE_DELETION_RETRY_DELAY * 2 ** (attempts - 1))
@@ -0,0 +1,74 @@
+"""
+In-process metrics for operational visibility
+
+Counters and latency histograms are kept per worker process and exposed
+through the admin-only /api/v1/storage/health/ endpoint.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = {}
+_histograms: Dict[str, Dict] = {}
+
+
+def increment(name: str, value: int = 1) -> None:
+    """Add to a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record a duration in a latency histogram"""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {
+                'count': 0,
+                'sum': 0.0,
+                'max': 0.0,
+                'buckets': {str(bound): 0 for bound in LATENCY_BUCKETS + ('inf',)},
+            }
+        histogram['count'] += 1
+        histogram['sum'] += seconds
+        histogram['max'] = max(histogram['max'], seconds)
+        for bound in LATENCY_BUCKETS:
+            if seconds <= bound:
+                histogram['buckets'][str(bound)] += 1
+                break
+        else:
+            histogram['buckets']['inf'] += 1
+
+
+@contextmanager
+def timed(name: str):
+    """Record the duration of the wrapped block in a latency histogram"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        observe(name, time.monotonic() - started)
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Copy of all counters and histograms"""
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'histograms': {
+                name: {**histogram, 'buckets': dict(histogram['buckets'])}
+                for name, histogram in _histograms.items()
+            },
+        }
+
+
+def reset() -> None:
+    """Clear all metrics (used by tests)"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:28
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_pendingimagedeletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedimage',
+            name='last_acquired_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='When a reference was last added'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-19 19:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_storedimage_last_acquired_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingimagedeletion',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils import timezone
+
+
+class StoredImage(models.Model):
+    """
+    A content-addressed object in Supabase Storage.
+
+    Identical image bytes are stored once under a path derived from their
+    SHA-256 digest; every model row pointing at the object holds one reference.
+    The object is removed from the bucket only when the last reference goes away.
+    """
+    content_hash = models.CharField(max_length=64, unique=True, help_text="SHA-256 hex digest of the image bytes")
+    path = models.CharField(max_length=500, unique=True, help_text="Path of the object within the bucket")
+    public_url = models.URLField(max_length=500)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_acquired_at = models.DateTimeField(default=timezone.now, help_text="When a reference was last added")
+
+    def __str__(self):
+        return f"{self.path} ({self.ref_count} refs)"
+
+
+class PendingImageDeletion(models.Model):
+    """
+    Outbox of bucket objects waiting to be deleted.
+
+    Rows are written after the deleting transaction commits and drained in
+    batches by the process_image_deletions management command. Failed rows
+    are retried after next_attempt_at; rows that used up their attempts stay
+    in the table for inspection and are no longer picked up.
+    """
+    path = models.CharField(max_length=500, unique=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.path
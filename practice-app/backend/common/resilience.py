@@ -0,0 +1,115 @@
+"""
+Retry and circuit breaker helpers for calls to external services
+"""
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Union
+
+from common.exceptions import CircuitOpenError
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float = 5.0) -> float:
+    """
+    Exponential backoff with full jitter for the given attempt (1-based)
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a dependency is unhealthy.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls for `reset_timeout` seconds. It then lets a single trial
+    call through (half-open): success closes it, failure opens it again.
+    Either limit may be a callable, read each time it is needed, so a
+    breaker created at import time can follow settings.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Union[int, Callable[[], int]] = 5,
+        reset_timeout: Union[float, Callable[[], float]] = 30.0,
+    ):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def failure_threshold(self) -> int:
+        limit = self._failure_threshold
+        return limit() if callable(limit) else limit
+
+    @property
+    def reset_timeout(self) -> float:
+        limit = self._reset_timeout
+        return limit() if callable(limit) else limit
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: If the breaker is open or a half-open trial is already running
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN:
+                raise CircuitOpenError(f"Circuit '{self.name}' is open")
+            if state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError(f"Circuit '{self.name}' is half-open, trial call in progress")
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                'name': self.name,
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'seconds_until_retry': (
+                    max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+                    if state == self.OPEN else None
+                ),
+            }
@@ -2,35 +2,170 @@
 Supabase Storage utility for handling image uploads
 """
 import base64
+import hashlib
 import mimetypes
 import uuid
 import logging
-from typing import Optional, Union, BinaryIO
+import time
+from typing import Any, Callable, Dict, List, Optional, Union, BinaryIO
+import httpx
 from django.conf import settings
-from supabase import create_client, Client
+from django.core import signing
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from storage3.exceptions import StorageApiError
+from supabase import create_client, Client, ClientOptions
+from common import metrics
+from common.exceptions import CircuitOpenError, StorageUnavailableError
+from common.local_storage import LocalStorageBucket
+from common.models import StoredImage, PendingImageDeletion
+from common.resilience import CircuitBreaker, backoff_delay
 
 logger = logging.getLogger(__name__)
 
+# Model and URL field holding the images of each bucket folder
+IMAGE_FIELDS = {
+    'waste': ('waste.WasteLog', 'disposal_photo_url'),
+    'events': ('events.Event', 'image_url'),
+    'profiles': ('user.CustomUser', 'profile_picture_url'),
+}
+# Folders clients may upload to directly with a signed URL
+UPLOAD_FOLDERS = tuple(IMAGE_FIELDS)
+SIGNED_UPLOAD_SALT = 'common.supabase_storage.signed_upload'
 
-def get_supabase_client() -> Client:
+# Shared by all storage calls in this process; fails fast while storage is unhealthy.
+# Limits are read from settings on use, not frozen at import.
+storage_breaker = CircuitBreaker(
+    'storage',
+    failure_threshold=lambda: getattr(settings, 'STORAGE_BREAKER_FAILURE_THRESHOLD', 5),
+    reset_timeout=lambda: getattr(settings, 'STORAGE_BREAKER_RESET_TIMEOUT', 30),
+)
+
+# Supabase clients keyed by (url, key, timeout), so connections are reused between calls
+_clients: Dict[tuple, Client] = {}
+
+
+def get_supabase_client(timeout: Optional[int] = None) -> Client:
     """
     Get or create Supabase client instance
+    
+    Args:
+        timeout: Storage request timeout in seconds. Defaults to STORAGE_TIMEOUTS['default']
     """
     supabase_url = getattr(settings, 'SUPABASE_URL', None)
     supabase_key = getattr(settings, 'SUPABASE_SERVICE_KEY', None)
     
-    logger.info(f"Supabase URL: {supabase_url}")
-    logger.info(f"Supabase Service Key configured: {bool(supabase_key)}")
-    
     if not supabase_url or not supabase_key:
         logger.error("Supabase credentials not configured!")
         raise ValueError(
             "Supabase credentials not configured. "
             "Please set SUPABASE_URL and SUPABASE_SERVICE_KEY in settings."
         )
+
+    timeout = timeout or _storage_timeout('default')
+    cache_key = (supabase_url, supabase_key, timeout)
+    client = _clients.get(cache_key)
+    if client is None:
+        logger.info(f"Creating Supabase client for {supabase_url} (storage timeout {timeout}s)")
+        # Create client with service role key for server-side operations
+        client = create_client(supabase_url, supabase_key, options=ClientOptions(
+            auto_refresh_token=False,
+            persist_session=False,
+            storage_client_timeout=timeout,
+        ))
+        _clients[cache_key] = client
+    return client
+
+
+def _storage_timeout(operation: str) -> int:
+    timeouts = getattr(settings, 'STORAGE_TIMEOUTS', {})
+    return timeouts.get(operation, timeouts.get('default', 10))
+
+
+def get_storage_bucket(operation: str = 'default'):
+    """
+    Get the bucket used for image storage
+    
+    Returns the Supabase Storage bucket, or a LocalStorageBucket writing under
+    MEDIA_ROOT when settings.STORAGE_BACKEND is 'local'.
     
-    # Create client with service role key for server-side operations
-    return create_client(supabase_url, supabase_key)
+    Args:
+        operation: Storage operation, selects the request timeout from STORAGE_TIMEOUTS
+    """
+    bucket_name = getattr(settings, 'SUPABASE_STORAGE_BUCKET', 'images')
+    if getattr(settings, 'STORAGE_BACKEND', 'supabase') == 'local':
+        return LocalStorageBucket(bucket_name)
+    return get_supabase_client(_storage_timeout(operation)).storage.from_(bucket_name)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Whether a storage error is worth retrying and counts against the circuit breaker
+    
+    Timeouts, connection failures and 5xx responses are transient; client
+    errors such as 'already exists' or 'not found' are not.
+    """
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, StorageApiError):
+        status = error.status
+    elif isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    else:
+        return False
+    try:
+        return int(status) >= 500
+    except (TypeError, ValueError):
+        return False
+
+
+def call_storage(operation: str, func: Callable[[Any], Any], idempotent: bool = True) -> Any:
+    """
+    Run a storage call with retries, the circuit breaker and latency metrics
+    
+    Args:
+        operation: Name of the operation (upload, remove, list, ...), used for
+            the timeout and metric names
+        func: Called with the storage bucket and returns the result
+        idempotent: Only idempotent calls are retried on transient errors
+    
+    Raises:
+        StorageUnavailableError: If the circuit breaker is open
+        Exception: The last error raised by func
+    """
+    attempts = getattr(settings, 'STORAGE_RETRY_ATTEMPTS', 3) if idempotent else 1
+    base_delay = getattr(settings, 'STORAGE_RETRY_BASE_DELAY', 0.2)
+
+    for attempt in range(1, attempts + 1):
+        try:
+            storage_breaker.before_call()
+        except CircuitOpenError as e:
+            metrics.increment(f'storage.{operation}.rejected')
+            raise StorageUnavailableError(f"Storage is temporarily unavailable: {str(e)}")
+
+        started = time.monotonic()
+        try:
+            result = func(get_storage_bucket(operation))
+        except Exception as e:
+            metrics.observe(f'storage.{operation}.seconds', time.monotonic() - started)
+            if not is_transient_error(e):
+                # Storage answered, so it is healthy even though the call failed
+                storage_breaker.record_success()
+                metrics.increment(f'storage.{operation}.errors')
+                raise
+            storage_breaker.record_failure()
+            metrics.increment(f'storage.{operation}.failures')
+            if attempt == attempts:
+                raise
+            delay = backoff_delay(attempt, base_delay)
+            logger.warning(f"Storage {operation} failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+            metrics.increment(f'storage.{operation}.retries')
+            time.sleep(delay)
+        else:
+            metrics.observe(f'storage.{operation}.seconds', time.monotonic() - started)
+            storage_breaker.record_success()
+            return result
 
 
 def upload_image(
@@ -43,10 +178,14 @@ def upload_image(
     """
     Upload an image file to Supabase Storage
     
+    When no filename is given the upload is content-addressed: the object is
+    stored as '<folder>/<sha256>.<ext>' and tracked in StoredImage. Uploading
+    bytes that are already stored skips the transfer and only adds a reference.
+    
     Args:
         file_content: File-like object or bytes containing image data
         folder_path: Folder path within bucket (e.g., 'events', 'waste', 'profiles')
-        filename: Optional filename. If not provided, generates UUID-based filename
+        filename: Optional filename. If provided, the file is stored as-is without deduplication
         content_type: MIME type (e.g., 'image/jpeg'). Auto-detected if not provided
         upsert: Whether to overwrite existing file
     
@@ -56,34 +195,91 @@ def upload_image(
     Raises:
         ValueError: If Supabase is not configured or upload fails
     """
-    supabase = get_supabase_client()
-    bucket_name = getattr(settings, 'SUPABASE_STORAGE_BUCKET', 'images')
-    
-    # Generate filename if not provided
-    if not filename:
-        # Try to detect extension from content_type
-        ext = 'jpg'  # default
-        if content_type:
-            ext = mimetypes.guess_extension(content_type) or 'jpg'
-            ext = ext.lstrip('.')
-        filename = f"{uuid.uuid4()}.{ext}"
-    
-    # Construct full path
-    file_path = f"{folder_path}/{filename}"
-    
     # Ensure file_content is bytes
     if hasattr(file_content, 'read'):
         file_bytes = file_content.read()
     else:
         file_bytes = file_content
+
+    if filename:
+        # Detect content type if not provided
+        if not content_type:
+            content_type = mimetypes.guess_type(filename)[0] or 'image/jpeg'
+        return _upload_bytes(file_bytes, f"{folder_path}/{filename}", content_type, upsert)
+
+    content_hash = hashlib.sha256(file_bytes).hexdigest()
+    public_url = _acquire_stored_image(content_hash)
+    if public_url:
+        logger.info(f"Image {content_hash} already stored, skipping upload")
+        return public_url
+
+    # Try to detect extension from content_type
+    ext = 'jpg'  # default
+    if content_type:
+        ext = mimetypes.guess_extension(content_type) or 'jpg'
+        ext = ext.lstrip('.')
+    else:
+        content_type = 'image/jpeg'
+
+    file_path = f"{folder_path}/{content_hash}.{ext}"
+    # The path is derived from the content, so overwriting an existing object is harmless
+    public_url = _upload_bytes(file_bytes, file_path, content_type, upsert=True)
+
+    with transaction.atomic():
+        stored, created = StoredImage.objects.select_for_update().get_or_create(
+            content_hash=content_hash,
+            defaults={
+                'path': file_path,
+                'public_url': public_url,
+                'content_type': content_type,
+                'size': len(file_bytes),
+            }
+        )
+        if created:
+            # A release of the same bytes may have queued this path while we uploaded
+            PendingImageDeletion.objects.filter(path=file_path).delete()
+            return stored.public_url
+
+        # A concurrent request stored the same bytes first
+        StoredImage.objects.filter(pk=stored.pk).update(
+            ref_count=F('ref_count') + 1,
+            last_acquired_at=timezone.now()
+        )
+        if stored.path != file_path:
+            # Stored under another extension, so our copy is not referenced anywhere
+            schedule_image_deletion(file_path)
+    return stored.public_url
+
+
+def _acquire_stored_image(content_hash: str) -> Optional[str]:
+    """
+    Add a reference to an already stored image
     
-    # Detect content type if not provided
-    if not content_type:
-        content_type = mimetypes.guess_type(filename)[0] or 'image/jpeg'
+    The row is locked so a concurrent release_image either sees the new
+    reference or has already removed the row, in which case the bytes are
+    uploaded again.
     
+    Returns:
+        Public URL of the stored image, or None if these bytes are not stored yet
+    """
+    with transaction.atomic():
+        stored = StoredImage.objects.select_for_update().filter(content_hash=content_hash).first()
+        if stored is None:
+            return None
+        StoredImage.objects.filter(pk=stored.pk).update(
+            ref_count=F('ref_count') + 1,
+            last_acquired_at=timezone.now()
+        )
+    return stored.public_url
+
+
+def _upload_bytes(file_bytes: bytes, file_path: str, content_type: str, upsert: bool) -> str:
+    """
+    Upload raw bytes to the given bucket path and return the public URL
+    """
     # Upload to Supabase
     try:
-        logger.info(f"Uploading to bucket '{bucket_name}' at path '{file_path}'")
+        logger.info(f"Uploading to path '{file_path}'")
         logger.info(f"Content type: {content_type}, Size: {len(file_bytes)} bytes")
         
         file_options = {
@@ -92,28 +288,23 @@ def upload_image(
             "cache-control": "3600",
         }
         
-        response = (
-            supabase.storage
-            .from_(bucket_name)
-            .upload(
-                path=file_path,
-                file=file_bytes,
-                file_options=file_options
-            )
+        # Overwriting uploads can be repeated safely, create-only ones cannot
+        response = call_storage(
+            'upload',
+            lambda bucket: bucket.upload(path=file_path, file=file_bytes, file_options=file_options),
+            idempotent=upsert
         )
         
         logger.info(f"Upload response: {response}")
         
         # Get public URL
-        public_url = (
-            supabase.storage
-            .from_(bucket_name)
-            .get_public_url(file_path)
-        )
+        public_url = get_storage_bucket().get_public_url(file_path)
         
         logger.info(f"Public URL generated: {public_url}")
         return public_url
         
+    except StorageUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Upload failed: {str(e)}")
         logger.error(f"Error type: {type(e).__name__}")
@@ -132,7 +323,7 @@ def upload_base64_image(
     Args:
         base64_string: Base64 encoded image string (with or without data URI prefix)
         folder_path: Folder path within bucket (e.g., 'events', 'waste', 'profiles')
-        filename: Optional filename. If not provided, generates UUID-based filename
+        filename: Optional filename. If not provided, the image is stored content-addressed
         upsert: Whether to overwrite existing file
     
     Returns:
@@ -165,10 +356,7 @@ def upload_base64_image(
     else:
         ext = 'jpg'  # default
     
-    # Generate filename if not provided
-    if not filename:
-        filename = f"{uuid.uuid4()}.{ext}"
-    elif not filename.endswith(f'.{ext}'):
+    if filename and not filename.endswith(f'.{ext}'):
         filename = f"{filename}.{ext}"
     
     # Upload using bytes
@@ -181,6 +369,121 @@ def upload_base64_image(
     )
 
 
+def create_signed_upload(
+    folder_path: str,
+    user_id: int,
+    content_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Issue a short-lived signed URL the client can upload an image to directly
+    
+    The image bytes never pass through Django. After uploading, the client
+    sends the returned upload_token to confirm_signed_upload to attach the
+    image to an object.
+    
+    Args:
+        folder_path: One of UPLOAD_FOLDERS
+        user_id: ID of the user the upload is issued to
+        content_type: MIME type of the image, used for the file extension
+    
+    Returns:
+        Dict with upload_url, token (storage upload token), path, upload_token and expires_in
+    
+    Raises:
+        ValueError: If the folder is not allowed or the URL cannot be created
+    """
+    if folder_path not in UPLOAD_FOLDERS:
+        raise ValueError(f"Uploads are not allowed to folder '{folder_path}'")
+
+    ext = 'jpg'  # default
+    if content_type:
+        ext = (mimetypes.guess_extension(content_type) or '.jpg').lstrip('.')
+    file_path = f"{folder_path}/{uuid.uuid4()}.{ext}"
+
+    try:
+        signed = call_storage('sign', lambda bucket: bucket.create_signed_upload_url(file_path))
+    except StorageUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to create signed upload URL: {str(e)}")
+        raise ValueError(f"Failed to create signed upload URL: {str(e)}")
+
+    upload_token = signing.dumps(
+        {'path': file_path, 'folder': folder_path, 'user': user_id},
+        salt=SIGNED_UPLOAD_SALT
+    )
+    return {
+        'upload_url': signed['signed_url'],
+        'token': signed['token'],
+        'path': file_path,
+        'upload_token': upload_token,
+        'expires_in': settings.SIGNED_UPLOAD_EXPIRES,
+    }
+
+
+def confirm_signed_upload(upload_token: str, user_id: int) -> Dict[str, str]:
+    """
+    Verify that a signed upload was issued to this user and has been uploaded
+    
+    The token stays valid until claim_signed_upload consumes it.
+    
+    Returns:
+        Dict with the folder, path and public_url of the uploaded image
+    
+    Raises:
+        ValueError: If the token is invalid, expired, issued to another user,
+            or nothing was uploaded to the signed URL
+    """
+    try:
+        payload = signing.loads(upload_token, salt=SIGNED_UPLOAD_SALT, max_age=settings.SIGNED_UPLOAD_EXPIRES)
+    except signing.SignatureExpired:
+        raise ValueError("Upload token has expired.")
+    except signing.BadSignature:
+        raise ValueError("Invalid upload token.")
+
+    if payload['user'] != user_id:
+        raise ValueError("Upload token was issued to another user.")
+
+    if not call_storage('exists', lambda bucket: bucket.exists(payload['path'])):
+        raise ValueError("No image has been uploaded for this token.")
+
+    return {
+        'folder': payload['folder'],
+        'path': payload['path'],
+        'public_url': get_storage_bucket().get_public_url(payload['path']),
+    }
+
+
+def claim_signed_upload(upload: Dict[str, str]) -> None:
+    """
+    Consume a confirmed signed upload and start counting references to it
+    
+    Call this in the transaction that stores the image URL. The object gets a
+    StoredImage row with one reference, so release_image treats it like any
+    other tracked image. The bytes never pass through Django, so the row is
+    keyed by a digest of the object's unique path rather than of its content.
+    
+    Args:
+        upload: Result of confirm_signed_upload
+    
+    Raises:
+        ValueError: If the upload was already attached or its object is being deleted
+    """
+    path = upload['path']
+    if PendingImageDeletion.objects.filter(path=path).exists():
+        raise ValueError("Upload token has already been used.")
+    _, created = StoredImage.objects.get_or_create(
+        path=path,
+        defaults={
+            'content_hash': hashlib.sha256(f"signed:{path}".encode()).hexdigest(),
+            'public_url': upload['public_url'],
+            'content_type': mimetypes.guess_type(path)[0] or '',
+        }
+    )
+    if not created:
+        raise ValueError("Upload token has already been used.")
+
+
 def delete_image(file_path: str) -> bool:
     """
     Delete an image from Supabase Storage
@@ -191,15 +494,86 @@ def delete_image(file_path: str) -> bool:
     Returns:
         True if deletion was successful, False otherwise
     """
+    return delete_images([file_path])
+
+
+def delete_images(file_paths: List[str]) -> bool:
+    """
+    Delete several images from Supabase Storage in a single request
+    
+    Args:
+        file_paths: Full paths to files in bucket
+    
+    Returns:
+        True if deletion was successful, False otherwise
+    """
+    if not file_paths:
+        return True
     try:
-        supabase = get_supabase_client()
-        bucket_name = getattr(settings, 'SUPABASE_STORAGE_BUCKET', 'images')
-        
-        supabase.storage.from_(bucket_name).remove([file_path])
+        call_storage('remove', lambda bucket: bucket.remove(list(file_paths)))
         return True
-    except Exception:
+    except Exception as e:
+        logger.error(f"Failed to delete {len(file_paths)} images: {str(e)}")
+        return False
+
+
+def list_images(folder_path: str, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    List one page of objects in a bucket folder, sorted by name
+    
+    Returns:
+        Storage entries with at least 'name', 'id' and 'created_at'
+    """
+    return call_storage('list', lambda bucket: bucket.list(folder_path, {
+        'limit': limit,
+        'offset': offset,
+        'sortBy': {'column': 'name', 'order': 'asc'},
+    }))
+
+
+def schedule_image_deletion(file_path: str) -> None:
+    """
+    Queue an image for deletion once the current transaction commits
+    
+    The object is written to the PendingImageDeletion outbox and removed from
+    the bucket by the process_image_deletions command. If the transaction
+    rolls back, nothing is queued and the image is kept.
+    """
+    transaction.on_commit(
+        lambda: PendingImageDeletion.objects.bulk_create(
+            [PendingImageDeletion(path=file_path)], ignore_conflicts=True
+        )
+    )
+
+
+def release_image(public_url: str) -> bool:
+    """
+    Drop one reference to an image and schedule its deletion once nothing points at it
+    
+    Images that are not tracked in StoredImage (uploaded before deduplication
+    or under an explicit filename) are scheduled for deletion straight away.
+    
+    Args:
+        public_url: Public URL stored on the model (e.g. WasteLog.disposal_photo_url)
+    
+    Returns:
+        True if the reference was released, False otherwise
+    """
+    path = extract_path_from_url(public_url)
+    if not path:
         return False
 
+    with transaction.atomic():
+        stored = StoredImage.objects.select_for_update().filter(path=path).first()
+        if stored and stored.ref_count > 1:
+            StoredImage.objects.filter(pk=stored.pk).update(ref_count=F('ref_count') - 1)
+            return True
+        if stored:
+            stored.delete()
+        schedule_image_deletion(path)
+
+    return True
+
 
 def extract_path_from_url(public_url: str) -> Optional[str]:
     """
@@ -0,0 +1,76 @@
+"""
+Tests for the orphaned image garbage collector
+"""
+import os
+import time
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from common.local_storage import LocalStorageBucket
+from common.models import StoredImage
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import UserFactory
+
+DAY = 24 * 60 * 60
+
+
+@pytest.mark.django_db
+class TestCollectOrphanedImages:
+
+    @pytest.fixture
+    def bucket(self, settings, tmp_path):
+        settings.STORAGE_BACKEND = 'local'
+        settings.LOCAL_STORAGE_ROOT = tmp_path
+        settings.LOCAL_STORAGE_BASE_URL = 'http://testserver'
+        return LocalStorageBucket('images')
+
+    def store(self, bucket, path, age=2 * DAY):
+        bucket.upload(path, b'image')
+        modified = time.time() - age
+        os.utime(bucket.root / path, (modified, modified))
+        return bucket.get_public_url(path)
+
+    def run(self, **options):
+        call_command('collect_orphaned_images', stdout=StringIO(), **options)
+
+    def test_only_old_unreferenced_images_are_deleted(self, bucket):
+        url = self.store(bucket, 'waste/used.jpg')
+        WasteLog.objects.create(user=UserFactory(), quantity=1, disposal_photo_url=url)
+        self.store(bucket, 'waste/orphan.jpg')
+        self.store(bucket, 'events/fresh.jpg', age=60)
+
+        self.run()
+
+        assert bucket.exists('waste/used.jpg')
+        assert not bucket.exists('waste/orphan.jpg')
+        assert bucket.exists('events/fresh.jpg')
+
+    def test_dry_run_keeps_orphans(self, bucket):
+        self.store(bucket, 'profiles/orphan.jpg')
+
+        self.run(dry_run=True)
+
+        assert bucket.exists('profiles/orphan.jpg')
+
+    def test_paging_does_not_skip_objects_after_deletions(self, bucket):
+        for i in range(7):
+            self.store(bucket, f'waste/orphan-{i}.jpg')
+
+        self.run(page_size=2, batch_size=1)
+
+        assert bucket.list('waste') == []
+
+    def test_leaked_reference_is_collected_but_recent_one_is_kept(self, bucket):
+        leaked_url = self.store(bucket, 'waste/leaked.jpg')
+        StoredImage.objects.create(content_hash='a' * 64, path='waste/leaked.jpg', public_url=leaked_url)
+        StoredImage.objects.filter(path='waste/leaked.jpg').update(
+            last_acquired_at=StoredImage.objects.get().created_at.replace(year=2000)
+        )
+        acquired_url = self.store(bucket, 'waste/acquired.jpg')
+        StoredImage.objects.create(content_hash='b' * 64, path='waste/acquired.jpg', public_url=acquired_url)
+
+        self.run()
+
+        assert not bucket.exists('waste/leaked.jpg')
+        assert not StoredImage.objects.filter(path='waste/leaked.jpg').exists()
+        assert bucket.exists('waste/acquired.jpg')
@@ -0,0 +1,46 @@
+"""
+Tests for the grid-cell index and haversine helpers
+"""
+import pytest
+from common.geo import cell_ranges, grid_cell, haversine_km
+
+
+def test_haversine_known_distance():
+    # Istanbul (Taksim) to Ankara (Kizilay), roughly 350 km apart
+    assert haversine_km(41.0370, 28.9850, 39.9208, 32.8541) == pytest.approx(350, abs=5)
+    assert haversine_km(10, 20, 10, 20) == 0
+
+
+def test_grid_cell_wraps_longitude():
+    assert grid_cell(41.03, 28.98) == (410, 289)
+    assert grid_cell(-0.05, 180.0) == grid_cell(-0.05, -180.0) == (-1, -1800)
+
+
+def test_cell_ranges_cover_radius():
+    rows, columns = cell_ranges(41.0, 29.0, 10)
+    assert rows[0] <= 409 and rows[1] >= 410
+    assert len(columns) == 1 and columns[0][0] <= 288 and columns[0][1] >= 291
+
+
+def test_cell_ranges_reach_points_at_the_radius_edge():
+    # 99.98 km away, one row beyond a box sized with 111.32 km per degree
+    assert haversine_km(0.001, 0, 0.9001, 0) < 100
+    rows, columns = cell_ranges(0.001, 0, 100)
+    row, column = grid_cell(0.9001, 0)
+    assert rows[0] <= row <= rows[1]
+    assert any(first <= column <= last for first, last in columns)
+
+    # Same along the equator in longitude
+    rows, columns = cell_ranges(0, 0.001, 100)
+    row, column = grid_cell(0, 0.9001)
+    assert any(first <= column <= last for first, last in columns)
+
+
+def test_cell_ranges_split_at_antimeridian():
+    rows, columns = cell_ranges(-17.0, 179.95, 20)
+    assert columns == [(columns[0][0], 1799), (-1800, columns[1][1])]
+    assert columns[0][0] > 1790 and columns[1][1] < -1790
+
+
+def test_cell_ranges_near_pole_span_all_longitudes():
+    assert cell_ranges(89.95, 0, 50)[1] is None
@@ -0,0 +1,164 @@
+"""
+Tests for storage retries, timeouts, the circuit breaker and metrics
+"""
+import httpx
+import pytest
+from unittest.mock import MagicMock, patch
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from storage3.exceptions import StorageApiError
+from common import metrics
+from common.exceptions import CircuitOpenError, StorageUnavailableError
+from common.resilience import CircuitBreaker
+from common.supabase_storage import (
+    delete_images, get_supabase_client, is_transient_error, storage_breaker, upload_image
+)
+from apps.waste.tests.factories import UserFactory
+
+PUBLIC_PREFIX = "https://example.supabase.co/storage/v1/object/public/images/"
+
+
+@pytest.fixture(autouse=True)
+def clean_state(settings):
+    settings.STORAGE_RETRY_ATTEMPTS = 3
+    storage_breaker.reset()
+    metrics.reset()
+    with patch('common.supabase_storage.time.sleep') as sleep:
+        yield sleep
+    storage_breaker.reset()
+    metrics.reset()
+
+
+@pytest.fixture
+def bucket():
+    bucket = MagicMock()
+    bucket.get_public_url.side_effect = lambda path: f"{PUBLIC_PREFIX}{path}"
+    client = MagicMock()
+    client.storage.from_.return_value = bucket
+    with patch('common.supabase_storage.get_supabase_client', return_value=client):
+        yield bucket
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_and_rejects(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_half_open_allows_single_trial(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestTransientErrors:
+
+    @pytest.mark.parametrize('error, expected', [
+        (httpx.ConnectTimeout('timeout'), True),
+        (httpx.ConnectError('refused'), True),
+        (StorageApiError('boom', 'InternalError', 503), True),
+        (StorageApiError('exists', 'Duplicate', 409), False),
+        (ValueError('bad'), False),
+    ])
+    def test_classification(self, error, expected):
+        assert is_transient_error(error) is expected
+
+
+@pytest.mark.django_db
+class TestStorageCalls:
+
+    def test_idempotent_upload_retried_on_timeout(self, bucket, clean_state):
+        bucket.upload.side_effect = [httpx.ReadTimeout('slow'), {'path': 'x'}]
+
+        url = upload_image(b"bytes", folder_path='waste', content_type='image/png')
+
+        assert url.startswith(PUBLIC_PREFIX)
+        assert bucket.upload.call_count == 2
+        assert clean_state.call_count == 1
+        counters = metrics.snapshot()['counters']
+        assert counters['storage.upload.failures'] == 1
+        assert counters['storage.upload.retries'] == 1
+        assert metrics.snapshot()['histograms']['storage.upload.seconds']['count'] == 2
+
+    def test_create_only_upload_not_retried(self, bucket):
+        bucket.upload.side_effect = httpx.ReadTimeout('slow')
+
+        with pytest.raises(ValueError):
+            upload_image(b"bytes", folder_path='waste', filename='fixed.png')
+
+        assert bucket.upload.call_count == 1
+
+    def test_client_errors_not_retried_and_keep_breaker_closed(self, bucket, settings):
+        settings.STORAGE_BREAKER_FAILURE_THRESHOLD = 1
+        bucket.remove.side_effect = StorageApiError('denied', 'Unauthorized', 403)
+
+        assert delete_images(['waste/a.png']) is False
+
+        assert bucket.remove.call_count == 1
+        assert storage_breaker.state == CircuitBreaker.CLOSED
+
+    def test_open_breaker_fails_fast(self, bucket, settings):
+        settings.STORAGE_RETRY_ATTEMPTS = 1
+        settings.STORAGE_BREAKER_FAILURE_THRESHOLD = 2
+        bucket.remove.side_effect = httpx.ConnectError('refused')
+        delete_images(['waste/a.png'])
+        assert storage_breaker.state == CircuitBreaker.CLOSED
+        delete_images(['waste/a.png'])
+        calls = bucket.remove.call_count
+
+        assert calls == 2
+        assert storage_breaker.state == CircuitBreaker.OPEN
+        assert storage_breaker.snapshot()['failure_threshold'] == 2
+        assert delete_images(['waste/a.png']) is False
+        assert bucket.remove.call_count == calls
+        with pytest.raises(StorageUnavailableError):
+            upload_image(b"bytes", folder_path='waste', content_type='image/png')
+        assert metrics.snapshot()['counters']['storage.remove.rejected'] == 1
+
+
+class TestSupabaseClient:
+
+    def test_clients_cached_per_timeout(self, settings):
+        settings.SUPABASE_URL = 'https://example.supabase.co'
+        settings.SUPABASE_SERVICE_KEY = 'key'
+        with patch('common.supabase_storage._clients', {}), \
+                patch('common.supabase_storage.create_client') as create_client:
+            create_client.side_effect = lambda *args, **kwargs: MagicMock()
+            first = get_supabase_client(10)
+            assert get_supabase_client(10) is first
+            assert get_supabase_client(30) is not first
+
+        assert create_client.call_count == 2
+        assert create_client.call_args.kwargs['options'].storage_client_timeout == 30
+
+
+@pytest.mark.django_db
+class TestStorageHealthView:
+
+    def test_admin_sees_breaker_and_metrics(self):
+        metrics.observe('storage.upload.seconds', 0.2)
+        client = APIClient()
+        client.force_authenticate(user=UserFactory(is_staff=True))
+
+        response = client.get(reverse('storage-health'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['circuit_breaker']['state'] == 'closed'
+        assert response.data['metrics']['histograms']['storage.upload.seconds']['buckets']['0.25'] == 1
+
+    def test_regular_users_forbidden(self):
+        client = APIClient()
+        client.force_authenticate(user=UserFactory())
+
+        assert client.get(reverse('storage-health')).status_code == status.HTTP_403_FORBIDDEN
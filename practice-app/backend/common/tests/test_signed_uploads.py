@@ -0,0 +1,138 @@
+"""
+Tests for direct-to-storage signed uploads against the local storage backend
+"""
+import pytest
+from urllib.parse import urlsplit
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from apps.events.models import Event
+from apps.waste.models import WasteLog
+from apps.waste.tests.factories import UserFactory, SubCategoryFactory
+from common.models import PendingImageDeletion, StoredImage
+from common.supabase_storage import release_image
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+class TestSignedUploads:
+
+    @pytest.fixture(autouse=True)
+    def local_storage(self, settings, tmp_path):
+        settings.STORAGE_BACKEND = 'local'
+        settings.LOCAL_STORAGE_ROOT = tmp_path
+        settings.LOCAL_STORAGE_BASE_URL = 'http://testserver'
+        return tmp_path
+
+    @pytest.fixture
+    def user(self):
+        return UserFactory()
+
+    @pytest.fixture
+    def client(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def request_upload(self, client, folder):
+        response = client.post(reverse('storage-signed-upload'), {'folder': folder, 'content_type': 'image/png'}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.data
+
+    def put_bytes(self, upload_url, data=b'image-bytes'):
+        parts = urlsplit(upload_url)
+        return APIClient().put(f"{parts.path}?{parts.query}", data=data, content_type='image/png')
+
+    def test_upload_and_attach_to_waste_log(self, client, user, local_storage):
+        log = WasteLog.objects.create(user=user, sub_category=SubCategoryFactory(), quantity=1)
+        signed = self.request_upload(client, 'waste')
+        assert signed['path'].startswith('waste/')
+
+        assert self.put_bytes(signed['upload_url']).status_code == status.HTTP_200_OK
+        assert (local_storage / 'images' / signed['path']).read_bytes() == b'image-bytes'
+
+        response = client.post(
+            reverse('storage-signed-upload-confirm'),
+            {'upload_token': signed['upload_token'], 'object_id': log.id},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        log.refresh_from_db()
+        assert log.disposal_photo_url == response.data['image_url']
+        assert log.disposal_photo_url.endswith(f"/public/images/{signed['path']}")
+
+    def test_profile_upload_defaults_to_current_user(self, client, user):
+        signed = self.request_upload(client, 'profiles')
+        self.put_bytes(signed['upload_url'])
+
+        response = client.post(reverse('storage-signed-upload-confirm'), {'upload_token': signed['upload_token']}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.profile_picture_url == response.data['image_url']
+
+    def test_confirm_before_upload_is_rejected(self, client, user):
+        log = WasteLog.objects.create(user=user, quantity=1)
+        signed = self.request_upload(client, 'waste')
+
+        response = client.post(
+            reverse('storage-signed-upload-confirm'),
+            {'upload_token': signed['upload_token'], 'object_id': log.id},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_cannot_attach_to_someone_elses_event(self, client):
+        event = Event.objects.create(title='Cleanup', creator=UserFactory(), date=timezone.now())
+        signed = self.request_upload(client, 'events')
+        self.put_bytes(signed['upload_url'])
+
+        response = client.post(
+            reverse('storage-signed-upload-confirm'),
+            {'upload_token': signed['upload_token'], 'object_id': event.id},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        event.refresh_from_db()
+        assert event.image_url is None
+
+    def test_upload_token_is_single_use(self, client, user, django_capture_on_commit_callbacks):
+        first = WasteLog.objects.create(user=user, sub_category=SubCategoryFactory(), quantity=1)
+        second = WasteLog.objects.create(user=user, sub_category=SubCategoryFactory(), quantity=1)
+        signed = self.request_upload(client, 'waste')
+        self.put_bytes(signed['upload_url'])
+        url = reverse('storage-signed-upload-confirm')
+
+        assert client.post(url, {'upload_token': signed['upload_token'], 'object_id': first.id},
+                           format='json').status_code == status.HTTP_200_OK
+        response = client.post(url, {'upload_token': signed['upload_token'], 'object_id': second.id}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        second.refresh_from_db()
+        assert second.disposal_photo_url is None
+        assert StoredImage.objects.get(path=signed['path']).ref_count == 1
+
+        # Replacing the image releases the tracked reference
+        first.refresh_from_db()
+        with django_capture_on_commit_callbacks(execute=True):
+            release_image(first.disposal_photo_url)
+        assert not StoredImage.objects.exists()
+        assert PendingImageDeletion.objects.get().path == signed['path']
+
+    def test_token_is_bound_to_user(self, client, user):
+        signed = self.request_upload(client, 'profiles')
+        self.put_bytes(signed['upload_url'])
+
+        other = APIClient()
+        other.force_authenticate(user=UserFactory())
+        response = other.post(reverse('storage-signed-upload-confirm'), {'upload_token': signed['upload_token']}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_tampered_upload_token_is_rejected(self, client):
+        signed = self.request_upload(client, 'waste')
+        response = self.put_bytes(signed['upload_url'].replace('token=', 'token=x'))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_unknown_folder_is_rejected(self, client):
+        response = client.post(reverse('storage-signed-upload'), {'folder': 'secrets'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
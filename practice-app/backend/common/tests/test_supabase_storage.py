@@ -0,0 +1,165 @@
+"""
+Tests for content-addressed image storage
+"""
+import hashlib
+import pytest
+from unittest.mock import MagicMock, patch
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from common.models import StoredImage, PendingImageDeletion
+from common.supabase_storage import upload_image, upload_base64_image, release_image
+
+PUBLIC_PREFIX = "https://example.supabase.co/storage/v1/object/public/images/"
+
+
+@pytest.mark.django_db
+class TestContentAddressedUpload:
+    """Identical bytes map to one stored object with a reference count"""
+
+    @pytest.fixture
+    def bucket(self):
+        """Mock Supabase bucket returning public URLs for uploaded paths"""
+        bucket = MagicMock()
+        bucket.get_public_url.side_effect = lambda path: f"{PUBLIC_PREFIX}{path}"
+        client = MagicMock()
+        client.storage.from_.return_value = bucket
+        with patch('common.supabase_storage.get_supabase_client', return_value=client):
+            yield bucket
+
+    def test_repeat_upload_skips_transfer(self, bucket):
+        first = upload_image(b"same-bytes", folder_path='waste', content_type='image/png')
+        second = upload_image(b"same-bytes", folder_path='events', content_type='image/png')
+
+        digest = hashlib.sha256(b"same-bytes").hexdigest()
+        assert first == second == f"{PUBLIC_PREFIX}waste/{digest}.png"
+        assert bucket.upload.call_count == 1
+        assert StoredImage.objects.get(content_hash=digest).ref_count == 2
+
+    def test_different_bytes_are_stored_separately(self, bucket):
+        upload_image(b"first", folder_path='waste', content_type='image/jpeg')
+        upload_image(b"second", folder_path='waste', content_type='image/jpeg')
+
+        assert bucket.upload.call_count == 2
+        assert StoredImage.objects.count() == 2
+
+    def test_base64_upload_is_deduplicated(self, bucket):
+        base64_image = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+        upload_base64_image(base64_image, folder_path='profiles')
+        upload_base64_image(base64_image, folder_path='profiles')
+
+        assert bucket.upload.call_count == 1
+
+    def test_object_removed_only_with_last_reference(self, bucket, django_capture_on_commit_callbacks):
+        url = upload_image(b"shared", folder_path='waste', content_type='image/jpeg')
+        upload_image(b"shared", folder_path='events', content_type='image/jpeg')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert release_image(url) is True
+        assert not PendingImageDeletion.objects.exists()
+        assert StoredImage.objects.get(public_url=url).ref_count == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert release_image(url) is True
+        assert not StoredImage.objects.exists()
+        assert PendingImageDeletion.objects.count() == 1
+        bucket.remove.assert_not_called()
+
+    def test_losing_concurrent_upload_is_removed(self, bucket, django_capture_on_commit_callbacks):
+        winner = upload_image(b"raced", folder_path='waste', content_type='image/png')
+
+        # The other request checked for the bytes before the winner stored them
+        with patch('common.supabase_storage._acquire_stored_image', return_value=None):
+            with django_capture_on_commit_callbacks(execute=True):
+                loser = upload_image(b"raced", folder_path='waste', content_type='image/jpeg')
+
+        digest = hashlib.sha256(b"raced").hexdigest()
+        assert loser == winner
+        assert StoredImage.objects.get().ref_count == 2
+        assert PendingImageDeletion.objects.get().path == f"waste/{digest}.jpg"
+
+    def test_reupload_cancels_queued_deletion(self, bucket, django_capture_on_commit_callbacks):
+        url = upload_image(b"again", folder_path='waste', content_type='image/png')
+        with django_capture_on_commit_callbacks(execute=True):
+            release_image(url)
+        assert PendingImageDeletion.objects.exists()
+
+        assert upload_image(b"again", folder_path='waste', content_type='image/png') == url
+
+        assert StoredImage.objects.get().ref_count == 1
+        assert not PendingImageDeletion.objects.exists()
+
+    def test_untracked_image_is_queued_directly(self, bucket, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            assert release_image(f"{PUBLIC_PREFIX}waste/legacy.jpg") is True
+        assert PendingImageDeletion.objects.get().path == 'waste/legacy.jpg'
+
+
+@pytest.mark.django_db
+class TestDeferredImageDeletion:
+    """Deletions are queued on commit and drained in batches"""
+
+    @pytest.fixture
+    def bucket(self):
+        bucket = MagicMock()
+        client = MagicMock()
+        client.storage.from_.return_value = bucket
+        with patch('common.supabase_storage.get_supabase_client', return_value=client):
+            yield bucket
+
+    def test_rolled_back_release_queues_nothing(self, bucket, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    release_image(f"{PUBLIC_PREFIX}waste/kept.jpg")
+                    raise RuntimeError("rollback")
+            except RuntimeError:
+                pass
+        assert not PendingImageDeletion.objects.exists()
+
+    def test_queue_is_drained_in_batches(self, bucket):
+        PendingImageDeletion.objects.bulk_create(
+            [PendingImageDeletion(path=f"waste/{i}.jpg") for i in range(5)]
+        )
+
+        call_command('process_image_deletions', batch_size=2, stdout=MagicMock())
+
+        assert bucket.remove.call_count == 3
+        assert bucket.remove.call_args_list[0].args[0] == ['waste/0.jpg', 'waste/1.jpg']
+        assert not PendingImageDeletion.objects.exists()
+
+    def test_failed_batch_stays_queued(self, bucket):
+        bucket.remove.side_effect = RuntimeError("storage down")
+        PendingImageDeletion.objects.create(path="waste/a.jpg")
+
+        call_command('process_image_deletions', stdout=MagicMock())
+
+        pending = PendingImageDeletion.objects.get()
+        assert pending.attempts == 1
+        assert pending.next_attempt_at > pending.queued_at
+
+        # Backing off: the row is not retried before next_attempt_at
+        call_command('process_image_deletions', stdout=MagicMock())
+        assert bucket.remove.call_count == 1
+
+    @override_settings(IMAGE_DELETION_MAX_ATTEMPTS=2)
+    def test_exhausted_row_no_longer_blocks_queue(self, bucket):
+        PendingImageDeletion.objects.create(path="waste/stuck.jpg", attempts=2)
+        PendingImageDeletion.objects.create(path="waste/b.jpg")
+
+        call_command('process_image_deletions', stdout=MagicMock())
+
+        bucket.remove.assert_called_once_with(['waste/b.jpg'])
+        assert PendingImageDeletion.objects.get().path == "waste/stuck.jpg"
+
+    def test_reuploaded_path_is_not_removed(self, bucket):
+        StoredImage.objects.create(
+            content_hash="a" * 64, path="waste/reused.jpg",
+            public_url=f"{PUBLIC_PREFIX}waste/reused.jpg"
+        )
+        PendingImageDeletion.objects.create(path="waste/reused.jpg")
+
+        call_command('process_image_deletions', stdout=MagicMock())
+
+        bucket.remove.assert_not_called()
+        assert not PendingImageDeletion.objects.exists()
@@ -212,6 +212,36 @@ SUPABASE_STORAGE = {
     'BUCKET': SUPABASE_STORAGE_BUCKET,
 }
 
+# Image storage backend: 'supabase' or 'local' (files under MEDIA_ROOT, for development and tests)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'supabase')
+LOCAL_STORAGE_ROOT = MEDIA_ROOT / 'storage' / 'public'
+LOCAL_STORAGE_BASE_URL = os.getenv('LOCAL_STORAGE_BASE_URL', 'http://localhost:8000')
+
+# Seconds a signed direct-to-storage upload stays valid (upload and confirm)
+SIGNED_UPLOAD_EXPIRES = int(os.getenv('SIGNED_UPLOAD_EXPIRES', '600'))
+
+# Storage call resilience: per-operation timeouts (seconds), retries for
+# idempotent calls, and a circuit breaker that fails fast while storage is down
+STORAGE_TIMEOUTS = {
+    'default': int(os.getenv('STORAGE_TIMEOUT', '10')),
+    'upload': int(os.getenv('STORAGE_UPLOAD_TIMEOUT', '30')),
+}
+STORAGE_RETRY_ATTEMPTS = int(os.getenv('STORAGE_RETRY_ATTEMPTS', '3'))
+STORAGE_RETRY_BASE_DELAY = float(os.getenv('STORAGE_RETRY_BASE_DELAY', '0.2'))
+STORAGE_BREAKER_FAILURE_THRESHOLD = int(os.getenv('STORAGE_BREAKER_FAILURE_THRESHOLD', '5'))
+STORAGE_BREAKER_RESET_TIMEOUT = int(os.getenv('STORAGE_BREAKER_RESET_TIMEOUT', '30'))
+
+# Failed removals of a queued image are retried with exponential backoff
+# (seconds, doubled per attempt up to the cap) and set aside after the last attempt
+IMAGE_DELETION_MAX_ATTEMPTS = int(os.getenv('IMAGE_DELETION_MAX_ATTEMPTS', '8'))
+IMAGE_DELETION_RETRY_DELAY = int(os.getenv('IMAGE_DELETION_RETRY_DELAY', '60'))
+IMAGE_DELETION_MAX_RETRY_DELAY = int(os.getenv('IMAGE_DELETION_MAX_RETRY_DELAY', '21600'))
+
+# Seconds the in-process index of active challenges is reused before it is
+# rebuilt. Changes are announced through a version token in the cache, so this
+# only bounds staleness when CACHES is not shared between processes
+ACTIVE_CHALLENGE_INDEX_TTL = int(os.getenv('ACTIVE_CHALLENGE_INDEX_TTL', '300'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
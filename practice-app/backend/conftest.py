@@ -38,4 +38,12 @@ def admin_client(api_client, django_user_model):
         password='adminpass123'
     )
     api_client.force_authenticate(user=admin)
-    return api_client, admin 
\ No newline at end of file
+    return api_client, admin 
+
+@pytest.fixture(autouse=True)
+def reset_active_challenge_index():
+    """The index lives in process memory, so it must not leak rows rolled back by other tests"""
+    from apps.challenges.index import active_challenges
+    active_challenges.invalidate()
+    yield
+    active_challenges.invalidate()